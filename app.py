@@ -1,23 +1,22 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_from_directory, session, make_response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, send_from_directory, session, make_response
 from flask_login import LoginManager, current_user, UserMixin, login_user, logout_user
 import os
-import whisper
 import logging
 from datetime import datetime
 from config import get_config
 import tempfile
 import uuid
 import shutil
-import threading
 from PyPDF2 import PdfWriter, PdfReader
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from io import BytesIO
 from werkzeug.utils import secure_filename
 import subprocess
 import requests
 import yt_dlp
 import re
+from src.services.model_pool import model_pool
+from src.services.render_cache import render_cache, text_hash
+from src.services.youtube_service import YouTubeService
+from src.utils.pdf_writer import StreamingPDFWriter, PAGE_LETTER
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -46,85 +45,26 @@ PDF_FOLDER = 'pdfs'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PDF_FOLDER, exist_ok=True)
 
-# Modelo Whisper para transcrição
-whisper_model = None
-whisper_lock = threading.Lock()
-
-def get_whisper_model():
-    global whisper_model
-    if whisper_model is None:
-        with whisper_lock:
-            if whisper_model is None:
-                logger.info("Carregando modelo Whisper...")
-                whisper_model = whisper.load_model("base")
-                logger.info("Modelo Whisper carregado")
-    return whisper_model
+# Modelos Whisper para transcrição (pool compartilhado com src/)
+def get_whisper_model(model_name="base"):
+    return model_pool.get(model_name, device=get_config().WHISPER_DEVICE)
 
 def text_to_pdf(text, output_path):
-    """Converte texto para PDF usando reportlab"""
-    buffer = BytesIO()
-    # Criar um PDF com reportlab
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Configurar fonte e tamanho
-    c.setFont("Helvetica", 12)
-    
-    # Margens
-    margin = 50
-    y = height - margin
-    
-    # Título
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(margin, y, "Transcrição de Áudio/Vídeo")
-    y -= 30
-    
-    # Data
-    c.setFont("Helvetica", 10)
-    current_date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    c.drawString(margin, y, f"Gerado em: {current_date}")
-    y -= 30
-    
-    # Conteúdo da transcrição
-    c.setFont("Helvetica", 12)
-    
-    # Dividir o texto em linhas
-    lines = text.split('\n')
-    for line in lines:
-        # Verificar se precisamos de uma nova página
-        if y < margin:
-            c.showPage()
-            y = height - margin
-            c.setFont("Helvetica", 12)
-        
-        # Desenhar texto
-        words = line.split()
-        if words:
-            line_text = ""
-            for word in words:
-                test_text = line_text + " " + word if line_text else word
-                text_width = c.stringWidth(test_text, "Helvetica", 12)
-                
-                if text_width > width - 2 * margin:
-                    c.drawString(margin, y, line_text)
-                    y -= 20
-                    line_text = word
-                else:
-                    line_text = test_text
-            
-            if line_text:
-                c.drawString(margin, y, line_text)
-        
-        y -= 20
-    
-    # Finalizar o PDF
-    c.showPage()
-    c.save()
-    
-    # Obter o conteúdo do buffer e salvá-lo no arquivo
-    buffer.seek(0)
-    with open(output_path, "wb") as f:
-        f.write(buffer.getvalue())
+    """Converte texto para PDF, gravando as páginas direto no arquivo"""
+    with StreamingPDFWriter(output_path, page_size=PAGE_LETTER, margin=50) as pdf:
+        # Título
+        pdf.add_line("Transcrição de Áudio/Vídeo", font="bold", size=16, leading=30)
+        
+        # Data
+        current_date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        pdf.add_line(f"Gerado em: {current_date}", size=10, leading=30)
+        
+        # Conteúdo da transcrição, com quebra automática de linhas
+        for line in text.split('\n'):
+            if line.strip():
+                pdf.add_paragraph(line, size=12, leading=20)
+            else:
+                pdf.add_space(20)
 
 # Rotas de autenticação
 @app.route('/login', methods=['GET', 'POST'])
@@ -303,6 +243,7 @@ def transcribe():
         # Criar diretório temporário para processamento
         temp_dir = tempfile.mkdtemp()
         audio_path = os.path.join(temp_dir, "audio_input.mp3")
+        duration = 0
         
         # Processar entrada (arquivo ou URL)
         if has_file:
@@ -339,34 +280,21 @@ def transcribe():
             if is_youtube or not url.endswith(('.mp3', '.wav', '.ogg', '.mp4', '.avi', '.mov', '.wmv', '.flv')):
                 # Usar yt-dlp para YouTube e outras plataformas de vídeo
                 try:
-                    # Definir opções do yt-dlp
-                    ydl_opts = {
-                        'format': 'bestaudio/best',
-                        'outtmpl': audio_path,
-                        'quiet': True,
-                        'no_warnings': True,
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192',
-                        }],
-                    }
+                    # Menor formato só de áudio, convertido direto para 16 kHz mono
+                    output_base = os.path.join(temp_dir, "audio_input")
+                    ydl_opts = YouTubeService.build_options(f"{output_base}.%(ext)s")
                     
                     # Baixar o áudio
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(url, download=True)
                         # Obter título do vídeo, se disponível
                         video_title = info.get('title', url)
-                        
-                    # Verificar se o arquivo foi baixado
-                    if not os.path.exists(audio_path):
-                        audio_path = audio_path + ".mp3"  # yt-dlp adiciona extensão
                     
-                    input_path = audio_path
+                    input_path = YouTubeService.downloaded_path(info, output_base)
                     original_filename = video_title
                     
                     # Obter duração do vídeo, se disponível (em segundos)
-                    duration = info.get('duration', 0)
+                    duration = info.get('duration') or 0
                     
                 except Exception as e:
                     logger.error(f"Erro ao baixar vídeo: {str(e)}")
@@ -390,9 +318,8 @@ def transcribe():
                     logger.error(f"Erro ao baixar arquivo: {str(e)}")
                     return jsonify({'error': f'Erro ao baixar arquivo: {str(e)}'}), 500
         
-        # Obter informações do arquivo
-        duration = 0
-        if 'duration' not in locals() or not duration:
+        # Obter informações do arquivo (downloads do yt-dlp já informam a duração)
+        if not duration:
             try:
                 # Tentar obter duração do arquivo com ffprobe se disponível
                 import subprocess
@@ -408,20 +335,19 @@ def transcribe():
                 # Se não conseguir, não se preocupe
                 duration = 0
                 
-        # Carregar o modelo Whisper especificado
-        logger.info(f"Carregando modelo Whisper: {model_name}")
-        model = whisper.load_model(model_name)
-        
-        # Transcrever arquivo
-        logger.info(f"Iniciando transcrição do arquivo: {original_filename if has_file else url}")
-        
         # Configure opções com base no idioma e outras configurações
         transcribe_options = {}
         if language:
             transcribe_options['language'] = language
+        
+        # Carregar o modelo Whisper especificado (mantido no pool até o fim da transcrição)
+        with model_pool.leased():
+            logger.info(f"Obtendo modelo Whisper: {model_name}")
+            model = get_whisper_model(model_name)
             
-        # Executar transcrição
-        result = model.transcribe(input_path, **transcribe_options)
+            # Executar transcrição
+            logger.info(f"Iniciando transcrição do arquivo: {original_filename if has_file else url}")
+            result = model.transcribe(input_path, **transcribe_options)
         
         # Obter o texto transcrito
         text = result["text"]
@@ -610,23 +536,20 @@ def download_transcription(transcription_id):
         format_type = request.args.get('format', 'txt')
         
         if format_type == 'pdf':
-            # Gerar PDF
             title = transcription['title'] or transcription['original_filename']
             filename = f"{title}.pdf".replace(' ', '_')
+            text = transcription['transcription_text']
             
-            # Diretório temporário para o PDF
-            pdf_dir = os.path.join(os.getcwd(), 'transcricoes_pdf')
-            os.makedirs(pdf_dir, exist_ok=True)
-            
-            pdf_path = os.path.join(pdf_dir, f"{uuid.uuid4()}.pdf")
-            
-            # Criar o PDF
-            text_to_pdf(transcription['transcription_text'], pdf_path)
+            # Renderizado apenas no primeiro download de cada versão do texto;
+            # os seguintes são servidos do cache de exportações
+            pdf_path = render_cache.get_or_render(
+                transcription_id, 'pdf', text_hash(text),
+                lambda output_path: text_to_pdf(text, output_path)
+            )
             
             # Enviar o arquivo
-            return send_from_directory(
-                directory=os.path.dirname(pdf_path),
-                path=os.path.basename(pdf_path),
+            return send_file(
+                pdf_path,
                 as_attachment=True,
                 download_name=re.sub(r'[^\w\.-]', '_', filename)
             )
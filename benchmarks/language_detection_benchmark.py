@@ -0,0 +1,101 @@
+"""
+Compara as formas de detectar o idioma no modo auto, por tamanho de modelo.
+
+Para cada modelo e arquivo, transcreve com:
+
+- separada: detecção em uma passagem própria do encoder e depois o
+  transcribe com o idioma (comportamento anterior)
+- primeira janela: a detecção reaproveita a saída do encoder da primeira
+  janela decodificada (como o TranscriptionManager faz)
+- modelo menor: idioma detectado pelo --detection-model antes do modelo
+  maior (Config.LANGUAGE_DETECTION_MODEL)
+
+Mostra as passagens do encoder por tarefa, as poupadas em relação à
+detecção separada, o tempo e se o idioma detectado coincide.
+
+Uso:
+    python benchmarks/language_detection_benchmark.py curto.mp3 longo.mp3 --models base small medium
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import whisper
+
+from src.utils.audio import decode_audio, WINDOW_SECONDS
+from src.utils.language_detection import EncoderReuse, detect_language, install_encoder_reuse
+
+def run_separate(model, audio):
+    """Detecção em uma passagem própria, sem reaproveitar o encoder"""
+    with EncoderReuse(reuse=False) as reuse:
+        window = whisper.pad_or_trim(audio.head(WINDOW_SECONDS))
+        mel = whisper.log_mel_spectrogram(window, model.dims.n_mels).to(model.device)
+        _, probs = model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        model.transcribe(audio.samples, language=language)
+    return language, reuse.passes, 0
+
+def run_first_window(model, audio):
+    """Detecção na primeira janela, com a saída do encoder reaproveitada"""
+    with EncoderReuse() as reuse:
+        language = model.transcribe(audio.samples)["language"]
+    return language, reuse.passes, reuse.reused
+
+def run_small_model(model, detection_model, audio):
+    """Detecção com o modelo menor; o modelo maior só transcreve"""
+    with EncoderReuse(reuse=False) as detection:
+        language, _ = detect_language(detection_model, audio.samples)
+    with EncoderReuse() as reuse:
+        model.transcribe(audio.samples, language=language)
+    return language, reuse.passes, reuse.reused, detection.passes
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Passagens do encoder poupadas na detecção de idioma")
+    parser.add_argument("files", nargs="+", help="Arquivos de áudio ou vídeo")
+    parser.add_argument("--models", nargs="+", default=["base", "small"], help="Modelos Whisper")
+    parser.add_argument("--detection-model", default="base", help="Modelo menor para a detecção")
+    args = parser.parse_args()
+    
+    audios = [(os.path.basename(path), decode_audio(path)) for path in args.files]
+    detection_model = install_encoder_reuse(whisper.load_model(args.detection_model))
+    
+    for model_name in args.models:
+        model = install_encoder_reuse(whisper.load_model(model_name))
+        use_small = model_name != args.detection_model
+        saved_total = 0
+        
+        print(f"\nModelo {model_name}")
+        for name, audio in audios:
+            (separate_language, separate_passes, _), separate_time = timed(run_separate, model, audio)
+            (language, passes, reused), first_time = timed(run_first_window, model, audio)
+            saved = separate_passes - passes
+            saved_total += saved
+            
+            print(f"  {name} ({audio.duration:.0f}s)")
+            print(f"    separada:        {separate_passes} passagens, {separate_time:.1f}s, idioma {separate_language}")
+            print(f"    primeira janela: {passes} passagens ({reused} reaproveitadas, {saved} poupadas), "
+                  f"{first_time:.1f}s, idioma {language}"
+                  f"{'' if language == separate_language else ' (diferente)'}")
+            
+            if use_small:
+                (small_language, small_passes, _, detection_passes), small_time = timed(
+                    run_small_model, model, detection_model, audio
+                )
+                print(f"    modelo menor:    {small_passes} passagens do {model_name} + {detection_passes} do "
+                      f"{args.detection_model} ({separate_passes - small_passes} do {model_name} poupadas), "
+                      f"{small_time:.1f}s, idioma {small_language}"
+                      f"{'' if small_language == separate_language else ' (diferente)'}")
+        
+        print(f"  Passagens do encoder poupadas por tarefa (primeira janela): {saved_total / len(audios):.2f}")
+
+if __name__ == "__main__":
+    main()
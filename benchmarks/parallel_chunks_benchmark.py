@@ -0,0 +1,90 @@
+"""
+Compara a transcrição sequencial com a transcrição em trechos paralelos.
+
+Transcreve o mesmo arquivo das duas formas, mede o ganho de tempo e verifica
+se o texto paralelo coincide com o sequencial dentro de uma tolerância
+(similaridade por palavras) e se os timestamps continuam monotônicos.
+Retorna código de saída 1 se a verificação falhar.
+
+Uso:
+    python benchmarks/parallel_chunks_benchmark.py audio.mp3 --model base --tolerance 0.9
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import whisper
+
+from src.utils.audio import decode_audio
+from src.utils.chunking import ParallelChunkTranscriber
+
+def word_similarity(reference, candidate):
+    """Similaridade (0-1) entre dois textos, comparando palavra a palavra"""
+    ref_words = reference.lower().split()
+    cand_words = candidate.lower().split()
+    return difflib.SequenceMatcher(None, ref_words, cand_words, autojunk=False).ratio()
+
+def check_timestamps(segments, duration, slack=1.0):
+    """Verifica se os segmentos estão ordenados e dentro da duração do áudio"""
+    previous_start = -1.0
+    for segment in segments:
+        if segment["start"] < previous_start or segment["end"] < segment["start"]:
+            return False
+        if segment["end"] > duration + slack:
+            return False
+        previous_start = segment["start"]
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcrição sequencial vs. trechos paralelos")
+    parser.add_argument("file", help="Arquivo de áudio ou vídeo")
+    parser.add_argument("--model", default="base", help="Modelo Whisper")
+    parser.add_argument("--language", default=None, help="Idioma (padrão: detectado no modo sequencial)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos no pool paralelo")
+    parser.add_argument("--tolerance", type=float, default=0.9, help="Similaridade mínima aceita")
+    args = parser.parse_args()
+    
+    audio = decode_audio(args.file)
+    print(f"Áudio: {audio.duration:.1f}s")
+    
+    model = whisper.load_model(args.model)
+    params = {"task": "transcribe"}
+    if args.language:
+        params["language"] = args.language
+    
+    start = time.perf_counter()
+    sequential = model.transcribe(audio.samples, **params)
+    sequential_time = time.perf_counter() - start
+    params["language"] = sequential.get("language", args.language)
+    
+    transcriber = ParallelChunkTranscriber(max_workers=args.workers)
+    try:
+        # Aquecimento: inicia o pool e carrega o modelo antes da medição
+        transcriber.transcribe(type(audio)(audio.head(1)), args.model, params)
+        
+        start = time.perf_counter()
+        parallel = transcriber.transcribe(audio, args.model, params)
+        parallel_time = time.perf_counter() - start
+    finally:
+        transcriber.shutdown()
+    
+    similarity = word_similarity(sequential["text"], parallel["text"])
+    timestamps_ok = check_timestamps(parallel["segments"], audio.duration)
+    
+    print(f"Sequencial: {sequential_time:.1f}s | Paralelo: {parallel_time:.1f}s "
+          f"({sequential_time / max(parallel_time, 1e-6):.2f}x)")
+    print(f"Similaridade de palavras: {similarity:.3f} (tolerância {args.tolerance})")
+    print(f"Timestamps monotônicos: {'sim' if timestamps_ok else 'não'}")
+    
+    if similarity < args.tolerance or not timestamps_ok:
+        print("FALHA: resultado paralelo fora da tolerância")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark da geração de PDF para transcrições longas.
+
+Compara o caminho antigo de save_to_pdf (FPDF com quebra fixa de 90
+caracteres e um multi_cell por linha) com o StreamingPDFWriter, para textos
+de 10 mil, 100 mil e 1 milhão de palavras. Mede tempo, pico de memória
+alocada (tracemalloc), número de páginas e tamanho do arquivo.
+
+Uso:
+    python benchmarks/pdf_benchmark.py --words 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.pdf_writer import StreamingPDFWriter, MM
+
+VOCABULARY = (
+    "a o de que e do da em um para é com não uma os no se na por mais as dos como mas "
+    "foi ao ele das tem à seu sua ou ser quando muito há nos já está eu também só pelo "
+    "pela até isso ela entre era depois sem mesmo aos ter seus quem nas me esse eles "
+    "transcrição áudio vídeo reunião projeto análise informação ação atenção questão"
+).split()
+
+def make_text(words, seed=42):
+    """Gera um texto com parágrafos e frases de tamanho variado"""
+    rng = random.Random(seed)
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rng.randint(40, 200))
+        paragraph = " ".join(rng.choice(VOCABULARY) for _ in range(size))
+        paragraphs.append(paragraph.capitalize() + ".")
+        remaining -= size
+    return "\n\n".join(paragraphs)
+
+def legacy_fpdf(text, path):
+    """Caminho antigo de save_to_pdf: quebra por 90 caracteres e multi_cell por linha"""
+    from fpdf import FPDF
+    
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=11)
+    for paragraph in text.split('\n\n'):
+        for line in paragraph.split('\n'):
+            line = line.strip()
+            while len(line) > 0:
+                if len(line) <= 90:
+                    pdf.multi_cell(190, 5, txt=line)
+                    line = ""
+                else:
+                    cut_position = line[:90].rfind(' ')
+                    if cut_position <= 0:
+                        cut_position = 90
+                    pdf.multi_cell(190, 5, txt=line[:cut_position])
+                    line = line[cut_position:].lstrip()
+        pdf.ln(3)
+    pdf.output(path)
+    return pdf.page_no()
+
+def streaming(text, path):
+    """Novo caminho: StreamingPDFWriter com o mesmo layout de save_to_pdf"""
+    with StreamingPDFWriter(path, footer="Página {page}") as pdf:
+        for paragraph in text.split('\n\n'):
+            for line in paragraph.split('\n'):
+                if line.strip():
+                    pdf.add_paragraph(line, size=11, leading=5 * MM)
+            pdf.add_space(3 * MM)
+        return pdf.page_count
+
+def measure(render, text, path, memory):
+    """Executa uma renderização e retorna (segundos, pico_mb, páginas, tamanho_mb)"""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    pages = render(text, path)
+    elapsed = time.perf_counter() - start
+    peak_mb = None
+    if memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return elapsed, peak_mb, pages, os.path.getsize(path) / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de geração de PDF")
+    parser.add_argument("--words", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Tamanhos de texto (em palavras)")
+    parser.add_argument("--legacy-max-words", type=int, default=100000,
+                        help="Maior texto medido no caminho antigo (FPDF)")
+    parser.add_argument("--no-memory", action="store_true", help="Não medir o pico de memória")
+    args = parser.parse_args()
+    
+    output_dir = tempfile.mkdtemp()
+    
+    for words in args.words:
+        text = make_text(words)
+        modes = [("Depois (streaming)", streaming)]
+        if words <= args.legacy_max_words:
+            modes.insert(0, ("Antes (FPDF)", legacy_fpdf))
+        
+        print(f"{words} palavras ({len(text) / (1024 * 1024):.1f} MB de texto)")
+        for name, render in modes:
+            path = os.path.join(output_dir, f"{words}_{render.__name__}.pdf")
+            try:
+                elapsed, peak_mb, pages, size_mb = measure(render, text, path, not args.no_memory)
+            except ImportError as e:
+                print(f"  {name}: ignorado ({str(e)})")
+                continue
+            memory = f" | pico de memória: {peak_mb:.1f} MB" if peak_mb is not None else ""
+            print(f"  {name}: {elapsed:.2f}s | {pages} páginas | {size_mb:.1f} MB{memory}")
+
+if __name__ == "__main__":
+    main()
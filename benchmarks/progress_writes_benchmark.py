@@ -0,0 +1,98 @@
+"""
+Benchmark das gravações de progresso no SQLite.
+
+Compara o caminho antigo (uma sessão, uma consulta, um TranscriptionLog e um
+commit por atualização) com o ProgressWriter (eventos agrupados por tarefa e
+gravados em lote). Usa um banco temporário.
+
+Uso:
+    python benchmarks/progress_writes_benchmark.py --tasks 20 --updates 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.config import Config
+
+Config.DEBUG = False  # evita o echo do SQL
+Config.DB_NAME = os.path.join(tempfile.mkdtemp(), 'progress_benchmark.db')
+
+from src.database.models import init_db, get_session, Transcription, TranscriptionLog
+from src.database.progress_writer import ProgressWriter
+
+def create_tasks(count):
+    """Cria registros de transcrição para o benchmark"""
+    db_session = get_session()
+    task_ids = []
+    for i in range(count):
+        task_id = str(uuid.uuid4())
+        db_session.add(Transcription(
+            task_id=task_id,
+            original_filename=f"arquivo_{i}.mp3",
+            file_type="audio",
+            model_used="base",
+            status="processing"
+        ))
+        task_ids.append(task_id)
+    db_session.commit()
+    db_session.close()
+    return task_ids
+
+def legacy_update(task_id, progress):
+    """Caminho antigo de update_task_progress: uma transação por evento"""
+    db_session = get_session()
+    db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
+    if db_task:
+        db_session.add(TranscriptionLog(
+            transcription_id=db_task.id,
+            status="processing",
+            progress=progress,
+            step="Transcrevendo",
+            message=f"Progresso atualizado para {progress}%"
+        ))
+        db_session.commit()
+    db_session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravações de progresso")
+    parser.add_argument("--tasks", type=int, default=20, help="Tarefas simultâneas")
+    parser.add_argument("--updates", type=int, default=500, help="Atualizações por modo")
+    args = parser.parse_args()
+    
+    init_db()
+    task_ids = create_tasks(args.tasks)
+    
+    # Antes: uma sessão e um commit por atualização
+    start = time.perf_counter()
+    for i in range(args.updates):
+        legacy_update(task_ids[i % len(task_ids)], i % 100)
+    legacy_elapsed = time.perf_counter() - start
+    
+    # Depois: eventos registrados em memória e gravados em lote
+    writer = ProgressWriter(flush_interval_ms=50)
+    writer.start()
+    start = time.perf_counter()
+    for i in range(args.updates):
+        writer.record(task_ids[i % len(task_ids)], i % 100, "Transcrevendo")
+    record_elapsed = time.perf_counter() - start
+    writer.stop()
+    batched_elapsed = time.perf_counter() - start
+    stats = writer.get_stats()
+    
+    print(f"Banco: {Config.DB_NAME}")
+    print(f"Antes: {args.updates} atualizações em {legacy_elapsed:.2f}s "
+          f"({args.updates / legacy_elapsed:.0f} atualizações/s, {args.updates} linhas)")
+    print(f"Depois: {args.updates} atualizações em {batched_elapsed:.2f}s "
+          f"({args.updates / batched_elapsed:.0f} atualizações/s, {stats['rows_written']} linhas, "
+          f"{stats['flushes']} transações)")
+    print(f"Custo na thread de transcrição: {record_elapsed / args.updates * 1e6:.1f} us/atualização "
+          f"(antes: {legacy_elapsed / args.updates * 1e3:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
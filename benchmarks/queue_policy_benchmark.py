@@ -0,0 +1,154 @@
+"""
+Simulação das políticas de despacho da fila (fifo, fair, sjf).
+
+Gera uma carga mista — um usuário que envia vários áudios longos de uma
+vez e muitos usuários com mensagens de voz curtas chegando ao longo do
+tempo — e simula a fila com a QueuePolicy da aplicação, em tempo virtual
+(sem executar o Whisper). Reporta p50/p99 do tempo de espera na fila,
+no geral e por tamanho de tarefa.
+
+Uso:
+    python benchmarks/queue_policy_benchmark.py --workers 2 --long-jobs 20 --short-jobs 300
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.queue_policy import QueuePolicy
+
+def build_workload(long_jobs, short_jobs, medium_jobs, users, hours, high_fraction, seed):
+    """Gera as tarefas da simulação (chegada, usuário, prioridade, duração do áudio e modelo)"""
+    rng = random.Random(seed)
+    jobs = []
+    
+    # Um usuário envia todos os áudios longos (2 h, modelo medium) no instante 0
+    for _ in range(long_jobs):
+        jobs.append({"arrival": 0.0, "user_id": 1, "audio": 2 * 3600, "model": "medium"})
+    
+    # Mensagens de voz curtas de vários usuários, chegando ao longo do período
+    for _ in range(short_jobs):
+        jobs.append({
+            "arrival": rng.uniform(0, hours * 3600),
+            "user_id": rng.randint(2, users + 1),
+            "audio": rng.uniform(20, 180),
+            "model": "base"
+        })
+    
+    # Arquivos médios (reuniões de 10 a 40 minutos)
+    for _ in range(medium_jobs):
+        jobs.append({
+            "arrival": rng.uniform(0, hours * 3600),
+            "user_id": rng.randint(2, users + 1),
+            "audio": rng.uniform(600, 2400),
+            "model": "small"
+        })
+    
+    jobs.sort(key=lambda job: job["arrival"])
+    for seq, job in enumerate(jobs):
+        job["task_id"] = f"job-{seq}"
+        job["seq"] = seq
+        job["priority_name"] = "high" if rng.random() < high_fraction else "normal"
+        job["expected_seconds"] = QueuePolicy.expected_seconds(job["audio"], job["model"])
+        # O tempo real difere da estimativa
+        job["actual_seconds"] = job["expected_seconds"] * rng.uniform(0.8, 1.25)
+    return jobs
+
+def simulate(policy_name, jobs, workers):
+    """
+    Simula a fila com a política informada
+    
+    Returns:
+        dict: task_id -> segundos de espera na fila
+    """
+    policy = QueuePolicy(policy_name, user_weights={})
+    queued = []
+    running = {}  # task_id -> (instante de término, tarefa)
+    waits = {}
+    now = 0.0
+    next_arrival = 0
+    
+    while next_arrival < len(jobs) or queued or running:
+        for task_id, (end, _) in list(running.items()):
+            if end <= now:
+                del running[task_id]
+        
+        while next_arrival < len(jobs) and jobs[next_arrival]["arrival"] <= now:
+            job = jobs[next_arrival]
+            queued.append({
+                "task_id": job["task_id"],
+                "user_id": job["user_id"],
+                "priority": QueuePolicy.priority_value(job["priority_name"]),
+                "expected_seconds": job["expected_seconds"],
+                "enqueued_at": job["arrival"],
+                "seq": job["seq"],
+                "job": job
+            })
+            next_arrival += 1
+        
+        while queued and len(running) < workers:
+            chosen = policy.select(queued, [entry for _, entry in running.values()], now=now)
+            queued.remove(chosen)
+            job = chosen["job"]
+            waits[job["task_id"]] = now - job["arrival"]
+            running[job["task_id"]] = (now + job["actual_seconds"], chosen)
+        
+        upcoming = [end for end, _ in running.values()]
+        if next_arrival < len(jobs):
+            upcoming.append(jobs[next_arrival]["arrival"])
+        if not upcoming:
+            break
+        now = max(now, min(upcoming))
+    
+    return waits
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def format_seconds(seconds):
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f} h"
+    if seconds >= 60:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds:.0f} s"
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação das políticas de despacho da fila")
+    parser.add_argument("--workers", type=int, default=2, help="Número de slots de transcrição")
+    parser.add_argument("--long-jobs", type=int, default=20, help="Áudios de 2 h enviados por um único usuário")
+    parser.add_argument("--short-jobs", type=int, default=300, help="Mensagens de voz curtas (20 s a 3 min)")
+    parser.add_argument("--medium-jobs", type=int, default=20, help="Arquivos de 10 a 40 min")
+    parser.add_argument("--users", type=int, default=30, help="Usuários enviando as tarefas curtas e médias")
+    parser.add_argument("--hours", type=float, default=4.0, help="Período de chegada das tarefas curtas e médias")
+    parser.add_argument("--high-fraction", type=float, default=0.05, help="Fração das tarefas com prioridade alta")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+    
+    jobs = build_workload(args.long_jobs, args.short_jobs, args.medium_jobs, args.users,
+                          args.hours, args.high_fraction, args.seed)
+    groups = {
+        "todas": lambda job: True,
+        "curtas (<3 min)": lambda job: job["audio"] <= 180,
+        "médias": lambda job: 180 < job["audio"] < 3600,
+        "longas (2 h)": lambda job: job["audio"] >= 3600,
+        "prioridade alta": lambda job: job["priority_name"] == "high"
+    }
+    
+    print(f"Tarefas: {len(jobs)} | Workers: {args.workers} | "
+          f"Longas: {args.long_jobs} | Curtas: {args.short_jobs} | Médias: {args.medium_jobs}")
+    for policy_name in QueuePolicy.POLICIES:
+        waits = simulate(policy_name, jobs, args.workers)
+        print(f"\n[{policy_name}]")
+        for name, selector in groups.items():
+            samples = [waits[job["task_id"]] for job in jobs if selector(job)]
+            if not samples:
+                continue
+            print(f"  {name:<16} n={len(samples):<4} espera p50={format_seconds(percentile(samples, 0.50)):>9} "
+                  f"p99={format_seconds(percentile(samples, 0.99)):>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark das consultas de status de tarefas (get_task_status).
+
+Mede quantas consultas por segundo o caminho de get_task_status que vai ao
+banco consegue atender: antes (uma engine nova a cada chamada) e depois
+(engine e sessões em cache, SQLite em modo WAL). Opcionalmente roda um
+escritor concorrente para verificar se há erros "database is locked".
+
+Uso:
+    python benchmarks/task_status_benchmark.py --lookups 2000 --readers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.config import Config
+
+Config.DEBUG = False  # evita o echo do SQL
+Config.DB_NAME = os.path.join(tempfile.mkdtemp(), 'status_benchmark.db')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import init_db, get_session, Transcription, TranscriptionLog
+
+def create_tasks(count):
+    """Cria registros de transcrição para o benchmark"""
+    db_session = get_session()
+    task_ids = []
+    for i in range(count):
+        task_id = str(uuid.uuid4())
+        db_session.add(Transcription(
+            task_id=task_id,
+            original_filename=f"arquivo_{i}.mp3",
+            file_type="audio",
+            model_used="base",
+            status="completed",
+            text_content="texto " * 200
+        ))
+        task_ids.append(task_id)
+    db_session.commit()
+    db_session.close()
+    return task_ids
+
+def legacy_session():
+    """Como get_session() funcionava antes: engine nova a cada chamada"""
+    engine = create_engine(f'sqlite:///{Config.DB_NAME}')
+    return sessionmaker(bind=engine)()
+
+def lookup_status(session_factory, task_id):
+    """Consulta feita por get_task_status quando a tarefa não está em memória"""
+    db_session = session_factory()
+    db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
+    status = db_task.status if db_task else None
+    db_session.close()
+    return status
+
+def run_readers(session_factory, task_ids, lookups, readers, errors):
+    """Executa as consultas distribuídas entre várias threads leitoras"""
+    per_reader = lookups // readers
+    
+    def reader(offset):
+        for i in range(per_reader):
+            try:
+                lookup_status(session_factory, task_ids[(offset + i) % len(task_ids)])
+            except Exception as e:
+                errors.append(str(e))
+    
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return per_reader * readers, time.perf_counter() - start
+
+def run_writer(stop_event, task_ids, errors, written):
+    """Simula workers de transcrição gravando logs de progresso"""
+    db_session = get_session()
+    transcription = db_session.query(Transcription).filter_by(task_id=task_ids[0]).first()
+    transcription_id = transcription.id
+    db_session.close()
+    
+    while not stop_event.is_set():
+        try:
+            db_session = get_session()
+            db_session.add(TranscriptionLog(transcription_id=transcription_id, progress=50))
+            db_session.commit()
+            db_session.close()
+            written[0] += 1
+        except Exception as e:
+            errors.append(str(e))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de get_task_status")
+    parser.add_argument("--lookups", type=int, default=2000, help="Consultas por modo")
+    parser.add_argument("--readers", type=int, default=4, help="Threads leitoras")
+    parser.add_argument("--no-writer", action="store_true", help="Não rodar escritor concorrente")
+    args = parser.parse_args()
+    
+    init_db()
+    task_ids = create_tasks(100)
+    
+    for name, factory in (("Antes (engine por chamada)", legacy_session),
+                          ("Depois (engine em cache + WAL)", get_session)):
+        errors = []
+        written = [0]
+        stop_event = threading.Event()
+        writer = None
+        if not args.no_writer:
+            writer = threading.Thread(target=run_writer, args=(stop_event, task_ids, errors, written))
+            writer.start()
+        
+        count, elapsed = run_readers(factory, task_ids, args.lookups, args.readers, errors)
+        
+        stop_event.set()
+        if writer:
+            writer.join()
+        
+        locked = sum(1 for error in errors if "locked" in error)
+        print(f"{name}: {count / elapsed:.0f} consultas/s | escritas concorrentes: {written[0]} | "
+              f"erros: {len(errors)} (locked: {locked})")
+
+if __name__ == "__main__":
+    main()
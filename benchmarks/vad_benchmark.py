@@ -0,0 +1,106 @@
+"""
+Compara a transcrição do áudio inteiro com a transcrição só dos trechos com fala.
+
+Transcreve o mesmo arquivo das duas formas e mostra a fração de áudio
+descartada pela detecção de voz, o tempo poupado, os segmentos que a
+transcrição completa gerou dentro dos trechos descartados (texto sobre
+silêncio ou música) e a similaridade por palavras entre os dois textos.
+Verifica também se os timestamps convertidos para o tempo original
+continuam monotônicos. Retorna código de saída 1 se a verificação falhar.
+
+Uso:
+    python benchmarks/vad_benchmark.py reuniao.mp3 --model base --tolerance 0.85
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import whisper
+
+from src.utils.audio import decode_audio
+from src.utils.vad import build_speech_map
+
+def word_similarity(reference, candidate):
+    """Similaridade (0-1) entre dois textos, comparando palavra a palavra"""
+    ref_words = reference.lower().split()
+    cand_words = candidate.lower().split()
+    return difflib.SequenceMatcher(None, ref_words, cand_words, autojunk=False).ratio()
+
+def check_timestamps(segments, duration, slack=1.0):
+    """Verifica se os segmentos estão ordenados e dentro da duração do áudio"""
+    previous_start = -1.0
+    for segment in segments:
+        if segment["start"] < previous_start or segment["end"] < segment["start"]:
+            return False
+        if segment["end"] > duration + slack:
+            return False
+        previous_start = segment["start"]
+    return True
+
+def segments_outside(segments, spans, sample_rate):
+    """Segmentos cujo ponto médio cai fora de todos os trechos de fala"""
+    outside = []
+    for segment in segments:
+        middle = (segment["start"] + segment["end"]) / 2 * sample_rate
+        if not any(start <= middle < end for start, end in spans):
+            outside.append(segment)
+    return outside
+
+def main():
+    parser = argparse.ArgumentParser(description="Áudio inteiro vs. apenas trechos com fala")
+    parser.add_argument("file", help="Arquivo de áudio ou vídeo")
+    parser.add_argument("--model", default="base", help="Modelo Whisper")
+    parser.add_argument("--language", default=None, help="Idioma (padrão: detectado na transcrição completa)")
+    parser.add_argument("--tolerance", type=float, default=0.85, help="Similaridade mínima aceita")
+    args = parser.parse_args()
+    
+    audio = decode_audio(args.file)
+    print(f"Áudio: {audio.duration:.1f}s")
+    
+    start = time.perf_counter()
+    speech_map = build_speech_map(audio, min_skipped_fraction=0)
+    vad_time = time.perf_counter() - start
+    if speech_map is None:
+        print("Nenhum trecho de fala detectado; nada a comparar")
+        sys.exit(1)
+    print(f"Detecção de voz: {speech_map.speech_seconds:.1f}s de fala, "
+          f"{speech_map.skipped_fraction:.1%} descartado ({vad_time:.2f}s, {len(speech_map.spans)} trechos)")
+    
+    model = whisper.load_model(args.model)
+    params = {"task": "transcribe"}
+    if args.language:
+        params["language"] = args.language
+    
+    start = time.perf_counter()
+    full = model.transcribe(audio.samples, **params)
+    full_time = time.perf_counter() - start
+    params["language"] = full.get("language", args.language)
+    
+    start = time.perf_counter()
+    speech = speech_map.remap(model.transcribe(speech_map.compact(audio).samples, **params))
+    speech_time = time.perf_counter() - start + vad_time
+    
+    similarity = word_similarity(full["text"], speech["text"])
+    timestamps_ok = check_timestamps(speech["segments"], audio.duration)
+    hallucinated = segments_outside(full["segments"], speech_map.spans, audio.sample_rate)
+    
+    print(f"Áudio inteiro: {full_time:.1f}s | Só fala: {speech_time:.1f}s "
+          f"(poupado {full_time - speech_time:.1f}s, {full_time / max(speech_time, 1e-6):.2f}x)")
+    print(f"Segmentos da transcrição completa fora da fala: {len(hallucinated)}")
+    for segment in hallucinated[:10]:
+        print(f"  [{segment['start']:.1f}s - {segment['end']:.1f}s] {segment['text'].strip()}")
+    print(f"Similaridade de palavras: {similarity:.3f} (tolerância {args.tolerance})")
+    print(f"Timestamps monotônicos: {'sim' if timestamps_ok else 'não'}")
+    
+    if similarity < args.tolerance or not timestamps_ok:
+        print("FALHA: transcrição só da fala fora da tolerância")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import os
 
 from ..config.config import Config
 from ..services.transcription_service import transcription_manager
+from ..services.model_pool import model_pool
+from ..services.render_cache import render_cache
 from ..database.models import get_session, Transcription
 
 # Definir blueprint da API
@@ -15,14 +17,20 @@ def health_check():
     session = get_session()
     db_status = "connected" if session else "disconnected"
     session.close() if session else None
+    queue_status = transcription_manager.get_queue_status()
     
     return jsonify({
         "status": "online",
         "version": Config.APP_VERSION,
         "timestamp": datetime.now().isoformat(),
         "database": db_status,
-        "active_tasks": transcription_manager.get_queue_status()["active_tasks"],
-        "queue_size": transcription_manager.get_queue_status()["queue_size"],
+        "active_tasks": queue_status["active_tasks"],
+        "queue_size": queue_status["queue_size"],
+        "task_registry": transcription_manager.tasks.get_stats(),
+        "model_pool": model_pool.get_stats(),
+        "progress_writer": transcription_manager.progress_writer.get_stats(),
+        "result_cache": transcription_manager.result_cache.get_stats(),
+        "render_cache": render_cache.get_stats()
     })
 
 @api_bp.route('/models', methods=['GET'])
@@ -48,10 +56,32 @@ def get_transcription(task_id):
     
     return jsonify(task)
 
+@api_bp.route('/transcriptions/<task_id>', methods=['DELETE'])
+def cancel_transcription(task_id):
+    """Cancela uma transcrição aguardando na fila, baixando ou em execução"""
+    result = transcription_manager.cancel_task(task_id)
+    if result is None:
+        return jsonify({"error": "Transcrição não encontrada"}), 404
+    if result == "finished":
+        return jsonify({"error": "A transcrição já foi finalizada"}), 409
+    
+    # Tarefas em execução param no próximo ponto de verificação
+    return jsonify({"task_id": task_id, "status": result}), 200 if result == "cancelled" else 202
+
 @api_bp.route('/queue', methods=['GET'])
 def get_queue_status():
-    """Retorna informações sobre o status da fila de processamento"""
-    return jsonify(transcription_manager.get_queue_status())
+    """Retorna o status da fila e as tarefas aguardando, na ordem real de despacho"""
+    return jsonify(transcription_manager.get_queue_status(include_jobs=True))
+
+@api_bp.route('/queue/metrics', methods=['GET'])
+def get_queue_metrics():
+    """Retorna métricas de latência de admissão e despacho do escalonador"""
+    return jsonify(transcription_manager.scheduler.get_metrics())
+
+@api_bp.route('/eta', methods=['GET'])
+def get_eta_accuracy():
+    """Retorna as calibrações do estimador de tempo e o erro absoluto médio das estimativas"""
+    return jsonify(transcription_manager.eta_estimator.get_stats())
 
 @api_bp.route('/pdfs', methods=['GET'])
 def get_pdfs():
@@ -124,10 +154,30 @@ def api_documentation():
                 {"name": "task_id", "type": "string", "description": "ID da tarefa de transcrição"}
             ]
         },
+        {
+            "path": "/api/v1/transcriptions/<task_id>",
+            "method": "DELETE",
+            "description": "Cancela uma transcrição: remove da fila (200, status cancelled) ou interrompe a execução (202, status cancelling)",
+            "parameters": [
+                {"name": "task_id", "type": "string", "description": "ID da tarefa de transcrição"}
+            ]
+        },
         {
             "path": "/api/v1/queue",
             "method": "GET",
-            "description": "Retorna informações sobre o status da fila de processamento",
+            "description": "Retorna o status da fila e as tarefas aguardando, na ordem real de despacho (prioridade, fair share ou SJF)",
+            "parameters": []
+        },
+        {
+            "path": "/api/v1/queue/metrics",
+            "method": "GET",
+            "description": "Retorna métricas de latência de admissão e despacho do escalonador",
+            "parameters": []
+        },
+        {
+            "path": "/api/v1/eta",
+            "method": "GET",
+            "description": "Retorna as calibrações do estimador de tempo e o erro absoluto médio das estimativas",
             "parameters": []
         },
         {
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, session
+from flask import Flask, Request, Response, request, jsonify, render_template, send_file, send_from_directory, session
 import os
 import uuid
 import shutil
@@ -16,14 +16,45 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from .config.config import Config
 from .utils.logger import logger, error_logger, transcription_logger
 from .database.models import init_db, get_session, Transcription, User
+from .database.maintenance import compact_transcription_logs
+from .utils.uploads import UploadSink, save_stream
 from .services.transcription_service import transcription_manager
 from .services.youtube_service import YouTubeService
 from .api.routes import api_bp
 
+# Extensões aceitas em /transcribe
+SUPPORTED_AUDIO = ['.mp3', '.wav', '.m4a', '.ogg', '.flac']
+SUPPORTED_VIDEO = ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.ts']
+
+class StreamingUploadRequest(Request):
+    """
+    Requisição que grava o arquivo enviado a /transcribe direto em UPLOAD_DIR
+    durante o parsing do corpo, calculando o hash e identificando o formato
+    sem o arquivo temporário intermediário do Werkzeug
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        extension = os.path.splitext(filename or '')[1].lower()
+        if self.endpoint != 'transcribe' or extension not in SUPPORTED_AUDIO + SUPPORTED_VIDEO:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        
+        file_path = os.path.join(Config.get_upload_dir(), str(uuid.uuid4()) + extension)
+        sink = UploadSink(file_path, max_size=Config.MAX_UPLOAD_SIZE_MB * 1024 * 1024)
+        self.upload_sinks.append(sink)
+        return sink
+    
+    @property
+    def upload_sinks(self):
+        """Arquivos gravados em streaming nesta requisição"""
+        if not hasattr(self, '_upload_sinks'):
+            self._upload_sinks = []
+        return self._upload_sinks
+
 app = Flask(__name__)
+app.request_class = StreamingUploadRequest
 app.secret_key = Config.SECRET_KEY
 app.config['UPLOAD_FOLDER'] = Config.UPLOAD_DIR
-app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max upload
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_UPLOAD_SIZE_MB * 1024 * 1024
 
 # Registrar blueprint da API
 app.register_blueprint(api_bp)
@@ -35,6 +66,13 @@ try:
 except Exception as e:
     error_logger.error(f"Erro ao inicializar banco de dados: {str(e)}")
 
+@app.teardown_request
+def discard_unclaimed_uploads(exc=None):
+    """Remove uploads gravados em streaming que não viraram tarefa (erro de validação, conexão interrompida)"""
+    for sink in request.upload_sinks:
+        if not sink.claimed:
+            sink.discard()
+
 # Scheduler para tarefas recorrentes
 scheduler = BackgroundScheduler()
 
@@ -47,9 +85,14 @@ def cleanup_old_files():
         upload_dir = Config.UPLOAD_DIR
         count = 0
         
+        # Arquivos de tarefas ainda na fila persistente não expiram
+        queued_files = set()
+        if transcription_manager.job_queue is not None:
+            queued_files = transcription_manager.job_queue.referenced_paths()
+        
         for filename in os.listdir(upload_dir):
             file_path = os.path.join(upload_dir, filename)
-            if os.path.isfile(file_path):
+            if os.path.isfile(file_path) and file_path not in queued_files:
                 file_modified = datetime.fromtimestamp(os.path.getmtime(file_path))
                 if (now - file_modified).total_seconds() > Config.FILE_EXPIRATION_MINUTES * 60:
                     try:
@@ -65,6 +108,11 @@ def cleanup_old_files():
     except Exception as e:
         error_logger.error(f"Erro durante limpeza programada: {str(e)}")
 
+@scheduler.scheduled_job('interval', hours=6)
+def compact_logs():
+    """Resume os logs de progresso antigos de transcrições finalizadas"""
+    compact_transcription_logs()
+
 # Iniciar o scheduler
 try:
     scheduler.start()
@@ -104,6 +152,9 @@ def transcribe():
     language_mode = request.form.get('language_mode', 'auto')
     language = request.form.get('language', 'pt') if language_mode == 'specify' else None
     queue_mode = request.form.get('queue_mode', 'true') == 'true'
+    parallel_chunks = request.form.get('parallel_chunks', 'false') == 'true'
+    vad = request.form.get('vad', 'true' if Config.VAD_ENABLED else 'false') == 'true'
+    priority = request.form.get('priority', Config.DEFAULT_PRIORITY)
     
     # Obter formatos de exportação
     export_formats = request.form.get('export_formats', 'pdf')
@@ -120,38 +171,50 @@ def transcribe():
     if language_mode not in ['auto', 'specify']:
         return jsonify({"error": "Modo de idioma inválido. Escolha entre 'auto' ou 'specify'."}), 400
     
+    # Validar a classe de prioridade
+    if priority not in Config.PRIORITY_CLASSES:
+        return jsonify({"error": f"Prioridade inválida. Escolha entre: {', '.join(Config.PRIORITY_CLASSES)}"}), 400
+    
     # Obter a extensão do arquivo
     filename = file.filename
     extension = os.path.splitext(filename)[1].lower()
     
     # Verificar se a extensão é suportada
-    supported_audio = ['.mp3', '.wav', '.m4a', '.ogg', '.flac']
-    supported_video = ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.ts']
-    
-    if extension not in supported_audio + supported_video:
+    if extension not in SUPPORTED_AUDIO + SUPPORTED_VIDEO:
         return jsonify({"error": f"Formato de arquivo não suportado: {extension}. Use um dos formatos suportados."}), 400
     
-    # Verificar se é um vídeo ou áudio
-    is_video = extension in supported_video
-    
-    # Se for vídeo, verificar se o FFmpeg está instalado
-    if is_video and not shutil.which("ffmpeg"):
-        return jsonify({"error": "FFmpeg não está instalado. É necessário para processar arquivos de vídeo."}), 500
-    
-    # Salvar o arquivo com nome único
-    unique_filename = str(uuid.uuid4()) + extension
-    file_path = os.path.join(Config.UPLOAD_DIR, unique_filename)
-    file.save(file_path)
+    # O arquivo já foi gravado em UPLOAD_DIR durante o recebimento (StreamingUploadRequest)
+    sink = file.stream
+    if isinstance(sink, UploadSink):
+        sink.finish()
+        file_path, file_size, content_hash = sink.path, sink.size, sink.sha256
+        media_type = sink.media_type
+    else:
+        file_path = os.path.join(Config.get_upload_dir(), str(uuid.uuid4()) + extension)
+        file_size, content_hash = save_stream(file.stream, file_path)
+        media_type = None
     
     # Verificar tamanho do arquivo
-    file_size = os.path.getsize(file_path)
     if file_size == 0:
         os.remove(file_path)
         return jsonify({"error": "O arquivo enviado está vazio."}), 400
     
+    # Verificar se é um vídeo ou áudio: pelo contêiner identificado nos
+    # primeiros bytes ou, se não reconhecido, pela extensão
+    is_video = media_type == 'video' if media_type else extension in SUPPORTED_VIDEO
+    
+    # Se for vídeo, verificar se o FFmpeg está instalado
+    if is_video and not shutil.which("ffmpeg"):
+        os.remove(file_path)
+        return jsonify({"error": "FFmpeg não está instalado. É necessário para processar arquivos de vídeo."}), 500
+    
     # Obter ID do usuário da sessão, se existir
     user_id = session.get('user_id') if hasattr(session, 'get') else None
     
+    # A partir daqui o arquivo pertence à tarefa (removido ao fim da transcrição)
+    if isinstance(sink, UploadSink):
+        sink.claimed = True
+    
     # Adicionar tarefa ao gerenciador de transcrições
     try:
         task_id = transcription_manager.add_task(
@@ -163,7 +226,11 @@ def transcribe():
             language=language,
             user_id=user_id,
             queue_mode=queue_mode,
-            export_formats=export_formats
+            export_formats=export_formats,
+            parallel_chunks=parallel_chunks,
+            content_hash=content_hash,
+            vad=vad,
+            priority=priority
         )
         
         # Retornar o ID da tarefa para o cliente monitorar o progresso
@@ -176,51 +243,95 @@ def transcribe():
         error_logger.error(f"Erro ao adicionar tarefa: {str(e)}")
         return jsonify({"error": f"Erro ao iniciar transcrição: {str(e)}"}), 500
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    """Upload acima do limite (interrompido durante o recebimento)"""
+    return jsonify({"error": f"Arquivo muito grande. O limite é {Config.MAX_UPLOAD_SIZE_MB} MB."}), 413
+
 @app.route('/progress/<task_id>')
 def progress(task_id):
     """Rota para verificar o progresso de uma transcrição"""
-    task = transcription_manager.get_task_status(task_id)
+    response = transcription_manager.get_progress(task_id)
     
-    if not task:
+    if not response:
         return jsonify({"error": "Tarefa não encontrada"}), 404
     
-    response = {
-        "status": task.get("status", "unknown"),
-        "progress": task.get("progress", 0),
-        "step": task.get("step", ""),
-        "queue_status": task.get("queue_status", "none")
-    }
+    return jsonify(response)
+
+@app.route('/progress/<task_id>/stream')
+def progress_stream(task_id):
+    """
+    Stream SSE com o progresso de uma transcrição
+    
+    Cada atualização de update_task_progress é enviada assim que ocorre.
+    Uma conexão ociosa fica bloqueada aguardando o próximo evento e envia
+    apenas um comentário de heartbeat a cada Config.SSE_HEARTBEAT_SECONDS.
+    Ao reconectar (Last-Event-ID), o cliente recebe o estado atual completo.
+    
+    Cada stream ocupa uma thread do servidor: com Config.SSE_MAX_STREAMS
+    abertos neste processo, responde 503 e o cliente deve consultar
+    /progress/<task_id>; streams são encerrados após
+    Config.SSE_MAX_STREAM_SECONDS (o EventSource reconecta sozinho).
+    """
+    broker = transcription_manager.progress_broker
+    
+    # Inscrever antes do retrato inicial para não perder eventos entre os dois
+    subscription = broker.subscribe(task_id, max_subscribers=Config.SSE_MAX_STREAMS)
+    if subscription is None:
+        response = jsonify({
+            "error": "Muitos streams de progresso abertos; consulte o progresso periodicamente",
+            "progress_url": f"/progress/{task_id}"
+        })
+        response.headers["Retry-After"] = str(max(1, Config.SSE_RETRY_MS // 1000))
+        return response, 503
     
-    # Adicionar informação de posição na fila, se disponível
-    if "queue_position" in task:
-        response["queue_position"] = task["queue_position"]
+    snapshot = transcription_manager.get_progress(task_id)
     
-    # Adicionar estimativa de tempo, se disponível
-    if "time_estimate" in task:
-        response["time_estimate"] = task["time_estimate"]
-        
-        # Formatar o tempo restante
-        seconds = task["time_estimate"]
-        hours, remainder = divmod(seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        if hours > 0:
-            formatted_time = f"{hours}h {minutes}m {seconds}s"
-        elif minutes > 0:
-            formatted_time = f"{minutes}m {seconds}s"
-        else:
-            formatted_time = f"{seconds}s"
-            
-        response["formatted_time"] = formatted_time
+    if not snapshot:
+        broker.unsubscribe(task_id, subscription)
+        return jsonify({"error": "Tarefa não encontrada"}), 404
     
-    if task.get("status") == "completed":
-        response["text"] = task.get("text", "")
-        if "detected_language" in task:
-            response["detected_language"] = task["detected_language"]
-    elif task.get("status") == "error":
-        response["error"] = task.get("error", "Erro desconhecido")
+    def format_event(event_id, data):
+        return f"id: {event_id}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
     
-    return jsonify(response)
+    def generate():
+        try:
+            yield f"retry: {Config.SSE_RETRY_MS}\n"
+            yield format_event(broker.next_id(task_id), snapshot)
+            if transcription_manager.is_progress_final(snapshot):
+                return
+            
+            last_data = snapshot
+            deadline = time.monotonic() + Config.SSE_MAX_STREAM_SECONDS
+            while True:
+                # Libera a thread periodicamente; o cliente reconecta com o estado atual
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                
+                event = subscription.get(timeout=min(Config.SSE_HEARTBEAT_SECONDS, remaining))
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                
+                # Eventos sem mudança (ex.: o retrato inicial publicado de novo) não são reenviados
+                if event["data"] == last_data:
+                    continue
+                last_data = event["data"]
+                
+                yield format_event(event["id"], event["data"])
+                if transcription_manager.is_progress_final(event["data"]):
+                    return
+        finally:
+            broker.unsubscribe(task_id, subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    # Libera a vaga no limite de streams mesmo se o cliente sair antes do primeiro evento
+    response.call_on_close(lambda: broker.unsubscribe(task_id, subscription))
+    return response
 
 @app.route('/pdfs')
 def list_pdfs():
@@ -239,6 +350,17 @@ def list_pdfs():
                         "size": file_stats.st_size,
                         "created_at": datetime.fromtimestamp(file_stats.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
                     })
+        
+        # PDFs renderizados sob demanda (ainda sem arquivo em PDF_DIR)
+        for transcription in transcription_manager.list_completed_transcriptions(limit=100):
+            if transcription["pdf"] and transcription["completed_at"]:
+                base_filename = os.path.splitext(transcription["filename"])[0]
+                pdfs.append({
+                    "filename": transcription["pdf"],
+                    "title": f"transcricao_{base_filename}.pdf",
+                    "size": None,
+                    "created_at": transcription["completed_at"].replace('T', ' ')[:19]
+                })
     except Exception as e:
         error_logger.error(f"Erro ao listar PDFs: {str(e)}")
     
@@ -247,7 +369,7 @@ def list_pdfs():
 @app.route('/pdfs/<filename>')
 def download_pdf(filename):
     """Permite o download de um PDF específico"""
-    return send_from_directory(Config.PDF_DIR, filename, as_attachment=True)
+    return send_export("pdf", filename)
 
 @app.route('/exports/<format>/<filename>')
 def download_export(format, filename):
@@ -259,7 +381,34 @@ def download_export(format, filename):
     if '..' in filename or '/' in filename:
         return jsonify({"error": "Nome de arquivo inválido"}), 400
     
-    return send_from_directory(Config.PDF_DIR, filename, as_attachment=True)
+    return send_export(format, filename)
+
+def send_export(format, filename):
+    """
+    Envia um arquivo exportado
+    
+    Arquivos gerados antes da renderização sob demanda continuam em PDF_DIR;
+    os demais se chamam <task_id>.<formato> e são renderizados no primeiro
+    download e servidos do cache de exportações nos seguintes.
+    """
+    if os.path.isfile(os.path.join(Config.PDF_DIR, filename)):
+        return send_from_directory(Config.PDF_DIR, filename, as_attachment=True)
+    
+    task_id, extension = os.path.splitext(filename)
+    if extension != f".{format}":
+        return jsonify({"error": "Arquivo não encontrado"}), 404
+    
+    try:
+        export = transcription_manager.get_export(task_id, format)
+    except Exception as e:
+        error_logger.error(f"Erro ao gerar exportação {filename}: {str(e)}")
+        return jsonify({"error": f"Erro ao gerar arquivo: {str(e)}"}), 500
+    
+    if not export:
+        return jsonify({"error": "Arquivo não encontrado"}), 404
+    
+    path, download_name = export
+    return send_file(path, as_attachment=True, download_name=download_name)
 
 @app.route('/queue_status')
 def queue_status():
@@ -297,12 +446,13 @@ def get_settings():
 @app.route('/health')
 def health_check():
     """Endpoint para verificação de saúde da aplicação"""
+    queue_status = transcription_manager.get_queue_status()
     return jsonify({
         "status": "online",
         "version": Config.APP_VERSION,
         "database": "connected" if get_session() is not None else "disconnected",
-        "queue_size": transcription_manager.get_queue_status()["queue_size"],
-        "active_tasks": transcription_manager.get_queue_status()["active_tasks"]
+        "queue_size": queue_status["queue_size"],
+        "active_tasks": queue_status["active_tasks"]
     })
 
 @app.route('/transcribe_youtube', methods=['POST'])
@@ -324,6 +474,7 @@ def transcribe_youtube():
     language_mode = data.get('language_mode', 'auto')
     language = data.get('language', 'pt') if language_mode == 'specify' else None
     queue_mode = data.get('queue_mode', True)
+    priority = data.get('priority', Config.DEFAULT_PRIORITY)
     
     # Obter formatos de exportação
     export_formats = data.get('export_formats', 'pdf')
@@ -340,48 +491,35 @@ def transcribe_youtube():
     if language_mode not in ['auto', 'specify']:
         return jsonify({"error": "Modo de idioma inválido. Escolha entre 'auto' ou 'specify'."}), 400
     
-    # Baixar áudio do vídeo do YouTube
-    logger.info(f"Iniciando download de áudio do YouTube: {youtube_url}")
-    file_path, original_filename = YouTubeService.download_audio(youtube_url)
-    
-    if not file_path or not os.path.exists(file_path):
-        return jsonify({"error": "Falha ao baixar o áudio do vídeo do YouTube."}), 500
-    
-    # Verificar tamanho do arquivo
-    file_size = os.path.getsize(file_path)
-    if file_size == 0:
-        os.remove(file_path)
-        return jsonify({"error": "O arquivo de áudio baixado está vazio."}), 400
+    # Validar a classe de prioridade
+    if priority not in Config.PRIORITY_CLASSES:
+        return jsonify({"error": f"Prioridade inválida. Escolha entre: {', '.join(Config.PRIORITY_CLASSES)}"}), 400
     
     # Obter ID do usuário da sessão, se existir
     user_id = session.get('user_id') if hasattr(session, 'get') else None
     
-    # Adicionar tarefa ao gerenciador de transcrições
+    # O download é feito em segundo plano pelo gerenciador; o progresso
+    # (incluindo o percentual baixado) é acompanhado por /progress/<task_id>
     try:
-        task_id = transcription_manager.add_task(
-            file_path=file_path,
-            original_filename=original_filename,
+        task_id = transcription_manager.add_url_task(
+            youtube_url,
             model_name=model_name,
-            is_video=False,  # Já foi convertido para áudio MP3
             language_mode=language_mode,
             language=language,
             user_id=user_id,
             queue_mode=queue_mode,
             export_formats=export_formats,
-            source_type="youtube"
+            priority=priority
         )
         
         # Retornar o ID da tarefa para o cliente monitorar o progresso
         return jsonify({
             "task_id": task_id, 
             "queue_mode": queue_mode,
-            "message": "Transcrição do vídeo do YouTube em fila" if queue_mode else "Transcrição do vídeo do YouTube iniciada"
+            "message": "Download do vídeo do YouTube iniciado"
         })
     except Exception as e:
         error_logger.error(f"Erro ao adicionar tarefa para YouTube: {str(e)}")
-        # Limpar arquivo se ocorrer erro
-        if os.path.exists(file_path):
-            os.remove(file_path)
         return jsonify({"error": f"Erro ao iniciar transcrição: {str(e)}"}), 500
 
 @app.errorhandler(404)
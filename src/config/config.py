@@ -19,23 +19,89 @@ class Config:
     
     # Configurações da transcrição
     FILE_EXPIRATION_MINUTES = 30
+    MAX_UPLOAD_SIZE_MB = 500
     MAX_CONCURRENT_TRANSCRIPTIONS = 2
-    TASK_TIMEOUT_SECONDS = 3600  # 1 hora
+    TASK_TIMEOUT_SECONDS = 3600  # 1 hora; transcrições mais longas são interrompidas
+    TASK_REGISTRY_MAX_TASKS = 10000  # Tarefas em memória; acima disso, as concluídas mais antigas saem
+    TASK_REGISTRY_TTL_SECONDS = 6 * 3600  # Tarefas concluídas saem da memória após esse tempo (ficam no banco)
+    CANCEL_POLL_SECONDS = 1.0  # Verificação de cancelamentos entre trechos paralelos e vindos de outros processos
+    MAX_CONCURRENT_EXPORTS = 4  # Formatos renderizados em paralelo, fora dos slots de transcrição
+    MAX_CONCURRENT_DOWNLOADS = 4  # Downloads do YouTube em paralelo (I/O), fora dos slots de transcrição
+    YOUTUBE_AUDIO_CODEC = "wav"  # Áudio baixado em 16 kHz mono: "wav" (PCM, leitura direta) ou "flac" (menor)
+    YOUTUBE_MIN_AUDIO_BITRATE = 48  # kbps; o menor formato só de áudio acima disso é o escolhido
+    EAGER_EXPORTS = False  # False: exportações renderizadas apenas no primeiro download
+    SSE_HEARTBEAT_SECONDS = 15  # Comentário enviado em streams SSE ociosos (mantém proxies abertos)
+    SSE_RETRY_MS = 3000  # Intervalo de reconexão sugerido ao EventSource
+    SSE_MAX_STREAMS = 24  # Streams SSE abertos por processo; acima disso, 503 e o cliente consulta /progress
+    SSE_MAX_STREAM_SECONDS = 300  # Stream encerrado após esse tempo; o EventSource reconecta com o estado atual
+    
+    # Transcrição paralela de áudios longos (parallel_chunks)
+    PARALLEL_CHUNK_WORKERS = 2  # Processos por pool (cada um com seu modelo)
+    PARALLEL_CHUNK_MAX_POOLS = 1  # Pools (modelos) mantidos ao mesmo tempo
+    PARALLEL_CHUNKS_MIN_DURATION = 240  # Abaixo disso, transcreve sequencialmente
+    CHUNK_MIN_SECONDS = 30
+    CHUNK_MAX_SECONDS = 120
+    
+    # Detecção de voz antes da transcrição (vad): silêncios longos não passam pelo Whisper
+    VAD_ENABLED = False  # Padrão quando a requisição não informa "vad"
+    VAD_THRESHOLD_DB = 12  # Margem de energia sobre o ruído de fundo para um quadro contar como fala
+    VAD_MIN_SILENCE_SECONDS = 1.0  # Pausas menores ficam no áudio transcrito
+    VAD_MIN_SPEECH_SECONDS = 0.25  # Ruídos mais curtos que isso são descartados
+    VAD_PADDING_SECONDS = 0.3  # Margem mantida antes e depois de cada trecho de fala
+    VAD_MIN_SKIPPED_FRACTION = 0.05  # Abaixo disso, o áudio é transcrito inteiro
     
     # Configurações de whisper
     DEFAULT_MODEL = "base"
     AVAILABLE_MODELS = ["base", "small", "medium", "large"]
+    WHISPER_DEVICE = os.environ.get('WHISPER_DEVICE')  # None = detectar automaticamente
+    MODEL_POOL_MAX_MEMORY_MB = 8192  # Orçamento de memória para modelos em cache
+    # Ex.: "base": no modo auto, o idioma é detectado pelo menor modelo já carregado
+    # (ou por este) antes de transcrever com um modelo maior; None usa o próprio modelo
+    LANGUAGE_DETECTION_MODEL = None
     
     # Configurações de exportação
-    EXPORT_FORMATS = ["pdf", "txt", "srt", "docx"]
+    EXPORT_FORMATS = ["pdf", "txt", "srt", "vtt", "docx"]
     
     # Configurações do banco de dados
     DB_TYPE = "sqlite"
     DB_NAME = os.path.join(BASE_DIR, 'database', 'transcrever.db')
+    DB_BUSY_TIMEOUT_MS = 5000  # Espera por locks antes de "database is locked"
+    DB_CACHE_SIZE_KB = 20000  # Cache de páginas do SQLite por conexão
+    PROGRESS_FLUSH_INTERVAL_MS = 500  # Intervalo de gravação em lote do progresso
+    PERSISTENT_QUEUE = True  # Fila de transcrições no SQLite (sobrevive a reinícios)
+    JOB_LEASE_SECONDS = 60  # Validade da reserva de uma tarefa; renovada enquanto o worker vive
+    JOB_POLL_INTERVAL_SECONDS = 2  # Intervalo de consulta por tarefas enfileiradas por outros processos
+    JOB_MAX_ATTEMPTS = 3  # Tentativas antes de marcar como erro uma tarefa cujo worker morreu
+    # False: o processo web só enfileira; as transcrições rodam em "python -m src.worker"
+    RUN_EMBEDDED_WORKER = os.environ.get('TRANSCREVER_EMBEDDED_WORKER', '1') != '0'
+    REMOTE_PROGRESS_POLL_SECONDS = 1.0  # Leitura do progresso gravado pelos workers (streams SSE)
+    QUEUE_STATUS_REFRESH_SECONDS = 5.0  # Recálculo das posições quando a fila persistente anda em outros processos
+    # Ordem de despacho: "fifo", "fair" (fair share por usuário) ou "sjf" (menor tarefa primeiro)
+    QUEUE_POLICY = "fair"
+    PRIORITY_CLASSES = {"high": 0, "normal": 1, "low": 2}  # Menor valor é despachado primeiro
+    DEFAULT_PRIORITY = "normal"
+    USER_WEIGHTS = {}  # user_id -> peso no fair share (padrão 1.0)
+    # Segundos de processamento por segundo de áudio e carregamento do modelo: valores
+    # iniciais, substituídos pelos medidos (EtaEstimator) após as primeiras transcrições
+    MODEL_COST_FACTORS = {"base": 0.1, "small": 0.3, "medium": 0.8, "large": 1.6}
+    MODEL_LOAD_SECONDS = {"base": 10, "small": 20, "medium": 40, "large": 60}
+    ETA_DECODE_FACTOR = 0.005  # Decodificação (ffmpeg) por segundo de áudio, até haver medições
+    ETA_LEARNING_RATE = 0.2  # Peso de cada nova medição na média móvel do estimador
+    ETA_REFRESH_SECONDS = 30  # Releitura das calibrações gravadas por outros processos
+    QUEUE_DEFAULT_AUDIO_SECONDS = 600  # Duração assumida quando não é possível medir o áudio
+    SJF_AGING_FACTOR = 0.1  # No SJF, segundos de custo descontados por segundo de espera
+    LOG_RETENTION_DAYS = 7  # Logs de progresso mais antigos são resumidos em uma linha
     
     # Configurações de cache
     CACHE_DIR = os.path.join(BASE_DIR, 'cache')
     CACHE_MAX_SIZE_MB = 1000  # 1GB
+    EXPORT_CACHE_MAX_SIZE_MB = 500  # Exportações renderizadas sob demanda
+    CACHE_REFRESH_SECONDS = 60  # Releitura dos índices em disco, compartilhados com outros processos (src.worker)
+    
+    # Fontes TrueType (.ttf) embutidas nos PDFs quando o texto tem caracteres fora do
+    # cp1252 (cirílico, grego, CJK...); sem elas, esses caracteres saem como "?"
+    PDF_UNICODE_FONT = os.environ.get('PDF_UNICODE_FONT', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+    PDF_UNICODE_FONT_BOLD = os.environ.get('PDF_UNICODE_FONT_BOLD', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf')
     
     # Opções da interface
     DEFAULT_THEME = "light"  # light ou dark
@@ -2,4 +2,7 @@
 Módulo de banco de dados para o aplicativo Transcrever
 """
 
-from .models import Base, get_engine, get_session, init_db, User, Transcription, TranscriptionLog, Setting 
\ No newline at end of file
+from .models import Base, get_engine, get_session, dispose_engine, init_db, User, Transcription, TranscriptionLog, TranscriptionJob, EtaCalibration, Setting
+from .progress_writer import ProgressWriter
+from .job_queue import JobQueue
+from .maintenance import compact_transcription_logs
\ No newline at end of file
@@ -0,0 +1,475 @@
+import json
+import time
+import datetime
+
+from sqlalchemy import func
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+from .models import get_session, Transcription, TranscriptionJob
+
+class JobQueue:
+    """
+    Fila de transcrições persistida no SQLite.
+    
+    Cada tarefa enfileirada vira uma linha em transcription_jobs. Um worker
+    reserva a próxima tarefa com um UPDATE condicional (status='queued'),
+    que o SQLite serializa, então vários processos podem consumir a mesma
+    fila sem reservar a mesma tarefa. A reserva é uma concessão (lease) com
+    validade de Config.JOB_LEASE_SECONDS, renovada enquanto o worker está
+    vivo; se o processo morrer, a concessão expira e recover_expired devolve
+    a tarefa à fila.
+    
+    A próxima tarefa é escolhida pela política de despacho (QueuePolicy,
+    injetada pelo TranscriptionManager) a partir das tarefas aguardando e das
+    em execução em todos os workers; sem política, a mais antiga.
+    """
+    
+    # Tentativas de reserva quando outro worker leva a mesma tarefa
+    CLAIM_RETRIES = 5
+    
+    def __init__(self, lease_seconds=None, max_attempts=None, policy=None):
+        """
+        Args:
+            lease_seconds: Validade da concessão de uma tarefa reservada
+            max_attempts: Reservas permitidas antes de desistir da tarefa
+            policy: Política de despacho (QueuePolicy); None para ordem de chegada
+        """
+        self.lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        self.policy = policy
+    
+    def _lease_expiration(self):
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=self.lease_seconds)
+    
+    def enqueue(self, task_id, payload, user_id=None, priority=None, expected_seconds=None):
+        """
+        Grava uma tarefa na fila
+        
+        Args:
+            task_id: ID da tarefa
+            payload: Argumentos da transcrição (serializáveis em JSON)
+            user_id: Usuário dono da tarefa (fair share)
+            priority: Valor da classe de prioridade
+            expected_seconds: Tempo de processamento estimado
+        """
+        db_session = get_session()
+        try:
+            db_session.add(TranscriptionJob(
+                task_id=task_id,
+                status='queued',
+                payload=json.dumps(payload, ensure_ascii=False),
+                user_id=user_id,
+                priority=priority,
+                expected_seconds=expected_seconds
+            ))
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            raise
+        finally:
+            db_session.close()
+    
+    @staticmethod
+    def _entry(row):
+        """Converte uma linha da fila no formato usado pela QueuePolicy"""
+        return {
+            "task_id": row.task_id,
+            "user_id": row.user_id,
+            "priority": row.priority,
+            "expected_seconds": row.expected_seconds,
+            # created_at é gravado em UTC sem fuso
+            "enqueued_at": row.created_at.replace(tzinfo=datetime.timezone.utc).timestamp() if row.created_at else None,
+            "seq": row.id
+        }
+    
+    def _ordered(self, db_session):
+        """Tarefas aguardando, na ordem de despacho da política"""
+        rows = db_session.query(
+            TranscriptionJob.id, TranscriptionJob.task_id, TranscriptionJob.status,
+            TranscriptionJob.user_id, TranscriptionJob.priority,
+            TranscriptionJob.expected_seconds, TranscriptionJob.created_at
+        ).filter(TranscriptionJob.status.in_(['queued', 'claimed'])).all()
+        
+        queued = [self._entry(row) for row in rows if row.status == 'queued']
+        if self.policy is None:
+            return sorted(queued, key=lambda job: job["seq"])
+        
+        running = [self._entry(row) for row in rows if row.status == 'claimed']
+        return self.policy.order(queued, running, now=time.time())
+    
+    def queued_order(self):
+        """
+        Tarefas aguardando na ordem em que serão reservadas
+        
+        Returns:
+            list: dicts com task_id, user_id, priority, expected_seconds, enqueued_at e seq
+        """
+        db_session = get_session()
+        try:
+            return self._ordered(db_session)
+        except Exception as e:
+            error_logger.error(f"Erro ao consultar a ordem da fila persistente: {str(e)}")
+            return []
+        finally:
+            db_session.close()
+    
+    def claim(self, worker_id):
+        """
+        Reserva a próxima tarefa da fila (segundo a política) para um worker
+        
+        Returns:
+            dict: task_id, payload e attempts da tarefa reservada, ou None se a fila estiver vazia
+        """
+        db_session = get_session()
+        try:
+            for _ in range(self.CLAIM_RETRIES):
+                ordered = self._ordered(db_session)
+                if not ordered:
+                    return None
+                
+                job = db_session.query(
+                    TranscriptionJob.id, TranscriptionJob.task_id,
+                    TranscriptionJob.payload, TranscriptionJob.attempts
+                ).filter(TranscriptionJob.id == ordered[0]["seq"]).first()
+                
+                if job is None:
+                    continue
+                
+                # Só um worker consegue trocar o status de 'queued' para 'claimed'
+                updated = db_session.query(TranscriptionJob).filter(
+                    TranscriptionJob.id == job.id,
+                    TranscriptionJob.status == 'queued'
+                ).update({
+                    TranscriptionJob.status: 'claimed',
+                    TranscriptionJob.claimed_by: worker_id,
+                    TranscriptionJob.lease_expires_at: self._lease_expiration(),
+                    TranscriptionJob.attempts: TranscriptionJob.attempts + 1
+                }, synchronize_session=False)
+                db_session.commit()
+                
+                if updated:
+                    return {
+                        "task_id": job.task_id,
+                        "payload": json.loads(job.payload),
+                        "attempts": (job.attempts or 0) + 1
+                    }
+            return None
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao reservar tarefa da fila persistente: {str(e)}")
+            return None
+        finally:
+            db_session.close()
+    
+    def renew(self, worker_id, task_ids):
+        """Renova as concessões das tarefas em execução neste worker"""
+        if not task_ids:
+            return 0
+        
+        db_session = get_session()
+        try:
+            renewed = db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.task_id.in_(list(task_ids)),
+                TranscriptionJob.claimed_by == worker_id,
+                TranscriptionJob.status == 'claimed'
+            ).update({
+                TranscriptionJob.lease_expires_at: self._lease_expiration()
+            }, synchronize_session=False)
+            db_session.commit()
+            return renewed
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao renovar concessões da fila persistente: {str(e)}")
+            return 0
+        finally:
+            db_session.close()
+    
+    def ack(self, task_id, worker_id):
+        """Remove da fila uma tarefa finalizada (o resultado fica em transcriptions)"""
+        db_session = get_session()
+        try:
+            db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.task_id == task_id,
+                TranscriptionJob.claimed_by == worker_id
+            ).delete(synchronize_session=False)
+            db_session.commit()
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao remover tarefa {task_id} da fila persistente: {str(e)}")
+        finally:
+            db_session.close()
+    
+    def remove_queued(self, task_id):
+        """
+        Remove da fila uma tarefa que ainda não foi reservada (cancelamento)
+        
+        Returns:
+            dict: Payload da tarefa removida, ou None se ela não estava aguardando
+        """
+        db_session = get_session()
+        try:
+            job = db_session.query(TranscriptionJob.payload).filter(
+                TranscriptionJob.task_id == task_id,
+                TranscriptionJob.status == 'queued'
+            ).first()
+            if job is None:
+                return None
+            
+            # Um worker pode ter reservado a tarefa desde a leitura
+            removed = db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.task_id == task_id,
+                TranscriptionJob.status == 'queued'
+            ).delete(synchronize_session=False)
+            db_session.commit()
+            return json.loads(job.payload) if removed else None
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao remover tarefa {task_id} da fila persistente: {str(e)}")
+            return None
+        finally:
+            db_session.close()
+    
+    def update_expected_seconds(self, task_id, expected_seconds):
+        """
+        Atualiza o tempo estimado de uma tarefa ainda aguardando na fila
+        
+        Returns:
+            bool: Se a tarefa estava aguardando
+        """
+        db_session = get_session()
+        try:
+            updated = db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.task_id == task_id,
+                TranscriptionJob.status == 'queued'
+            ).update({TranscriptionJob.expected_seconds: expected_seconds}, synchronize_session=False)
+            db_session.commit()
+            return bool(updated)
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao atualizar estimativa da tarefa {task_id} na fila persistente: {str(e)}")
+            return False
+        finally:
+            db_session.close()
+    
+    def request_cancel(self, task_id):
+        """
+        Pede ao worker que reservou a tarefa que a interrompa
+        
+        Returns:
+            bool: True se a tarefa está reservada por algum worker
+        """
+        db_session = get_session()
+        try:
+            updated = db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.task_id == task_id,
+                TranscriptionJob.status == 'claimed'
+            ).update({TranscriptionJob.cancel_requested: True}, synchronize_session=False)
+            db_session.commit()
+            return bool(updated)
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao pedir cancelamento da tarefa {task_id}: {str(e)}")
+            return False
+        finally:
+            db_session.close()
+    
+    def cancel_requests(self, worker_id):
+        """IDs das tarefas reservadas pelo worker com cancelamento pedido"""
+        db_session = get_session()
+        try:
+            return [task_id for (task_id,) in db_session.query(TranscriptionJob.task_id).filter(
+                TranscriptionJob.claimed_by == worker_id,
+                TranscriptionJob.status == 'claimed',
+                TranscriptionJob.cancel_requested.is_(True)
+            ).all()]
+        except Exception as e:
+            error_logger.error(f"Erro ao consultar cancelamentos da fila persistente: {str(e)}")
+            return []
+        finally:
+            db_session.close()
+    
+    def release(self, worker_id):
+        """Devolve à fila as tarefas reservadas por um worker que está encerrando"""
+        db_session = get_session()
+        try:
+            released = db_session.query(TranscriptionJob).filter(
+                TranscriptionJob.claimed_by == worker_id,
+                TranscriptionJob.status == 'claimed'
+            ).update({
+                TranscriptionJob.status: 'queued',
+                TranscriptionJob.claimed_by: None,
+                TranscriptionJob.lease_expires_at: None,
+                # Encerramento ordenado não conta como tentativa
+                TranscriptionJob.attempts: TranscriptionJob.attempts - 1
+            }, synchronize_session=False)
+            db_session.commit()
+            return released
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao devolver tarefas à fila persistente: {str(e)}")
+            return 0
+        finally:
+            db_session.close()
+    
+    def recover_expired(self):
+        """
+        Devolve à fila as tarefas cuja concessão expirou (worker morto)
+        
+        Tarefas que já usaram Config.JOB_MAX_ATTEMPTS reservas são removidas
+        da fila e marcadas como erro, para que um arquivo que derruba o
+        worker não seja reprocessado indefinidamente. Tarefas com
+        cancelamento pedido são removidas e marcadas como canceladas.
+        
+        Returns:
+            tuple: (IDs devolvidos à fila, IDs marcados como erro)
+        """
+        now = datetime.datetime.utcnow()
+        expired_filter = (
+            TranscriptionJob.status == 'claimed',
+            TranscriptionJob.lease_expires_at < now
+        )
+        
+        db_session = get_session()
+        try:
+            expired = db_session.query(
+                TranscriptionJob.task_id, TranscriptionJob.attempts, TranscriptionJob.cancel_requested
+            ).filter(*expired_filter).all()
+            if not expired:
+                return [], []
+            
+            cancelled = [task_id for task_id, _, cancel in expired if cancel]
+            expired = [(task_id, attempts) for task_id, attempts, cancel in expired if not cancel]
+            failed = [task_id for task_id, attempts in expired if (attempts or 0) >= self.max_attempts]
+            requeued = [task_id for task_id, attempts in expired if (attempts or 0) < self.max_attempts]
+            
+            if cancelled:
+                db_session.query(TranscriptionJob).filter(
+                    *expired_filter, TranscriptionJob.task_id.in_(cancelled)
+                ).delete(synchronize_session=False)
+                db_session.query(Transcription).filter(
+                    Transcription.task_id.in_(cancelled)
+                ).update({
+                    Transcription.status: 'cancelled',
+                    Transcription.error_message: "Transcrição cancelada",
+                    Transcription.completed_at: now
+                }, synchronize_session=False)
+            
+            if requeued:
+                db_session.query(TranscriptionJob).filter(
+                    *expired_filter, TranscriptionJob.task_id.in_(requeued)
+                ).update({
+                    TranscriptionJob.status: 'queued',
+                    TranscriptionJob.claimed_by: None,
+                    TranscriptionJob.lease_expires_at: None
+                }, synchronize_session=False)
+                db_session.query(Transcription).filter(
+                    Transcription.task_id.in_(requeued)
+                ).update({Transcription.status: 'pending'}, synchronize_session=False)
+            
+            if failed:
+                db_session.query(TranscriptionJob).filter(
+                    *expired_filter, TranscriptionJob.task_id.in_(failed)
+                ).delete(synchronize_session=False)
+                db_session.query(Transcription).filter(
+                    Transcription.task_id.in_(failed)
+                ).update({
+                    Transcription.status: 'error',
+                    Transcription.error_message: f"O processamento foi interrompido {self.max_attempts} vezes",
+                    Transcription.completed_at: now
+                }, synchronize_session=False)
+            
+            db_session.commit()
+            logger.info(
+                f"Fila persistente: {len(requeued)} tarefa(s) devolvida(s) à fila, "
+                f"{len(failed)} marcada(s) como erro e {len(cancelled)} cancelada(s) após concessão expirada"
+            )
+            return requeued, failed
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao recuperar tarefas com concessão expirada: {str(e)}")
+            return [], []
+        finally:
+            db_session.close()
+    
+    def fail_orphaned(self, older_than_seconds=None):
+        """
+        Marca como erro transcrições presas em andamento sem linha na fila
+        
+        São tarefas processadas fora da fila (ou anteriores a ela) cujo
+        processo morreu; só são consideradas após Config.TASK_TIMEOUT_SECONDS
+        sem atualização, para não atingir tarefas ativas em outro processo.
+        
+        Returns:
+            int: Número de transcrições marcadas como erro
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=older_than_seconds or Config.TASK_TIMEOUT_SECONDS
+        )
+        
+        db_session = get_session()
+        try:
+            queued = db_session.query(TranscriptionJob.task_id)
+            orphaned = db_session.query(Transcription).filter(
+                Transcription.status.in_(['pending', 'processing', 'downloading']),
+                Transcription.updated_at < cutoff,
+                ~Transcription.task_id.in_(queued)
+            ).update({
+                Transcription.status: 'error',
+                Transcription.error_message: "Processamento interrompido (reinício do servidor)",
+                Transcription.completed_at: datetime.datetime.utcnow()
+            }, synchronize_session=False)
+            db_session.commit()
+            
+            if orphaned:
+                logger.info(f"Fila persistente: {orphaned} transcrição(ões) órfã(s) marcada(s) como erro")
+            return orphaned
+        except Exception as e:
+            db_session.rollback()
+            error_logger.error(f"Erro ao marcar transcrições órfãs: {str(e)}")
+            return 0
+        finally:
+            db_session.close()
+    
+    def referenced_paths(self):
+        """Arquivos de entrada das tarefas na fila (não devem ser removidos pela limpeza)"""
+        db_session = get_session()
+        try:
+            paths = set()
+            for (payload,) in db_session.query(TranscriptionJob.payload).all():
+                file_path = json.loads(payload).get("file_path")
+                if file_path:
+                    paths.add(file_path)
+            return paths
+        finally:
+            db_session.close()
+    
+    def count(self, status='queued'):
+        """Número de tarefas com o status informado"""
+        db_session = get_session()
+        try:
+            return db_session.query(func.count(TranscriptionJob.id)).filter(
+                TranscriptionJob.status == status
+            ).scalar()
+        finally:
+            db_session.close()
+    
+    def get_stats(self):
+        """Retorna o número de tarefas por status e a concessão mais próxima de expirar"""
+        db_session = get_session()
+        try:
+            counts = dict(db_session.query(
+                TranscriptionJob.status, func.count(TranscriptionJob.id)
+            ).group_by(TranscriptionJob.status).all())
+            next_expiration = db_session.query(func.min(TranscriptionJob.lease_expires_at)).filter(
+                TranscriptionJob.status == 'claimed'
+            ).scalar()
+            return {
+                "queued": counts.get('queued', 0),
+                "claimed": counts.get('claimed', 0),
+                "next_lease_expiration": next_expiration.isoformat() if next_expiration else None,
+                "lease_seconds": self.lease_seconds,
+                "max_attempts": self.max_attempts
+            }
+        finally:
+            db_session.close()
@@ -0,0 +1,86 @@
+import datetime
+
+from sqlalchemy import func
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+from .models import get_session, Transcription, TranscriptionLog
+
+def compact_transcription_logs(retention_days=None, batch_size=500):
+    """
+    Compacta os logs de progresso de transcrições finalizadas
+    
+    Para cada transcrição concluída (ou com erro) cujo último log é mais
+    antigo que retention_days, os registros de log são substituídos por uma
+    única linha de resumo.
+    
+    Args:
+        retention_days: Idade mínima (dias) dos logs a compactar
+        batch_size: Número de transcrições compactadas por transação
+    
+    Returns:
+        int: Número de linhas de log removidas
+    """
+    if retention_days is None:
+        retention_days = Config.LOG_RETENTION_DAYS
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    
+    removed = 0
+    db_session = None
+    try:
+        db_session = get_session()
+        
+        # Transcrições finalizadas com mais de um log, todos anteriores ao corte
+        groups = db_session.query(
+            TranscriptionLog.transcription_id,
+            Transcription.status,
+            func.count(TranscriptionLog.id),
+            func.min(TranscriptionLog.timestamp),
+            func.max(TranscriptionLog.timestamp),
+            func.max(TranscriptionLog.progress)
+        ).join(
+            Transcription, Transcription.id == TranscriptionLog.transcription_id
+        ).filter(
+            Transcription.status.in_(["completed", "error", "cancelled"])
+        ).group_by(
+            TranscriptionLog.transcription_id, Transcription.status
+        ).having(
+            func.count(TranscriptionLog.id) > 1
+        ).having(
+            func.max(TranscriptionLog.timestamp) < cutoff
+        ).all()
+        
+        for i in range(0, len(groups), batch_size):
+            batch = groups[i:i + batch_size]
+            ids = [group[0] for group in batch]
+            
+            removed += db_session.query(TranscriptionLog).filter(
+                TranscriptionLog.transcription_id.in_(ids)
+            ).delete(synchronize_session=False)
+            
+            for transcription_id, status, count, first, last, progress in batch:
+                db_session.add(TranscriptionLog(
+                    transcription_id=transcription_id,
+                    timestamp=last,
+                    status=status,
+                    progress=progress,
+                    step="Resumo",
+                    message=(f"Resumo de {count} registros de log "
+                             f"({first:%d/%m/%Y %H:%M:%S} - {last:%d/%m/%Y %H:%M:%S})")
+                ))
+                removed -= 1
+            
+            db_session.commit()
+        
+        if groups:
+            logger.info(f"Compactação: logs de {len(groups)} transcrição(ões) resumidos, "
+                        f"{removed} linha(s) removida(s)")
+    except Exception as e:
+        if db_session:
+            db_session.rollback()
+        error_logger.error(f"Erro ao compactar logs de transcrição: {str(e)}")
+    finally:
+        if db_session:
+            db_session.close()
+    
+    return removed
@@ -1,33 +1,98 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, scoped_session
 import datetime
 import os
+import threading
 from ..config.config import Config
 
 Base = declarative_base()
 
+# Engine e fábrica de sessões criadas uma única vez por processo
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configura cada nova conexão SQLite para escrita concorrente"""
+    cursor = dbapi_connection.cursor()
+    # WAL permite que leitores (API) e um escritor (workers) trabalhem ao mesmo tempo
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(Config.DB_BUSY_TIMEOUT_MS)}")
+    # Valor negativo = tamanho do cache em KiB
+    cursor.execute(f"PRAGMA cache_size=-{int(Config.DB_CACHE_SIZE_KB)}")
+    cursor.close()
+
 def get_engine():
-    """Cria e retorna uma engine SQLAlchemy"""
-    db_path = Config.DB_NAME
+    """Retorna a engine SQLAlchemy do processo, criando-a na primeira chamada"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                db_path = Config.DB_NAME
+                
+                # Garantir que o diretório do banco de dados existe
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                
+                # Criar engine (compartilhada entre threads)
+                engine = create_engine(
+                    f'sqlite:///{db_path}',
+                    echo=Config.DEBUG,
+                    connect_args={
+                        "check_same_thread": False,
+                        "timeout": Config.DB_BUSY_TIMEOUT_MS / 1000.0
+                    }
+                )
+                event.listen(engine, "connect", _set_sqlite_pragmas)
+                _engine = engine
+    return _engine
+
+def get_session():
+    """Retorna a sessão SQLAlchemy da thread atual"""
+    global _session_factory
+    if _session_factory is None:
+        with _engine_lock:
+            if _session_factory is None:
+                _session_factory = scoped_session(sessionmaker(bind=get_engine()))
     
-    # Garantir que o diretório do banco de dados existe
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    session = _session_factory()
     
-    # Criar engine
-    engine = create_engine(f'sqlite:///{db_path}', echo=Config.DEBUG)
-    return engine
+    # Uma exceção anterior nesta thread pode ter deixado a transação inválida
+    if not session.is_active:
+        session.rollback()
+    return session
 
-def get_session():
-    """Cria e retorna uma sessão SQLAlchemy"""
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+def dispose_engine():
+    """Descarta a engine e as sessões (ex.: após um fork ou troca de banco)"""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _session_factory is not None:
+            _session_factory.remove()
+            _session_factory = None
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
 
 def init_db():
-    """Inicializa o banco de dados, criando todas as tabelas"""
+    """Inicializa o banco de dados, criando todas as tabelas e índices"""
     engine = get_engine()
     Base.metadata.create_all(engine)
+    
+    # create_all também não adiciona colunas novas a tabelas existentes
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+    
+    # create_all não adiciona índices novos a tabelas que já existem
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     return engine
 
 class User(Base):
@@ -60,18 +125,26 @@ class Transcription(Base):
     model_used = Column(String(20), nullable=False)
     language = Column(String(10))
     detected_language = Column(String(10))
-    status = Column(String(20), default='pending')  # pending, processing, completed, error
+    status = Column(String(20), default='pending')  # pending, processing, completed, error, cancelled
     source_type = Column(String(20), default='upload')  # upload, youtube, etc.
     
+    # Progresso atual (lido pelo processo web quando a transcrição roda em src.worker)
+    progress = Column(Integer)  # 0-100
+    step = Column(String(100))
+    time_estimate = Column(Integer)  # segundos restantes estimados
+    
     # Metadados de processamento
     audio_duration = Column(Float)  # duração em segundos
     processing_duration = Column(Float)  # tempo de processamento em segundos
+    speech_duration = Column(Float)  # segundos com fala enviados ao Whisper (vad); nulo sem vad
+    vad_time_saved = Column(Float)  # tempo de inferência economizado estimado (vad)
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     error_message = Column(Text)
     
     # Conteúdo
     text_content = Column(Text)
+    segments = Column(Text)  # JSON compacto: [[início, fim, texto], ...]
     text_summary = Column(Text)
     
     # Informações de arquivo gerado
@@ -84,6 +157,12 @@ class Transcription(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
+    # Índices para a listagem de transcrições concluídas (com e sem filtro de usuário)
+    __table_args__ = (
+        Index('ix_transcriptions_status_user_completed', status, user_id, completed_at.desc()),
+        Index('ix_transcriptions_status_completed', status, completed_at.desc()),
+    )
+    
     def __repr__(self):
         return f"<Transcription(id={self.id}, original_filename='{self.original_filename}', status='{self.status}')>"
     
@@ -128,9 +207,77 @@ class TranscriptionLog(Base):
     step = Column(String(50))
     message = Column(Text)
     
+    # Índice para buscar (e compactar) os logs de uma transcrição em ordem
+    __table_args__ = (
+        Index('ix_transcription_logs_transcription_timestamp', transcription_id, timestamp),
+    )
+    
     def __repr__(self):
         return f"<TranscriptionLog(id={self.id}, status='{self.status}', progress={self.progress})>"
 
+class TranscriptionJob(Base):
+    """Fila persistente de transcrições (uma linha por tarefa aguardando ou em execução)"""
+    __tablename__ = 'transcription_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    task_id = Column(String(36), unique=True, nullable=False)
+    status = Column(String(20), default='queued')  # queued, claimed
+    payload = Column(Text, nullable=False)  # JSON com os argumentos da transcrição
+    attempts = Column(Integer, default=0)
+    
+    # Dados usados pela política de despacho (ver services/queue_policy.py)
+    user_id = Column(Integer)
+    priority = Column(Integer)  # classe de prioridade (menor valor sai primeiro)
+    expected_seconds = Column(Float)  # tempo de processamento estimado
+    
+    # Concessão (lease) do worker que reservou a tarefa; expira se o worker morrer
+    claimed_by = Column(String(100))
+    lease_expires_at = Column(DateTime)
+    cancel_requested = Column(Boolean)  # cancelamento pedido por outro processo (lido pelo worker)
+    
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    # Índices para reservar a próxima tarefa e encontrar concessões expiradas
+    __table_args__ = (
+        Index('ix_transcription_jobs_status_id', status, id),
+        Index('ix_transcription_jobs_status_lease', status, lease_expires_at),
+    )
+    
+    def __repr__(self):
+        return f"<TranscriptionJob(task_id='{self.task_id}', status='{self.status}', claimed_by='{self.claimed_by}')>"
+
+class EtaCalibration(Base):
+    """Velocidade medida das transcrições por (modelo, dispositivo, threads), usada nas estimativas de tempo"""
+    __tablename__ = 'eta_calibrations'
+    
+    id = Column(Integer, primary_key=True)
+    model_name = Column(String(20), nullable=False)
+    device = Column(String(20), nullable=False)
+    threads = Column(Integer, nullable=False)
+    
+    # Médias móveis das transcrições concluídas
+    samples = Column(Integer, default=0)
+    realtime_factor = Column(Float)  # segundos de inferência por segundo de áudio
+    decode_factor = Column(Float)  # segundos de decodificação por segundo de áudio
+    load_samples = Column(Integer, default=0)
+    load_seconds = Column(Float)  # carregamento do modelo (quando não estava no pool)
+    
+    # Erro das estimativas feitas antes de cada transcrição
+    error_count = Column(Integer, default=0)
+    abs_error_sum = Column(Float, default=0.0)  # segundos
+    pct_error_sum = Column(Float, default=0.0)  # erro relativo ao tempo real
+    recent_abs_error = Column(Float)  # média móvel do erro absoluto
+    
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_eta_calibrations_runtime', model_name, device, threads, unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<EtaCalibration(model='{self.model_name}', device='{self.device}', threads={self.threads}, samples={self.samples})>"
+
 class Setting(Base):
     """Modelo para configurações do sistema"""
     __tablename__ = 'settings'
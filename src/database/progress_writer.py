@@ -0,0 +1,165 @@
+import threading
+import time
+import datetime
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+from .models import get_session, Transcription, TranscriptionLog
+
+class ProgressWriter:
+    """
+    Gravador assíncrono de progresso das transcrições.
+    
+    Os eventos de progresso são apenas registrados em memória pela thread de
+    transcrição; uma thread em segundo plano agrupa os eventos por tarefa
+    (mantendo só o mais recente) e os grava no SQLite em uma única transação
+    a cada flush_interval_ms.
+    """
+    
+    def __init__(self, flush_interval_ms=None):
+        """
+        Args:
+            flush_interval_ms: Intervalo entre gravações em lote (ms)
+        """
+        interval_ms = flush_interval_ms or Config.PROGRESS_FLUSH_INTERVAL_MS
+        self.flush_interval = interval_ms / 1000.0
+        
+        # task_id -> evento mais recente ainda não gravado
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        
+        # Estatísticas
+        self.events_received = 0
+        self.events_coalesced = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+    
+    def start(self):
+        """Inicia a thread de gravação em segundo plano"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            logger.info("Iniciado gravador assíncrono de progresso")
+    
+    def stop(self):
+        """Encerra a thread de gravação, gravando os eventos pendentes"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def record(self, task_id, progress, step=None, status="processing", time_estimate=None):
+        """
+        Registra um evento de progresso para gravação posterior
+        
+        Args:
+            task_id: ID da tarefa
+            progress: Progresso (0-100)
+            step: Descrição da etapa atual (opcional)
+            status: Status da tarefa
+            time_estimate: Segundos restantes estimados (opcional)
+        """
+        with self._lock:
+            self.events_received += 1
+            previous = self._pending.get(task_id)
+            if previous:
+                self.events_coalesced += 1
+                step = step or previous["step"]
+                if time_estimate is None:
+                    time_estimate = previous["time_estimate"]
+            
+            self._pending[task_id] = {
+                "progress": progress,
+                "step": step,
+                "status": status,
+                "time_estimate": time_estimate,
+                "timestamp": datetime.datetime.utcnow()
+            }
+    
+    def discard(self, task_id):
+        """Descarta eventos pendentes de uma tarefa"""
+        with self._lock:
+            self._pending.pop(task_id, None)
+    
+    def _run(self):
+        """Grava os eventos pendentes periodicamente"""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+    
+    def flush(self):
+        """
+        Grava imediatamente todos os eventos pendentes em uma única transação
+        
+        Returns:
+            int: Número de registros de log gravados
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+            
+            start = time.perf_counter()
+            written = 0
+            db_session = None
+            try:
+                db_session = get_session()
+                db_tasks = db_session.query(Transcription).filter(
+                    Transcription.task_id.in_(list(pending.keys()))
+                ).all()
+                
+                for db_task in db_tasks:
+                    event = pending[db_task.task_id]
+                    if event["status"] != db_task.status:
+                        db_task.status = event["status"]
+                    db_task.progress = event["progress"]
+                    if event["step"]:
+                        db_task.step = event["step"][:100]
+                    if event["time_estimate"] is not None:
+                        db_task.time_estimate = int(event["time_estimate"])
+                    
+                    db_session.add(TranscriptionLog(
+                        transcription_id=db_task.id,
+                        timestamp=event["timestamp"],
+                        status=event["status"],
+                        progress=event["progress"],
+                        step=event["step"] or "",
+                        message=f"Progresso atualizado para {event['progress']}%"
+                    ))
+                    written += 1
+                
+                db_session.commit()
+            except Exception as e:
+                if db_session:
+                    db_session.rollback()
+                error_logger.error(f"Erro ao gravar progresso no banco: {str(e)}")
+                return 0
+            finally:
+                if db_session:
+                    db_session.close()
+            
+            with self._lock:
+                self.rows_written += written
+                self.flushes += 1
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+            
+            return written
+    
+    def get_stats(self):
+        """Retorna estatísticas do gravador"""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "events_received": self.events_received,
+                "events_coalesced": self.events_coalesced,
+                "rows_written": self.rows_written,
+                "flushes": self.flushes,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "flush_interval_ms": int(self.flush_interval * 1000)
+            }
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from ..config.config import Config
+from ..utils.logger import error_logger
+from ..database.models import get_session, EtaCalibration
+from .model_pool import model_pool
+
+class EtaEstimator:
+    """
+    Estimador do tempo de transcrição calibrado pelas transcrições concluídas.
+    
+    Para cada (modelo, dispositivo, threads) mantém médias móveis do fator de
+    tempo real (segundos de inferência por segundo de áudio), da
+    decodificação e do carregamento do modelo, gravadas em eta_calibrations
+    e lidas por todos os processos (web e src.worker). Sem medições para o
+    ambiente exato, usa as do mesmo modelo em outro ambiente e, por fim,
+    Config.MODEL_COST_FACTORS e Config.MODEL_LOAD_SECONDS.
+    
+    Cada transcrição registra também o erro da estimativa feita antes dela
+    começar, exposto como erro absoluto médio em /api/v1/eta.
+    """
+    
+    # Tentativas de gravação quando outro processo atualiza a mesma calibração
+    RECORD_RETRIES = 5
+    
+    def __init__(self, learning_rate=None, refresh_seconds=None):
+        """
+        Args:
+            learning_rate: Peso mínimo de cada nova medição nas médias móveis
+            refresh_seconds: Intervalo de releitura das calibrações do banco
+        """
+        self.learning_rate = learning_rate or Config.ETA_LEARNING_RATE
+        self.refresh_seconds = Config.ETA_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        
+        # (modelo, dispositivo, threads) -> valores da calibração
+        self._calibrations = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def runtime(parallel_chunks=False):
+        """
+        Identifica o ambiente de execução deste processo
+        
+        Args:
+            parallel_chunks: Se a transcrição usa o pool de processos de trechos
+        
+        Returns:
+            tuple: (dispositivo, threads de CPU usadas pela transcrição)
+        """
+        device = model_pool.current_device()
+        try:
+            import torch
+            threads = torch.get_num_threads()
+        except ImportError:
+            threads = os.cpu_count() or 1
+        
+        if parallel_chunks:
+            threads *= Config.PARALLEL_CHUNK_WORKERS
+        return device, threads
+    
+    @staticmethod
+    def _to_dict(row):
+        return {
+            "model_name": row.model_name,
+            "device": row.device,
+            "threads": row.threads,
+            "samples": row.samples or 0,
+            "realtime_factor": row.realtime_factor,
+            "decode_factor": row.decode_factor,
+            "load_samples": row.load_samples or 0,
+            "load_seconds": row.load_seconds,
+            "error_count": row.error_count or 0,
+            "abs_error_sum": row.abs_error_sum or 0.0,
+            "pct_error_sum": row.pct_error_sum or 0.0,
+            "recent_abs_error": row.recent_abs_error
+        }
+    
+    def _refresh(self, force=False):
+        """Relê as calibrações do banco (gravadas por qualquer processo)"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._loaded_at is not None and now - self._loaded_at < self.refresh_seconds:
+                return
+            self._loaded_at = now
+        
+        try:
+            db_session = get_session()
+            calibrations = {
+                (row.model_name, row.device, row.threads): self._to_dict(row)
+                for row in db_session.query(EtaCalibration).all()
+            }
+            db_session.close()
+        except Exception as e:
+            error_logger.error(f"Erro ao carregar calibrações do estimador de tempo: {str(e)}")
+            return
+        
+        with self._lock:
+            self._calibrations = calibrations
+    
+    def _lookup(self, model_name, device=None, threads=None):
+        """Calibração do ambiente exato ou, se não houver, a mais amostrada do mesmo modelo"""
+        self._refresh()
+        with self._lock:
+            calibration = self._calibrations.get((model_name, device, threads))
+            if calibration and calibration["samples"]:
+                return calibration
+            
+            candidates = [c for c in self._calibrations.values() if c["model_name"] == model_name and c["samples"]]
+            same_device = [c for c in candidates if c["device"] == device]
+            candidates = same_device or candidates
+            return max(candidates, key=lambda c: c["samples"]) if candidates else None
+    
+    def predict(self, model_name, audio_seconds, device=None, threads=None, include_load=False):
+        """
+        Estima o tempo de cada etapa de uma transcrição
+        
+        Args:
+            model_name: Modelo Whisper
+            audio_seconds: Duração do áudio (None usa Config.QUEUE_DEFAULT_AUDIO_SECONDS)
+            device: Dispositivo (None: qualquer ambiente calibrado para o modelo)
+            threads: Threads de CPU
+            include_load: Incluir o carregamento do modelo
+        
+        Returns:
+            dict: Segundos de decode, inference, load e total, e se a estimativa é calibrated
+        """
+        duration = audio_seconds or Config.QUEUE_DEFAULT_AUDIO_SECONDS
+        calibration = self._lookup(model_name, device, threads)
+        
+        if calibration:
+            realtime_factor = calibration["realtime_factor"]
+            decode_factor = calibration["decode_factor"]
+        else:
+            realtime_factor = Config.MODEL_COST_FACTORS.get(model_name, 1.0)
+            decode_factor = Config.ETA_DECODE_FACTOR
+        
+        load = 0.0
+        if include_load:
+            if calibration and calibration["load_samples"]:
+                load = calibration["load_seconds"]
+            else:
+                load = Config.MODEL_LOAD_SECONDS.get(model_name, 30)
+        
+        decode = duration * decode_factor
+        inference = duration * realtime_factor
+        return {
+            "decode": decode,
+            "inference": inference,
+            "load": load,
+            "total": decode + inference + load,
+            "calibrated": calibration is not None
+        }
+    
+    def predict_seconds(self, model_name, audio_seconds):
+        """Tempo estimado de uma tarefa na fila (decodificação + inferência, modelo já carregado)"""
+        return self.predict(model_name, audio_seconds)["total"]
+    
+    def _blend(self, current, sample, count):
+        """Média móvel: média simples nas primeiras amostras, exponencial depois"""
+        if current is None or not count:
+            return sample
+        weight = max(1.0 / (count + 1), self.learning_rate)
+        return current + weight * (sample - current)
+    
+    def record(self, model_name, device, threads, audio_seconds, decode_seconds, inference_seconds,
+               load_seconds=None, predicted_seconds=None, actual_seconds=None, transcribed_seconds=None):
+        """
+        Registra as medições de uma transcrição concluída
+        
+        Args:
+            model_name, device, threads: Ambiente de execução (ver runtime)
+            audio_seconds: Duração do áudio
+            decode_seconds: Tempo de decodificação
+            inference_seconds: Tempo de detecção de idioma e transcrição
+            load_seconds: Tempo de carregamento do modelo, se ele não estava no pool
+            predicted_seconds: Tempo total estimado antes da transcrição
+            actual_seconds: Tempo total medido
+            transcribed_seconds: Áudio efetivamente transcrito, se menor que
+                audio_seconds (trechos sem fala descartados pela detecção de voz)
+        """
+        if not audio_seconds or audio_seconds <= 0:
+            return
+        
+        realtime_sample = inference_seconds / (transcribed_seconds or audio_seconds)
+        decode_sample = decode_seconds / audio_seconds
+        error = None
+        if predicted_seconds is not None and actual_seconds:
+            error = abs(predicted_seconds - actual_seconds)
+        
+        for _ in range(self.RECORD_RETRIES):
+            db_session = get_session()
+            try:
+                row = db_session.query(EtaCalibration).filter_by(
+                    model_name=model_name, device=device, threads=threads
+                ).first()
+                
+                if row is None:
+                    db_session.add(EtaCalibration(
+                        model_name=model_name,
+                        device=device,
+                        threads=threads,
+                        samples=1,
+                        realtime_factor=realtime_sample,
+                        decode_factor=decode_sample,
+                        load_samples=1 if load_seconds is not None else 0,
+                        load_seconds=load_seconds,
+                        error_count=1 if error is not None else 0,
+                        abs_error_sum=error or 0.0,
+                        pct_error_sum=error / actual_seconds if error is not None else 0.0,
+                        recent_abs_error=error
+                    ))
+                    db_session.commit()
+                    break
+                
+                samples = row.samples or 0
+                values = {
+                    EtaCalibration.samples: samples + 1,
+                    EtaCalibration.realtime_factor: self._blend(row.realtime_factor, realtime_sample, samples),
+                    EtaCalibration.decode_factor: self._blend(row.decode_factor, decode_sample, samples)
+                }
+                if load_seconds is not None:
+                    values[EtaCalibration.load_samples] = (row.load_samples or 0) + 1
+                    values[EtaCalibration.load_seconds] = self._blend(row.load_seconds, load_seconds, row.load_samples)
+                if error is not None:
+                    values[EtaCalibration.error_count] = (row.error_count or 0) + 1
+                    values[EtaCalibration.abs_error_sum] = (row.abs_error_sum or 0.0) + error
+                    values[EtaCalibration.pct_error_sum] = (row.pct_error_sum or 0.0) + error / actual_seconds
+                    values[EtaCalibration.recent_abs_error] = self._blend(row.recent_abs_error, error, row.error_count)
+                
+                # Só grava se nenhum outro processo atualizou a linha desde a leitura
+                updated = db_session.query(EtaCalibration).filter(
+                    EtaCalibration.id == row.id,
+                    EtaCalibration.samples == row.samples
+                ).update(values, synchronize_session=False)
+                db_session.commit()
+                if updated:
+                    break
+            except IntegrityError:
+                # Outro processo criou a calibração ao mesmo tempo; tentar de novo
+                db_session.rollback()
+            except Exception as e:
+                db_session.rollback()
+                error_logger.error(f"Erro ao registrar medições do estimador de tempo: {str(e)}")
+                return
+            finally:
+                db_session.close()
+        
+        self._refresh(force=True)
+    
+    def get_stats(self):
+        """Retorna as calibrações e o erro absoluto médio das estimativas"""
+        self._refresh(force=True)
+        with self._lock:
+            calibrations = sorted(
+                self._calibrations.values(),
+                key=lambda c: (c["model_name"], c["device"], c["threads"])
+            )
+        
+        def rounded(value, digits=2):
+            return round(value, digits) if value is not None else None
+        
+        error_count = sum(c["error_count"] for c in calibrations)
+        return {
+            "mae_seconds": rounded(sum(c["abs_error_sum"] for c in calibrations) / error_count) if error_count else None,
+            "mape": rounded(sum(c["pct_error_sum"] for c in calibrations) / error_count, 4) if error_count else None,
+            "estimates_evaluated": error_count,
+            "calibrations": [
+                {
+                    "model": c["model_name"],
+                    "device": c["device"],
+                    "threads": c["threads"],
+                    "samples": c["samples"],
+                    "realtime_factor": rounded(c["realtime_factor"], 4),
+                    "decode_factor": rounded(c["decode_factor"], 5),
+                    "load_seconds": rounded(c["load_seconds"]),
+                    "mae_seconds": rounded(c["abs_error_sum"] / c["error_count"]) if c["error_count"] else None,
+                    "recent_mae_seconds": rounded(c["recent_abs_error"]),
+                    "mape": rounded(c["pct_error_sum"] / c["error_count"], 4) if c["error_count"] else None
+                }
+                for c in calibrations
+            ],
+            "defaults": {
+                "model_cost_factors": dict(Config.MODEL_COST_FACTORS),
+                "model_load_seconds": dict(Config.MODEL_LOAD_SECONDS),
+                "decode_factor": Config.ETA_DECODE_FACTOR
+            }
+        }
@@ -0,0 +1,229 @@
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from ..config.config import Config
+from ..utils.logger import logger, transcription_logger
+from ..utils.cancellation import install_decode_checkpoint
+from ..utils.language_detection import install_encoder_reuse
+
+class ModelPool:
+    """
+    Pool de modelos Whisper compartilhado por todo o processo.
+    
+    Os modelos são indexados por (nome, dispositivo) e mantidos dentro de um
+    orçamento de memória com despejo LRU. O carregamento é "single-flight":
+    se duas threads pedirem o mesmo checkpoint ao mesmo tempo, apenas uma o
+    carrega e a outra aguarda o resultado. A thread que carrega também
+    instala, uma única vez, os desvios do modelo compartilhado: o ponto de
+    verificação de cancelamento no decode e o reaproveitamento do encoder.
+    
+    Modelos obtidos dentro de leased() ficam em uso até o fim do bloco e não
+    são despejados: um modelo despejado durante uma transcrição continuaria
+    na memória ao lado do carregado no lugar dele. Se só houver modelos em
+    uso, o novo é carregado mesmo passando do orçamento, e o excesso é
+    despejado assim que eles são liberados.
+    """
+    
+    # Número aproximado de parâmetros de cada modelo (usado antes do carregamento)
+    MODEL_PARAMS = {
+        "tiny": 39_000_000,
+        "base": 74_000_000,
+        "small": 244_000_000,
+        "medium": 769_000_000,
+        "large": 1_550_000_000
+    }
+    
+    def __init__(self, max_memory_mb=None, device=None):
+        """
+        Args:
+            max_memory_mb: Orçamento de memória para os modelos em cache (MB)
+            device: Dispositivo padrão ('cpu', 'cuda'); None detecta automaticamente
+        """
+        self.max_memory_bytes = int((max_memory_mb or Config.MODEL_POOL_MAX_MEMORY_MB) * 1024 * 1024)
+        self.default_device = device if device is not None else Config.WHISPER_DEVICE
+        
+        # (nome, dispositivo) -> (modelo, bytes), em ordem de uso (LRU primeiro)
+        self._models = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        
+        # Carregamentos em andamento: (nome, dispositivo) -> threading.Event
+        self._loading = {}
+        
+        # Modelos em uso: (nome, dispositivo) -> número de blocos leased() que o obtiveram
+        self._in_use = Counter()
+        self._local = threading.local()
+        
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_errors = 0
+    
+    def _resolve_device(self, device):
+        """Resolve o dispositivo efetivo (detecta CUDA se não especificado)"""
+        device = device or self.default_device
+        if device:
+            return device
+        
+        try:
+            import torch
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            return "cpu"
+    
+    def current_device(self):
+        """Dispositivo usado quando nenhum é especificado"""
+        return self._resolve_device(None)
+    
+    def is_loaded(self, model_name, device=None):
+        """Indica se o modelo já está no pool (get não precisará carregá-lo)"""
+        key = (model_name, self._resolve_device(device))
+        with self._lock:
+            return key in self._models
+    
+    def _estimate_size(self, model_name):
+        """Estima o tamanho em memória de um modelo ainda não carregado (fp32)"""
+        base_name = model_name.split(".")[0].split("-")[0]
+        return self.MODEL_PARAMS.get(base_name, self.MODEL_PARAMS["large"]) * 4
+    
+    @staticmethod
+    def _measure_size(model):
+        """Mede o tamanho real dos parâmetros e buffers de um modelo carregado"""
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            size += sum(b.numel() * b.element_size() for b in model.buffers())
+            return size
+        except Exception:
+            return None
+    
+    def _evict_for(self, required_bytes):
+        """Despeja modelos menos usados (e fora de uso) até caber required_bytes (com lock)"""
+        for key in list(self._models):
+            if self._memory_used + required_bytes <= self.max_memory_bytes:
+                break
+            if self._in_use[key]:
+                continue
+            _, size = self._models.pop(key)
+            self._memory_used -= size
+            self.evictions += 1
+            logger.info(f"Modelo {key[0]} ({key[1]}) removido do pool para liberar memória")
+    
+    def _lease_locked(self, key):
+        """Marca o modelo como em uso pelo bloco leased() ativo na thread (com lock)"""
+        keys = getattr(self._local, "keys", None)
+        if keys is not None:
+            keys.append(key)
+            self._in_use[key] += 1
+    
+    @contextmanager
+    def leased(self):
+        """
+        Mantém fora do despejo os modelos obtidos por get() dentro do bloco
+        
+        Uso:
+            with model_pool.leased():
+                model = model_pool.get("base")
+                model.transcribe(...)
+        """
+        previous = getattr(self._local, "keys", None)
+        self._local.keys = []
+        try:
+            yield
+        finally:
+            keys, self._local.keys = self._local.keys, previous
+            with self._lock:
+                for key in keys:
+                    self._in_use[key] -= 1
+                    if self._in_use[key] <= 0:
+                        del self._in_use[key]
+                # Devolver ao orçamento o que passou dele enquanto os modelos estavam em uso
+                self._evict_for(0)
+    
+    def get(self, model_name, device=None):
+        """
+        Retorna o modelo solicitado, carregando-o se necessário
+        
+        Args:
+            model_name: Nome do modelo Whisper
+            device: Dispositivo desejado (opcional)
+        
+        Returns:
+            Modelo Whisper carregado
+        """
+        key = (model_name, self._resolve_device(device))
+        
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    self._lease_locked(key)
+                    return self._models[key][0]
+                
+                event = self._loading.get(key)
+                if event is None:
+                    # Esta thread fica responsável pelo carregamento
+                    self.misses += 1
+                    event = threading.Event()
+                    self._loading[key] = event
+                    break
+            
+            # Outra thread já está carregando o mesmo checkpoint
+            event.wait()
+        
+        try:
+            with self._lock:
+                self._evict_for(self._estimate_size(model_name))
+            
+            # Importado só aqui: processos que apenas enfileiram não carregam o Whisper
+            import whisper
+            
+            transcription_logger.info(f"Carregando modelo {model_name} em {key[1]}")
+            model = whisper.load_model(model_name, device=key[1])
+            model = install_encoder_reuse(install_decode_checkpoint(model))
+            size = self._measure_size(model) or self._estimate_size(model_name)
+            
+            with self._lock:
+                self._evict_for(size)
+                self._models[key] = (model, size)
+                self._memory_used += size
+                self._lease_locked(key)
+                if self._memory_used > self.max_memory_bytes:
+                    logger.info(f"Pool de modelos acima do orçamento com modelos em uso "
+                                f"({self._memory_used / (1024 * 1024):.0f} MB)")
+            
+            transcription_logger.info(f"Modelo {model_name} carregado com sucesso ({size / (1024 * 1024):.0f} MB)")
+            return model
+        except Exception:
+            with self._lock:
+                self.load_errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+    
+    def clear(self):
+        """Remove todos os modelos do pool"""
+        with self._lock:
+            self._models.clear()
+            self._memory_used = 0
+    
+    def get_stats(self):
+        """Retorna estatísticas de uso do pool"""
+        with self._lock:
+            return {
+                "loaded_models": [f"{name}@{device}" for name, device in self._models],
+                "models_in_use": [f"{name}@{device}" for name, device in self._in_use],
+                "memory_used_mb": round(self._memory_used / (1024 * 1024), 1),
+                "max_memory_mb": round(self.max_memory_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_errors": self.load_errors
+            }
+
+# Instância global do pool de modelos
+model_pool = ModelPool()
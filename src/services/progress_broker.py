@@ -0,0 +1,117 @@
+import threading
+import time
+
+class Subscription:
+    """
+    Inscrição de um cliente no canal de progresso de uma tarefa.
+    
+    Guarda apenas o evento mais recente: cada evento é um retrato completo do
+    progresso, então um cliente lento recebe o estado atual em vez de uma
+    fila de eventos antigos.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._latest = None
+    
+    def put(self, event):
+        with self._condition:
+            self._latest = event
+            self._condition.notify()
+    
+    def get(self, timeout=None):
+        """
+        Aguarda o próximo evento
+        
+        Returns:
+            dict: Evento mais recente, ou None se o tempo limite expirar
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while self._latest is None:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            event, self._latest = self._latest, None
+            return event
+
+class ProgressBroker:
+    """
+    Canal publish/subscribe de progresso por tarefa.
+    
+    TranscriptionManager publica um evento a cada atualização de progresso;
+    as conexões SSE de /progress/<task_id>/stream ficam bloqueadas em
+    Subscription.get até o próximo evento, sem consultar o estado da tarefa.
+    
+    Cada conexão ocupa uma thread do servidor enquanto está aberta, por isso
+    o número de inscrições pode ser limitado (subscribe com max_subscribers).
+    """
+    
+    def __init__(self):
+        self._subscribers = {}
+        self._sequence = {}
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def subscribe(self, task_id, max_subscribers=None):
+        """
+        Inscreve um cliente nos eventos de uma tarefa
+        
+        Args:
+            task_id: ID da tarefa
+            max_subscribers: Limite de inscrições em todas as tarefas
+        
+        Returns:
+            Subscription: Inscrição criada, ou None se o limite foi atingido
+        """
+        subscription = Subscription()
+        with self._lock:
+            if max_subscribers is not None and self._count >= max_subscribers:
+                return None
+            self._subscribers.setdefault(task_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+    
+    def unsubscribe(self, task_id, subscription):
+        """Cancela a inscrição de um cliente"""
+        with self._lock:
+            subscribers = self._subscribers.get(task_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[task_id]
+    
+    def has_subscribers(self, task_id):
+        return task_id in self._subscribers
+    
+    def subscribed_tasks(self):
+        """IDs das tarefas com pelo menos um cliente inscrito"""
+        with self._lock:
+            return list(self._subscribers)
+    
+    def next_id(self, task_id):
+        """Número sequencial do próximo evento da tarefa (usado como id SSE)"""
+        with self._lock:
+            self._sequence[task_id] = self._sequence.get(task_id, 0) + 1
+            return self._sequence[task_id]
+    
+    def publish(self, task_id, event):
+        """Entrega um evento a todos os clientes inscritos na tarefa"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(task_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+    
+    def discard(self, task_id):
+        """Remove o contador de eventos de uma tarefa removida da memória"""
+        with self._lock:
+            self._sequence.pop(task_id, None)
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                "tasks": len(self._subscribers),
+                "subscribers": self._count
+            }
@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from ..config.config import Config
+
+class QueuePolicy:
+    """
+    Ordem de despacho das tarefas enfileiradas.
+    
+    As classes de prioridade (Config.PRIORITY_CLASSES) são estritas: uma
+    tarefa só sai da fila quando não há nenhuma de classe mais alta. Dentro
+    de cada classe, a ordem depende de Config.QUEUE_POLICY:
+    
+    - fifo: ordem de chegada
+    - fair: fair share por usuário. Cada tarefa recebe um tempo virtual de
+      término: o custo estimado das tarefas do mesmo usuário em execução e à
+      frente dela na fila, somado ao seu, dividido pelo peso do usuário. É o
+      deficit round robin com quantum mínimo: quem enviou vinte áudios de
+      duas horas não bloqueia a mensagem de 30 segundos de outro usuário.
+    - sjf: menor tarefa primeiro pelo custo estimado, com envelhecimento
+      (Config.SJF_AGING_FACTOR) para que tarefas longas não esperem para sempre
+    
+    O custo estimado é a duração do áudio vezes o fator do modelo
+    (Config.MODEL_COST_FACTORS). A ordem é calculada a partir do estado atual
+    da fila, sem estado próprio, então todos os workers (e o processo web,
+    para queue_position) chegam à mesma ordem.
+    
+    Cada tarefa é um dict com task_id, user_id, priority, expected_seconds,
+    enqueued_at (timestamp) e seq (ordem de chegada).
+    """
+    
+    POLICIES = ("fifo", "fair", "sjf")
+    
+    def __init__(self, policy=None, user_weights=None, aging_factor=None):
+        """
+        Args:
+            policy: 'fifo', 'fair' ou 'sjf' (padrão: Config.QUEUE_POLICY)
+            user_weights: Peso de cada usuário no fair share (padrão: Config.USER_WEIGHTS)
+            aging_factor: Segundos de custo descontados por segundo de espera no sjf
+        """
+        self.policy = policy or Config.QUEUE_POLICY
+        if self.policy not in self.POLICIES:
+            raise ValueError(f"Política de fila inválida: {self.policy}. Use uma de {', '.join(self.POLICIES)}")
+        
+        # Chaves de config.json são sempre strings
+        weights = Config.USER_WEIGHTS if user_weights is None else user_weights
+        self.user_weights = {str(user): float(weight) for user, weight in weights.items()}
+        self.aging_factor = Config.SJF_AGING_FACTOR if aging_factor is None else aging_factor
+    
+    @staticmethod
+    def priority_value(name=None):
+        """Converte o nome de uma classe de prioridade no valor usado na ordenação"""
+        classes = Config.PRIORITY_CLASSES
+        return classes.get(name or Config.DEFAULT_PRIORITY, classes[Config.DEFAULT_PRIORITY])
+    
+    @staticmethod
+    def priority_name(value):
+        """Nome da classe de prioridade de um valor (o valor, se não houver classe)"""
+        for name, class_value in Config.PRIORITY_CLASSES.items():
+            if class_value == value:
+                return name
+        return value
+    
+    @staticmethod
+    def expected_seconds(audio_seconds, model_name):
+        """
+        Estima o tempo de processamento de uma tarefa
+        
+        Args:
+            audio_seconds: Duração do áudio (None usa Config.QUEUE_DEFAULT_AUDIO_SECONDS)
+            model_name: Modelo Whisper da tarefa
+        """
+        duration = audio_seconds or Config.QUEUE_DEFAULT_AUDIO_SECONDS
+        return duration * Config.MODEL_COST_FACTORS.get(model_name, 1.0)
+    
+    def _weight(self, user_id):
+        return max(self.user_weights.get(str(user_id), 1.0), 1e-6)
+    
+    @staticmethod
+    def _cost(job):
+        cost = job.get("expected_seconds")
+        return cost if cost is not None else QueuePolicy.expected_seconds(None, None)
+    
+    @classmethod
+    def _priority(cls, job):
+        priority = job.get("priority")
+        return priority if priority is not None else cls.priority_value()
+    
+    def order(self, queued, running=(), now=None):
+        """
+        Ordena as tarefas enfileiradas na ordem em que serão despachadas
+        
+        Args:
+            queued: Tarefas aguardando
+            running: Tarefas em execução (contam como serviço recebido no fair share)
+            now: Timestamp atual, na mesma base de enqueued_at (usado pelo sjf)
+        
+        Returns:
+            list: As tarefas de queued na ordem de despacho
+        """
+        queued = sorted(queued, key=lambda job: job["seq"])
+        
+        if self.policy == "fifo":
+            return sorted(queued, key=lambda job: (self._priority(job), job["seq"]))
+        
+        if self.policy == "sjf":
+            def sjf_key(job):
+                waited = max(0.0, now - job["enqueued_at"]) if now is not None and job.get("enqueued_at") else 0.0
+                return (self._priority(job), self._cost(job) - waited * self.aging_factor, job["seq"])
+            return sorted(queued, key=sjf_key)
+        
+        # fair: tempo virtual de término por usuário, dentro de cada classe
+        in_service = defaultdict(float)
+        for job in running:
+            in_service[job.get("user_id")] += self._cost(job)
+        
+        backlog = {}
+        keys = {}
+        for job in queued:
+            user_id = job.get("user_id")
+            slot = (self._priority(job), user_id)
+            backlog[slot] = backlog.get(slot, in_service[user_id]) + self._cost(job)
+            keys[job["task_id"]] = (slot[0], backlog[slot] / self._weight(user_id), job["seq"])
+        
+        return sorted(queued, key=lambda job: keys[job["task_id"]])
+    
+    def select(self, queued, running=(), now=None):
+        """Retorna a próxima tarefa a ser despachada (None se não houver)"""
+        ordered = self.order(queued, running, now)
+        return ordered[0] if ordered else None
+    
+    def describe(self):
+        """Configuração da política (exposta em /api/v1/queue)"""
+        return {
+            "policy": self.policy,
+            "priority_classes": dict(Config.PRIORITY_CLASSES),
+            "user_weights": dict(self.user_weights),
+            "model_cost_factors": dict(Config.MODEL_COST_FACTORS)
+        }
@@ -0,0 +1,192 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+
+def text_hash(text):
+    """SHA-256 do texto de uma transcrição (parte da chave do cache)"""
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+class RenderCache:
+    """
+    Cache em disco de exportações renderizadas sob demanda.
+    
+    Cada arquivo é endereçado pelo conteúdo: a chave combina o ID da
+    transcrição, o formato e o hash do texto, então uma edição do texto gera
+    uma nova entrada e downloads repetidos apenas reenviam o arquivo salvo.
+    O tamanho total é limitado por Config.EXPORT_CACHE_MAX_SIZE_MB com
+    despejo LRU; como no ResultCache, arquivos renderizados por outro
+    processo são adotados na primeira consulta e o índice é relido a cada
+    Config.CACHE_REFRESH_SECONDS antes de despejar.
+    """
+    
+    def __init__(self, cache_dir=None, max_size_mb=None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: Config.CACHE_DIR/exports)
+            max_size_mb: Tamanho máximo do cache em MB
+        """
+        self.cache_dir = cache_dir or os.path.join(Config.CACHE_DIR, 'exports')
+        self.max_size_bytes = int((max_size_mb or Config.EXPORT_CACHE_MAX_SIZE_MB) * 1024 * 1024)
+        
+        # chave -> (nome do arquivo, tamanho em bytes), em ordem de uso (LRU primeiro)
+        self._entries = None
+        self._size = 0
+        self._indexed_at = 0.0
+        self._lock = threading.Lock()
+        
+        # Um lock por chave evita renderizar o mesmo arquivo duas vezes em paralelo
+        self._render_locks = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _load_index(self):
+        """Reconstrói o índice LRU a partir dos arquivos existentes (chamado com o lock)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+                entries.append((stat.st_mtime, filename, stat.st_size))
+            except OSError:
+                continue
+        
+        self._entries = OrderedDict()
+        self._size = 0
+        for _, filename, size in sorted(entries):
+            self._entries[os.path.splitext(filename)[0]] = (filename, size)
+            self._size += size
+        self._indexed_at = time.monotonic()
+    
+    @staticmethod
+    def make_key(transcription_id, fmt, content_hash):
+        """Gera a chave do cache para uma transcrição, formato e versão do texto"""
+        raw = f"{transcription_id}:{fmt}:{content_hash}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _lookup(self, key, filename):
+        """Retorna o caminho de uma entrada existente, atualizando a ordem LRU"""
+        with self._lock:
+            if self._entries is None:
+                self._load_index()
+            entry = self._entries.get(key)
+            if entry is None:
+                # Renderizada por outro processo depois da leitura do índice
+                try:
+                    entry = self._entries[key] = (filename, os.path.getsize(os.path.join(self.cache_dir, filename)))
+                except OSError:
+                    return None
+                self._size += entry[1]
+            self._entries.move_to_end(key)
+        
+        path = os.path.join(self.cache_dir, entry[0])
+        try:
+            os.utime(path)  # Mantém a ordem LRU após reinícios
+        except OSError:
+            # Arquivo removido externamente
+            with self._lock:
+                if self._entries.pop(key, None):
+                    self._size -= entry[1]
+            return None
+        return path
+    
+    def get_or_render(self, transcription_id, fmt, content_hash, render):
+        """
+        Retorna o caminho do arquivo exportado, renderizando-o se necessário
+        
+        Args:
+            transcription_id: ID da transcrição
+            fmt: Formato (pdf, txt, srt, vtt, docx)
+            content_hash: Hash do texto (ver text_hash)
+            render: Função render(output_path) chamada apenas se não houver cache
+        
+        Returns:
+            str: Caminho do arquivo no cache
+        """
+        key = self.make_key(transcription_id, fmt, content_hash)
+        filename = f"{key}.{fmt}"
+        
+        path = self._lookup(key, filename)
+        if path:
+            with self._lock:
+                self.hits += 1
+            return path
+        
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        
+        with render_lock:
+            # Outra thread pode ter renderizado enquanto esperávamos
+            path = self._lookup(key, filename)
+            if path:
+                with self._lock:
+                    self.hits += 1
+                return path
+            
+            path = os.path.join(self.cache_dir, filename)
+            tmp_path = f"{path}.tmp"
+            try:
+                render(tmp_path)
+                os.replace(tmp_path, path)
+                self._add(key, filename, os.path.getsize(path))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                with self._lock:
+                    self._render_locks.pop(key, None)
+        
+        return path
+    
+    def _add(self, key, filename, size):
+        """Registra uma nova entrada e despeja as menos usadas se necessário"""
+        evicted = []
+        with self._lock:
+            # Outros processos também renderizam e despejam arquivos
+            if time.monotonic() - self._indexed_at >= Config.CACHE_REFRESH_SECONDS:
+                self._load_index()
+            
+            self.misses += 1
+            self._size -= self._entries.pop(key, (None, 0))[1]
+            self._entries[key] = (filename, size)
+            self._size += size
+            
+            while self._size > self.max_size_bytes and len(self._entries) > 1:
+                _, (old_filename, old_size) = self._entries.popitem(last=False)
+                self._size -= old_size
+                self.evictions += 1
+                evicted.append(old_filename)
+        
+        for old_filename in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_filename))
+            except OSError as e:
+                error_logger.error(f"Erro ao remover exportação do cache {old_filename}: {str(e)}")
+        
+        if evicted:
+            logger.info(f"Cache de exportações: {len(evicted)} arquivo(s) removido(s)")
+    
+    def get_stats(self):
+        """Retorna estatísticas de uso do cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries) if self._entries is not None else 0,
+                "size_mb": round(self._size / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+# Instância global do cache de exportações
+render_cache = RenderCache()
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+
+class ResultCache:
+    """
+    Cache em disco de resultados de transcrição indexado pelo conteúdo.
+    
+    A chave combina o SHA-256 do arquivo de entrada com o modelo, o modo de
+    idioma e o idioma; reenvios do mesmo arquivo retornam o resultado salvo
+    sem executar o Whisper novamente. O tamanho total é limitado por
+    Config.CACHE_MAX_SIZE_MB com despejo LRU.
+    
+    O diretório pode ser compartilhado entre processos (web e src.worker):
+    entradas gravadas por outro processo são adotadas na primeira consulta,
+    e o índice é relido a cada Config.CACHE_REFRESH_SECONDS antes de despejar.
+    """
+    
+    def __init__(self, cache_dir=None, max_size_mb=None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: Config.CACHE_DIR/results)
+            max_size_mb: Tamanho máximo do cache em MB
+        """
+        self.cache_dir = cache_dir or os.path.join(Config.get_cache_dir(), 'results')
+        self.max_size_bytes = int((max_size_mb or Config.CACHE_MAX_SIZE_MB) * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        # chave -> tamanho em bytes, em ordem de uso (LRU primeiro)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._indexed_at = 0.0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._load_index()
+    
+    def _load_index(self):
+        """Reconstrói o índice LRU a partir dos arquivos existentes (a ordem vem do mtime)"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, filename[:-5], stat.st_size))
+                except OSError:
+                    continue
+        
+        index = OrderedDict()
+        for _, key, size in sorted(entries):
+            index[key] = size
+        
+        with self._lock:
+            self._entries = index
+            self._size = sum(index.values())
+            self._indexed_at = time.monotonic()
+    
+    def _adopt(self, key):
+        """Registra uma entrada gravada por outro processo depois da leitura do índice (com lock)"""
+        try:
+            size = os.path.getsize(self._path(key))
+        except OSError:
+            return False
+        self._entries[key] = size
+        self._size += size
+        return True
+    
+    @staticmethod
+    def make_key(content_hash, model_name, language_mode, language=None, vad=False):
+        """Gera a chave do cache para um arquivo e uma configuração de transcrição"""
+        raw = f"{content_hash}:{model_name}:{language_mode}:{language or ''}"
+        if vad:
+            # Só a fala é transcrita: o resultado pode diferir do áudio inteiro
+            raw += ":vad"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        """
+        Retorna o resultado salvo para a chave, ou None se não existir
+        
+        Returns:
+            dict: Resultado salvo (text, detected_language, ...)
+        """
+        with self._lock:
+            if key not in self._entries and not self._adopt(key):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)  # Atualiza a ordem LRU após reinícios
+        except Exception as e:
+            error_logger.error(f"Erro ao ler cache de transcrição {key}: {str(e)}")
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return result
+    
+    def put(self, key, result):
+        """
+        Salva um resultado no cache, despejando entradas antigas se necessário
+        
+        Args:
+            key: Chave gerada por make_key
+            result: Dicionário serializável em JSON
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            error_logger.error(f"Erro ao gravar cache de transcrição {key}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        
+        # Outros processos também gravam e despejam entradas: reler o índice
+        # de tempos em tempos para que o limite de tamanho valha para o diretório
+        if time.monotonic() - self._indexed_at >= Config.CACHE_REFRESH_SECONDS:
+            self._load_index()
+        
+        evicted = []
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._size += size
+            
+            while self._size > self.max_size_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                self.evictions += 1
+                evicted.append(old_key)
+        
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+        
+        if evicted:
+            logger.info(f"Cache de transcrições: {len(evicted)} entrada(s) removida(s)")
+    
+    def _remove(self, key):
+        """Remove uma entrada do cache"""
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def get_stats(self):
+        """Retorna estatísticas de uso do cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": round(self._size / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
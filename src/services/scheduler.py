@@ -0,0 +1,398 @@
+import os
+import socket
+import threading
+import time
+import itertools
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ..config.config import Config
+from ..utils.logger import logger, error_logger
+
+class TranscriptionScheduler:
+    """
+    Escalonador orientado a eventos para as tarefas de transcrição.
+    
+    Usa um semáforo com um slot por worker e uma fila bloqueante: a thread de
+    despacho só acorda quando há um slot livre e uma tarefa disponível, de modo
+    que uma tarefa começa no instante em que um slot é liberado, sem polling.
+    
+    Com uma job_queue (fila persistente), as tarefas são reservadas no banco
+    com concessões renovadas por uma thread própria; notify() acorda o
+    despacho na hora para tarefas deste processo, e tarefas enfileiradas por
+    outros processos são vistas a cada Config.JOB_POLL_INTERVAL_SECONDS.
+    
+    A tarefa despachada é escolhida pela política (QueuePolicy): prioridade,
+    fair share por usuário ou menor tarefa primeiro; sem política, em ordem
+    de chegada. Tarefas imediatas (submit com immediate=True) passam à
+    frente de todas, mas também esperam um slot: toda tarefa no executor
+    ocupa um slot.
+    
+    Tarefas aguardando na fila em memória podem ser retiradas com cancel();
+    cancelamentos de tarefas reservadas por este worker, pedidos por outros
+    processos na fila persistente, são repassados a on_cancel.
+    """
+    
+    # Número máximo de amostras mantidas para as métricas de latência
+    METRICS_WINDOW = 1000
+    
+    # Intervalo em que a espera por um slot verifica se o escalonador foi encerrado
+    STOP_CHECK_SECONDS = 0.5
+    
+    # Tempo máximo aguardando a thread de despacho em stop()
+    STOP_JOIN_SECONDS = 5.0
+    
+    def __init__(self, max_workers, on_dispatch=None, executor=None, job_queue=None, runner=None,
+                 on_recover=None, worker_id=None, policy=None, on_cancel=None):
+        """
+        Args:
+            max_workers: Número de tarefas executadas simultaneamente
+            on_dispatch: Callback chamado com o job_id no worker, antes da execução
+            executor: Executor opcional (por padrão um ThreadPoolExecutor)
+            job_queue: Fila persistente (JobQueue) opcional
+            runner: Função que executa uma tarefa reservada da fila persistente
+            on_recover: Callback chamado com (devolvidas, com erro) após recuperar concessões expiradas
+            worker_id: Identificador deste worker nas concessões (padrão: host:pid:aleatório)
+            policy: Política de despacho (QueuePolicy) da fila em memória
+            on_cancel: Callback chamado com os IDs das tarefas deste worker com cancelamento pedido
+        """
+        self.max_workers = max_workers
+        self.on_dispatch = on_dispatch
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self.policy = policy
+        
+        # Fila em memória: tarefas aguardando e em execução, descritas como na QueuePolicy
+        self._pending = []
+        self._pending_cond = threading.Condition()
+        self._running_jobs = {}
+        self._sequence = itertools.count()
+        self._active = 0
+        self._running = False
+        self._thread = None
+        
+        # Fila persistente
+        self.job_queue = job_queue
+        self.runner = runner
+        self.on_recover = on_recover
+        self.on_cancel = on_cancel
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._leased = set()
+        self._lease_thread = None
+        
+        # Métricas
+        self._metrics_lock = threading.Lock()
+        self._admission_latencies = deque(maxlen=self.METRICS_WINDOW)
+        self._dispatch_latencies = deque(maxlen=self.METRICS_WINDOW)
+        self._submitted = 0
+        self._dispatched = 0
+        self._completed = 0
+    
+    def start(self):
+        """Inicia a thread de despacho em segundo plano"""
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._thread.start()
+            
+            if self.job_queue is not None and not (self._lease_thread and self._lease_thread.is_alive()):
+                self._lease_thread = threading.Thread(target=self._lease_loop, daemon=True)
+                self._lease_thread.start()
+                logger.info(f"Fila persistente ativa (worker {self.worker_id})")
+            
+            logger.info("Iniciado escalonador de transcrições em segundo plano")
+    
+    def stop(self, wait=True):
+        """
+        Encerra a thread de despacho e, opcionalmente, aguarda o executor
+        
+        As tarefas em execução terminam neste processo e suas concessões na
+        fila persistente continuam sendo renovadas até o fim (com wait=False,
+        em segundo plano). Devolvê-las à fila só é seguro quando o processo
+        é encerrado em seguida, como no segundo sinal de src.worker.
+        """
+        if self._running:
+            with self._pending_cond:
+                self._running = False
+                self._pending_cond.notify_all()
+            self._wakeup.set()
+            if self._thread:
+                self._thread.join(self.STOP_JOIN_SECONDS)
+        self.executor.shutdown(wait=wait)
+    
+    def notify(self):
+        """Acorda o despacho após uma tarefa ser gravada na fila persistente"""
+        self._wakeup.set()
+    
+    def submit(self, job_id, fn, *args, queue_info=None, immediate=False, **kwargs):
+        """
+        Enfileira uma tarefa para execução assim que houver um slot livre
+        
+        Args:
+            job_id: Identificador da tarefa
+            fn: Função a ser executada
+            *args, **kwargs: Argumentos repassados para fn
+            queue_info: user_id, priority e expected_seconds usados pela política
+            immediate: Despachar antes de qualquer tarefa da fila (processamento imediato)
+        """
+        admitted_at = time.perf_counter()
+        entry = dict(queue_info or {})
+        entry.update(task_id=job_id, enqueued_at=time.time(), seq=next(self._sequence),
+                     immediate=immediate)
+        
+        with self._pending_cond:
+            self._pending.append((entry, (job_id, fn, args, kwargs, admitted_at)))
+            self._pending_cond.notify()
+        self._wakeup.set()
+        admission_latency = time.perf_counter() - admitted_at
+        
+        with self._metrics_lock:
+            self._submitted += 1
+            self._admission_latencies.append(admission_latency)
+    
+    def qsize(self):
+        """Retorna o número de tarefas aguardando um slot"""
+        if self.job_queue is not None:
+            return len(self._pending) + self.job_queue.count('queued')
+        return len(self._pending)
+    
+    def _ordered_pending(self):
+        """Tarefas da fila em memória na ordem de despacho (chamado com _pending_cond)"""
+        entries = [entry for entry, _ in self._pending if not entry["immediate"]]
+        if self.policy is not None:
+            entries = self.policy.order(entries, list(self._running_jobs.values()), now=time.time())
+        
+        # Tarefas imediatas primeiro, em ordem de chegada
+        immediate = [entry for entry, _ in self._pending if entry["immediate"]]
+        return immediate + entries
+    
+    def queued_order(self):
+        """
+        Tarefas aguardando, na ordem em que serão despachadas
+        
+        A fila em memória é consultada antes da persistente (ver _next_job).
+        
+        Returns:
+            list: dicts com task_id, user_id, priority, expected_seconds, enqueued_at e seq
+        """
+        with self._pending_cond:
+            ordered = self._ordered_pending()
+        if self.job_queue is not None:
+            ordered = ordered + self.job_queue.queued_order()
+        return ordered
+    
+    def _pop_pending(self):
+        """Retira a próxima tarefa da fila em memória (chamado com _pending_cond); None se vazia"""
+        if not self._pending:
+            return None
+        chosen = self._ordered_pending()[0]
+        for i, (entry, job) in enumerate(self._pending):
+            if entry is chosen:
+                del self._pending[i]
+                self._running_jobs[job[0]] = entry
+                return job
+    
+    def cancel(self, job_id):
+        """
+        Retira uma tarefa da fila em memória antes que ela seja despachada
+        
+        Returns:
+            dict: Argumentos nomeados da tarefa removida, ou None se ela não estava aguardando
+        """
+        with self._pending_cond:
+            for i, (entry, job) in enumerate(self._pending):
+                if entry["task_id"] == job_id:
+                    del self._pending[i]
+                    return job[3]
+        return None
+    
+    def update_queue_info(self, job_id, **fields):
+        """
+        Altera dados usados pela política (ex.: expected_seconds) de uma tarefa da fila em memória
+        
+        Returns:
+            bool: Se a tarefa estava aguardando ou em execução neste escalonador
+        """
+        with self._pending_cond:
+            for entry, _ in self._pending:
+                if entry["task_id"] == job_id:
+                    entry.update(fields)
+                    return True
+            entry = self._running_jobs.get(job_id)
+            if entry is not None:
+                entry.update(fields)
+                return True
+        return False
+    
+    @property
+    def active_count(self):
+        """Número de tarefas ocupando um slot no momento"""
+        return self._active
+    
+    def _dispatch_loop(self):
+        """Despacha tarefas à medida que slots são liberados"""
+        while self._running:
+            # Bloqueia até haver um slot livre...
+            if not self._acquire_slot():
+                break
+            
+            # ...e até haver uma tarefa na fila
+            job = self._next_job()
+            if job is None:
+                self._slots.release()
+                break
+            job_id, fn, args, kwargs, admitted_at = job
+            
+            with self._metrics_lock:
+                self._active += 1
+                self._dispatched += 1
+            
+            try:
+                self.executor.submit(self._run, job_id, fn, args, kwargs, admitted_at)
+            except Exception as e:
+                error_logger.error(f"Erro ao despachar tarefa {job_id}: {str(e)}")
+                with self._pending_cond:
+                    self._running_jobs.pop(job_id, None)
+                self._release_slot()
+    
+    def _acquire_slot(self):
+        """Aguarda um slot livre; False se o escalonador for encerrado antes"""
+        while self._running:
+            if self._slots.acquire(timeout=self.STOP_CHECK_SECONDS):
+                if self._running:
+                    return True
+                self._slots.release()
+        return False
+    
+    def _next_job(self):
+        """Aguarda a próxima tarefa (memória ou fila persistente); None ao encerrar"""
+        if self.job_queue is None:
+            with self._pending_cond:
+                while self._running and not self._pending:
+                    self._pending_cond.wait()
+                return self._pop_pending() if self._running else None
+        
+        while self._running:
+            # Limpar antes de consultar: um notify() durante a consulta não se perde
+            self._wakeup.clear()
+            
+            with self._pending_cond:
+                job = self._pop_pending()
+            if job is not None:
+                return job
+            
+            claimed = self.job_queue.claim(self.worker_id)
+            if claimed:
+                self._leased.add(claimed["task_id"])
+                if claimed["attempts"] > 1:
+                    logger.info(f"Retomando tarefa {claimed['task_id']} (tentativa {claimed['attempts']})")
+                return (claimed["task_id"], self.runner, (claimed,), {}, time.perf_counter())
+            
+            self._wakeup.wait(Config.JOB_POLL_INTERVAL_SECONDS)
+        return None
+    
+    def _lease_loop(self):
+        """
+        Renova as concessões das tarefas em execução, recupera as expiradas e repassa cancelamentos
+        
+        Após stop(), continua até as tarefas em execução terminarem, para que
+        outro worker não as retome enquanto ainda rodam aqui.
+        """
+        interval = max(1.0, self.job_queue.lease_seconds / 3.0)
+        next_renewal = 0.0
+        while self._running or self._leased:
+            if time.monotonic() >= next_renewal:
+                next_renewal = time.monotonic() + interval
+                self.job_queue.renew(self.worker_id, set(self._leased))
+                
+                requeued, failed = self.job_queue.recover_expired()
+                if requeued:
+                    self._wakeup.set()
+                if (requeued or failed) and self.on_recover:
+                    try:
+                        self.on_recover(requeued, failed)
+                    except Exception as e:
+                        error_logger.error(f"Erro ao processar tarefas recuperadas: {str(e)}")
+            
+            # Cancelamentos pedidos por outros processos (ex.: DELETE no processo web)
+            if self._leased and self.on_cancel:
+                cancelled = self.job_queue.cancel_requests(self.worker_id)
+                if cancelled:
+                    try:
+                        self.on_cancel(cancelled)
+                    except Exception as e:
+                        error_logger.error(f"Erro ao cancelar tarefas: {str(e)}")
+            
+            time.sleep(min(interval, Config.CANCEL_POLL_SECONDS))
+    
+    def _run(self, job_id, fn, args, kwargs, admitted_at):
+        """Executa a tarefa e libera o slot ao terminar"""
+        dispatch_latency = time.perf_counter() - admitted_at
+        with self._metrics_lock:
+            self._dispatch_latencies.append(dispatch_latency)
+        
+        try:
+            # O callback roda na thread do worker para não atrasar o despacho
+            if self.on_dispatch:
+                self.on_dispatch(job_id)
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error_logger.error(f"Erro não tratado na tarefa {job_id}: {str(e)}")
+        finally:
+            if job_id in self._leased:
+                self.job_queue.ack(job_id, self.worker_id)
+                self._leased.discard(job_id)
+            with self._pending_cond:
+                self._running_jobs.pop(job_id, None)
+            self._release_slot()
+    
+    def _release_slot(self):
+        with self._metrics_lock:
+            self._active -= 1
+            self._completed += 1
+        self._slots.release()
+    
+    @staticmethod
+    def _summarize(samples):
+        """Resume uma lista de latências (segundos) em milissegundos"""
+        if not samples:
+            return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        
+        ordered = sorted(samples)
+        count = len(ordered)
+        return {
+            "count": count,
+            "avg_ms": round(sum(ordered) / count * 1000, 3),
+            "p50_ms": round(ordered[int(count * 0.50)] * 1000, 3),
+            "p95_ms": round(ordered[min(count - 1, int(count * 0.95))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3)
+        }
+    
+    def get_metrics(self):
+        """Retorna métricas de admissão e despacho do escalonador"""
+        with self._metrics_lock:
+            admission = list(self._admission_latencies)
+            dispatch = list(self._dispatch_latencies)
+            counters = {
+                "submitted": self._submitted,
+                "dispatched": self._dispatched,
+                "completed": self._completed,
+                "active": self._active
+            }
+        
+        metrics = {
+            "max_workers": self.max_workers,
+            "queued": self.qsize(),
+            **counters,
+            "admission_latency": self._summarize(admission),
+            "dispatch_latency": self._summarize(dispatch)
+        }
+        
+        if self.job_queue is not None:
+            metrics["worker_id"] = self.worker_id
+            metrics["persistent_queue"] = self.job_queue.get_stats()
+        
+        return metrics
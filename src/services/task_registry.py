@@ -0,0 +1,324 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from ..config.config import Config
+
+# Marca de campo ausente (diferente de None, que é um valor válido)
+_UNSET = object()
+
+FINISHED_STATUSES = ("completed", "error", "cancelled")
+
+class TaskRecord:
+    """
+    Estado em memória de uma tarefa.
+    
+    Os campos são fixos (__slots__): milhares de tarefas ocupam bem menos
+    memória que dicts, e um nome de campo errado falha em vez de criar uma
+    chave nova. Campos nunca atribuídos ficam fora de to_dict, como chaves
+    ausentes.
+    """
+    
+    __slots__ = (
+        "status", "progress", "step", "queue_status", "created_at", "updated_at",
+        "original_filename", "user_id", "priority", "source_type", "download_progress",
+        "time_estimate", "text", "detected_language", "error", "processing_duration",
+        "cache_hit", "text_hash", "export_results", "exports", "exports_saved", "vad"
+    )
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, _UNSET)
+        for name, value in fields.items():
+            setattr(self, name, value)
+    
+    def get(self, name, default=None):
+        value = getattr(self, name)
+        return default if value is _UNSET else value
+    
+    def to_dict(self):
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if getattr(self, name) is not _UNSET
+        }
+
+class TaskRegistry:
+    """
+    Registro thread-safe das tarefas em memória do TranscriptionManager.
+    
+    Todas as leituras e escritas passam pelo mesmo lock: threads de
+    transcrição, download, exportação e as requisições HTTP não veem mais
+    uma tarefa pela metade. Leituras retornam cópias (get) ou campos
+    isolados (field).
+    
+    Mantém incrementalmente:
+    
+    - contadores por status e de tarefas aguardando na fila, de modo que
+      /health e /queue_status não percorrem as tarefas
+    - o índice de posições na fila, na ordem real de despacho calculada
+      pelo TranscriptionManager (set_queue_order)
+    - a ordem de término das tarefas concluídas, para remover primeiro as
+      mais antigas quando o registro passa de Config.TASK_REGISTRY_MAX_TASKS
+      ou quando elas passam de Config.TASK_REGISTRY_TTL_SECONDS. Tarefas em
+      andamento nunca são removidas por tamanho; as removidas continuam no
+      banco e são relidas sob demanda.
+    """
+    
+    def __init__(self, max_tasks=None, ttl_seconds=None, on_evict=None):
+        """
+        Args:
+            max_tasks: Número máximo de tarefas em memória
+            ttl_seconds: Tempo que uma tarefa concluída permanece em memória
+            on_evict: Função chamada com o task_id de cada tarefa removida
+        """
+        self.max_tasks = max_tasks or Config.TASK_REGISTRY_MAX_TASKS
+        self.ttl_seconds = Config.TASK_REGISTRY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.on_evict = on_evict
+        
+        self._records = {}
+        # task_id -> timestamp de término, da mais antiga para a mais recente
+        self._finished = OrderedDict()
+        self._status_counts = Counter()
+        self._queued = 0
+        
+        # Ordem de despacho das tarefas aguardando (inclui as de outros processos)
+        self._queue_order = []
+        self._queue_index = {}
+        
+        self._evicted = 0
+        self._lock = threading.Lock()
+    
+    def __contains__(self, task_id):
+        return task_id in self._records
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def _count(self, record, delta):
+        if record.status is not _UNSET:
+            self._status_counts[record.status] += delta
+        if record.queue_status == "queued":
+            self._queued += delta
+    
+    def _set_locked(self, task_id, record, fields):
+        """Altera campos de uma tarefa mantendo contadores e ordem de término"""
+        self._count(record, -1)
+        try:
+            for name, value in fields.items():
+                setattr(record, name, value)
+        finally:
+            self._count(record, 1)
+        
+        if record.status in FINISHED_STATUSES:
+            if task_id not in self._finished:
+                self._finished[task_id] = time.time()
+        else:
+            self._finished.pop(task_id, None)
+    
+    def _remove_locked(self, task_id):
+        record = self._records.pop(task_id, None)
+        if record is not None:
+            self._count(record, -1)
+            self._finished.pop(task_id, None)
+        return record
+    
+    def _evict_locked(self, now):
+        """Remove as tarefas concluídas mais antigas acima do limite de tamanho ou de idade"""
+        evicted = []
+        while self._finished:
+            task_id, finished_at = next(iter(self._finished.items()))
+            if len(self._records) <= self.max_tasks and now - finished_at < self.ttl_seconds:
+                break
+            self._remove_locked(task_id)
+            evicted.append(task_id)
+        self._evicted += len(evicted)
+        return evicted
+    
+    def _notify_evicted(self, evicted):
+        if self.on_evict:
+            for task_id in evicted:
+                self.on_evict(task_id)
+    
+    def add(self, task_id, **fields):
+        """Registra uma nova tarefa (substituindo a anterior com o mesmo ID)"""
+        record = TaskRecord()
+        with self._lock:
+            self._remove_locked(task_id)
+            self._records[task_id] = record
+            self._set_locked(task_id, record, fields)
+            evicted = self._evict_locked(time.time())
+        self._notify_evicted(evicted)
+    
+    def update(self, task_id, **fields):
+        """
+        Altera campos de uma tarefa
+        
+        Returns:
+            bool: False se a tarefa não está em memória
+        """
+        with self._lock:
+            record = self._records.get(task_id)
+            if record is None:
+                return False
+            self._set_locked(task_id, record, fields)
+            return True
+    
+    def upsert(self, task_id, defaults=None, **fields):
+        """Altera campos de uma tarefa, criando-a com defaults se não estiver em memória"""
+        evicted = []
+        with self._lock:
+            record = self._records.get(task_id)
+            if record is None:
+                record = TaskRecord()
+                self._records[task_id] = record
+                fields = dict(defaults or {}, **fields)
+                evicted = self._evict_locked(time.time())
+            self._set_locked(task_id, record, fields)
+        self._notify_evicted(evicted)
+    
+    def unset(self, task_id, *names):
+        """Remove campos de uma tarefa (passam a ficar ausentes em get)"""
+        self.update(task_id, **{name: _UNSET for name in names})
+    
+    def remove(self, task_id):
+        with self._lock:
+            return self._remove_locked(task_id) is not None
+    
+    def get(self, task_id):
+        """
+        Retorna uma cópia do estado de uma tarefa, com a posição na fila
+        
+        Returns:
+            dict: Campos da tarefa, ou None se ela não está em memória
+        """
+        with self._lock:
+            record = self._records.get(task_id)
+            if record is None:
+                return None
+            task = record.to_dict()
+            position = self._position_locked(task_id, record)
+        if position:
+            task["queue_position"] = position
+        return task
+    
+    def field(self, task_id, name, default=None):
+        """Lê um único campo de uma tarefa (default se ausente ou fora da memória)"""
+        with self._lock:
+            record = self._records.get(task_id)
+            return default if record is None else record.get(name, default)
+    
+    def set_export_state(self, task_id, fmt, state):
+        """
+        Registra o estado de um formato de exportação
+        
+        Returns:
+            bool: True para a chamada que encerrou o último formato pendente
+                (as exportações devem então ser gravadas no banco)
+        """
+        with self._lock:
+            record = self._records.get(task_id)
+            if record is None:
+                return False
+            # Cópia: retratos já entregues por get não mudam
+            exports = dict(record.get("exports", {}))
+            exports[fmt] = state
+            record.exports = exports
+            
+            finished = all(s["status"] != "pending" for s in exports.values())
+            if not finished or record.get("exports_saved"):
+                return False
+            record.exports_saved = True
+            return True
+    
+    def _position_locked(self, task_id, record):
+        if record.queue_status != "queued":
+            return None
+        index = self._queue_index.get(task_id)
+        if index is None:
+            return None
+        return f"{index + 1}/{len(self._queue_order)}"
+    
+    def set_queue_order(self, task_ids, time_estimates=None):
+        """
+        Substitui o índice de posições pela ordem de despacho atual
+        
+        Args:
+            task_ids: Tarefas aguardando, na ordem de despacho
+            time_estimates: task_id -> segundos estimados até o término
+        
+        Returns:
+            list: Tarefas em memória cuja posição mudou
+        """
+        time_estimates = time_estimates or {}
+        with self._lock:
+            previous = {
+                task_id: self._position_locked(task_id, self._records[task_id])
+                for task_id in self._queue_order
+                if task_id in self._records
+            }
+            self._queue_order = list(task_ids)
+            self._queue_index = {task_id: i for i, task_id in enumerate(self._queue_order)}
+            
+            changed = []
+            for task_id in self._queue_order:
+                record = self._records.get(task_id)
+                if record is None:
+                    continue
+                if task_id in time_estimates:
+                    record.time_estimate = time_estimates[task_id]
+                if self._position_locked(task_id, record) != previous.get(task_id):
+                    changed.append(task_id)
+            return changed
+    
+    def queue_head(self):
+        """
+        Returns:
+            tuple: (tarefas aguardando, ID da próxima a ser despachada)
+        """
+        with self._lock:
+            return len(self._queue_order), (self._queue_order[0] if self._queue_order else None)
+    
+    def counts(self):
+        """Tarefas em memória por status e aguardando na fila (sem percorrer as tarefas)"""
+        with self._lock:
+            counts = {status: count for status, count in self._status_counts.items() if count}
+            counts["queued"] = self._queued
+            return counts
+    
+    def evict(self, max_age_seconds=None):
+        """
+        Remove tarefas antigas da memória
+        
+        Além do limite de tamanho e do TTL das concluídas, remove tarefas de
+        qualquer status sem atualização há mais de max_age_seconds (ex.:
+        interrompidas sem chegar a um status final).
+        
+        Returns:
+            list: IDs das tarefas removidas
+        """
+        now = time.time()
+        with self._lock:
+            evicted = self._evict_locked(now)
+            if max_age_seconds is not None:
+                cutoff = now - max_age_seconds
+                stale = [
+                    task_id for task_id, record in self._records.items()
+                    if record.get("updated_at", 0) < cutoff
+                ]
+                for task_id in stale:
+                    self._remove_locked(task_id)
+                self._evicted += len(stale)
+                evicted.extend(stale)
+        self._notify_evicted(evicted)
+        return evicted
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                "tasks": len(self._records),
+                "finished": len(self._finished),
+                "max_tasks": self.max_tasks,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted": self._evicted
+            }
@@ -1,19 +1,34 @@
-import whisper
 import os
 import time
+import heapq
 import threading
 import uuid
 import json
-import subprocess
-import queue
 from datetime import datetime, timedelta
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 
 from ..config.config import Config
 from ..utils.logger import logger, error_logger, transcription_logger, log_transcription_stats
-from ..database.models import get_session, Transcription, TranscriptionLog
-from ..utils.exporters import save_to_pdf, save_to_txt, save_to_srt, save_to_docx
+from ..database.models import init_db, get_session, Transcription, TranscriptionLog
+from ..database.job_queue import JobQueue
+from ..database.progress_writer import ProgressWriter
+from .progress_broker import ProgressBroker
+from ..utils.exporters import save_to_pdf, save_to_txt, save_to_srt, save_to_vtt, save_to_docx, compact_segments
+from ..utils.audio import decode_audio, probe_duration
+from ..utils.chunking import ParallelChunkTranscriber
+from ..utils.uploads import hash_file
+from ..utils.cancellation import CancelToken, TaskCancelled, activate
+from ..utils.vad import build_speech_map
+from ..utils.language_detection import EncoderReuse, detect_language
+from .scheduler import TranscriptionScheduler
+from .queue_policy import QueuePolicy
+from .eta_estimator import EtaEstimator
+from .task_registry import TaskRegistry, FINISHED_STATUSES
+from .model_pool import model_pool
+from .result_cache import ResultCache
+from .render_cache import render_cache, text_hash
+from .youtube_service import YouTubeService
 
 class TranscriptionManager:
     """
@@ -21,95 +36,321 @@ class TranscriptionManager:
     e gerenciamento de fila
     """
     
-    def __init__(self):
-        # Dicionário para armazenar o estado das tarefas em andamento
-        self.tasks = {}
+    def __init__(self, run_workers=True):
+        """
+        Args:
+            run_workers: Se este processo executa as transcrições. Com False
+                (processo web com src.worker separado), as tarefas apenas são
+                gravadas na fila persistente e o progresso é lido do banco.
+        """
+        # Canal de eventos de progresso para as conexões SSE
+        self.progress_broker = ProgressBroker()
+        
+        # Estado das tarefas em memória (thread-safe, limitado em tamanho e idade)
+        self.tasks = TaskRegistry(on_evict=self._on_task_evicted)
         
-        # Fila de tarefas pendentes
-        self.task_queue = queue.Queue()
+        # Sinais de cancelamento das tarefas baixando ou em execução neste processo
+        self._cancel_tokens = {}
+        self._cancel_lock = threading.Lock()
+        
+        # Ordem de despacho: prioridade + fair share por usuário ou menor tarefa primeiro
+        try:
+            self.queue_policy = QueuePolicy()
+        except ValueError as e:
+            error_logger.error(f"Erro na configuração da fila, usando ordem de chegada: {str(e)}")
+            self.queue_policy = QueuePolicy("fifo")
+        
+        # Fila persistente no SQLite: tarefas enfileiradas sobrevivem a reinícios
+        # e podem ser consumidas por vários processos
+        self.job_queue = None
+        if Config.PERSISTENT_QUEUE:
+            try:
+                init_db()
+                self.job_queue = JobQueue(policy=self.queue_policy)
+                self.job_queue.fail_orphaned()
+            except Exception as e:
+                error_logger.error(f"Erro ao iniciar fila persistente, usando fila em memória: {str(e)}")
+                self.job_queue = None
+        
+        # Sem fila persistente não há como entregar tarefas a outro processo
+        if not run_workers and self.job_queue is None:
+            error_logger.error("Fila persistente indisponível: transcrições serão executadas neste processo")
+            run_workers = True
+        self.run_workers = run_workers
+        
+        # Escalonador orientado a eventos (slots de worker + fila bloqueante)
+        self.scheduler = TranscriptionScheduler(
+            max_workers=Config.MAX_CONCURRENT_TRANSCRIPTIONS,
+            on_dispatch=self._on_task_dispatch,
+            job_queue=self.job_queue,
+            runner=self._run_job,
+            on_recover=self._on_jobs_recovered,
+            policy=self.queue_policy,
+            on_cancel=self._on_cancel_requested
+        )
         
         # Thread pool para executar transcrições simultaneamente
-        self.executor = ThreadPoolExecutor(max_workers=Config.MAX_CONCURRENT_TRANSCRIPTIONS)
+        self.executor = self.scheduler.executor
+        
+        # Executor separado para pré-renderizar exportações (Config.EAGER_EXPORTS),
+        # para que o slot de transcrição seja liberado assim que o texto existir
+        self.export_executor = ThreadPoolExecutor(
+            max_workers=Config.MAX_CONCURRENT_EXPORTS,
+            thread_name_prefix="export"
+        )
+        
+        # Pool de I/O para baixar mídias de URLs (YouTube), separado dos slots
+        # de transcrição limitados por CPU
+        self.download_executor = ThreadPoolExecutor(
+            max_workers=Config.MAX_CONCURRENT_DOWNLOADS,
+            thread_name_prefix="download"
+        )
         
-        # Flag para controlar o processamento contínuo da fila
-        self.is_queue_processing = False
+        # Pool de processos para transcrição paralela de áudios longos
+        self.chunk_transcriber = ParallelChunkTranscriber()
         
-        # Cache para modelos carregados
-        self.models = {}
+        # Gravador assíncrono de progresso no banco
+        self.progress_writer = ProgressWriter()
+        self.progress_writer.start()
         
-        # Iniciar o processamento da fila
-        self.start_queue_processing()
+        # Cache de resultados indexado pelo hash do arquivo de entrada
+        self.result_cache = ResultCache()
+        
+        # Estimativas de tempo calibradas pelas transcrições concluídas
+        self.eta_estimator = EtaEstimator()
+        
+        # Iniciar o processamento da fila (ou, sem workers locais, o
+        # acompanhamento do progresso gravado pelos processos src.worker)
+        if self.run_workers:
+            self.start_queue_processing()
+        else:
+            threading.Thread(target=self._watch_remote_progress, daemon=True).start()
+        if self.job_queue is not None:
+            threading.Thread(target=self._refresh_queue_positions, daemon=True).start()
         
         # Diretórios
         self.upload_dir = Config.get_upload_dir()
         self.pdf_dir = Config.get_pdf_dir()
         
-        logger.info(f"TranscriptionManager inicializado com {Config.MAX_CONCURRENT_TRANSCRIPTIONS} workers")
+        if self.run_workers:
+            logger.info(f"TranscriptionManager inicializado com {Config.MAX_CONCURRENT_TRANSCRIPTIONS} workers")
+        else:
+            logger.info("TranscriptionManager inicializado sem workers locais (tarefas executadas por src.worker)")
     
     def start_queue_processing(self):
         """Inicia o processamento da fila em segundo plano"""
-        if not self.is_queue_processing:
-            self.is_queue_processing = True
-            threading.Thread(target=self._process_queue, daemon=True).start()
-            logger.info("Iniciado processamento da fila em segundo plano")
-    
-    def _process_queue(self):
-        """Processa continuamente a fila de transcrições"""
-        while self.is_queue_processing:
-            # Verificar quantas tarefas estão sendo processadas atualmente
-            active_tasks = sum(1 for task in self.tasks.values() 
-                              if task.get("status") == "processing" and not task.get("queue_status"))
-            
-            # Se há espaço para mais tarefas, pegar da fila
-            if active_tasks < Config.MAX_CONCURRENT_TRANSCRIPTIONS:
-                try:
-                    # Tentar pegar próxima tarefa da fila (sem bloquear)
-                    task_info = self.task_queue.get_nowait()
-                    task_id = task_info["task_id"]
-                    
-                    # Atualizar status da tarefa
-                    if task_id in self.tasks:
-                        self.tasks[task_id]["queue_status"] = "processing"
-                        self.update_task_progress(task_id, 5, "Iniciando processamento")
-                        
-                        # Atualizar posição na fila para outras tarefas
-                        self._update_queue_positions()
-                        
-                        # Iniciar processamento em um executor
-                        self.executor.submit(
-                            self._transcribe_task,
-                            task_id=task_id,
-                            file_path=task_info["input_path"],
-                            model_name=task_info["model_name"],
-                            is_video=task_info["is_video"],
-                            language_mode=task_info["language_mode"],
-                            language=task_info["language"],
-                            audio_path=task_info["audio_path"],
-                            original_filename=task_info["original_filename"],
-                            export_formats=task_info.get("export_formats", ["pdf"]),
-                            source_type=task_info.get("source_type", "upload")
-                        )
-                        
-                        # Log
-                        logger.info(f"Iniciando processamento da tarefa {task_id} da fila")
-                        
-                except queue.Empty:
-                    # Nada na fila, esperar
-                    pass
+        self.scheduler.start()
+    
+    def shutdown(self, wait=True):
+        """
+        Encerra o processamento da fila
+        
+        Args:
+            wait: Aguardar as transcrições em andamento; com False, elas
+                terminam em segundo plano neste processo
+        """
+        self.scheduler.stop(wait=wait)
+        self.download_executor.shutdown(wait=wait)
+        self.export_executor.shutdown(wait=wait)
+        self.progress_writer.stop()
+        logger.info("TranscriptionManager encerrado")
+    
+    def _on_task_dispatch(self, task_id):
+        """Chamado pelo escalonador quando uma tarefa da fila ocupa um slot"""
+        # Tarefas da fila persistente podem ter sido criadas por outro processo
+        if task_id not in self.tasks:
+            self.get_task_status(task_id)
+        
+        if self.tasks.update(task_id, queue_status="processing"):
+            self.update_task_progress(task_id, 5, "Iniciando processamento")
+            
+            # Atualizar posição na fila para outras tarefas
+            self._update_queue_positions()
             
-            # Dormir antes de verificar novamente
-            time.sleep(0.5)
+            logger.info(f"Iniciando processamento da tarefa {task_id} da fila")
     
-    def _update_queue_positions(self):
-        """Atualiza a posição na fila para todas as tarefas em espera"""
-        queued_tasks = [t_id for t_id, t in self.tasks.items() 
-                        if t.get("queue_status") == "queued"]
+    def _run_job(self, job):
+        """Executa uma tarefa reservada da fila persistente"""
+        self._transcribe_task(task_id=job["task_id"], **job["payload"])
+    
+    def _on_jobs_recovered(self, requeued, failed):
+        """Atualiza o estado em memória de tarefas cuja concessão expirou"""
+        for task_id in requeued:
+            self.tasks.update(task_id, status="pending", queue_status="queued",
+                              step="Reenfileirada após interrupção do worker")
+        
+        for task_id in failed:
+            if self.tasks.update(task_id, status="error",
+                                 error="O processamento foi interrompido repetidamente"):
+                self._publish_progress(task_id)
+        
+        self._update_queue_positions()
+    
+    def _on_task_evicted(self, task_id):
+        """Libera o que ainda estiver associado a uma tarefa removida da memória"""
+        self.progress_broker.discard(task_id)
+        self._discard_cancel_token(task_id)
+    
+    def _cancel_token(self, task_id):
+        """Retorna (ou cria) o sinal de cancelamento de uma tarefa deste processo"""
+        with self._cancel_lock:
+            token = self._cancel_tokens.get(task_id)
+            if token is None:
+                token = self._cancel_tokens[task_id] = CancelToken()
+            return token
+    
+    def _discard_cancel_token(self, task_id):
+        with self._cancel_lock:
+            token = self._cancel_tokens.pop(task_id, None)
+        if token is not None:
+            token.close()
+    
+    def _on_cancel_requested(self, task_ids):
+        """Interrompe tarefas deste worker cujo cancelamento foi pedido por outro processo"""
+        for task_id in task_ids:
+            with self._cancel_lock:
+                token = self._cancel_tokens.get(task_id)
+            if token is not None and token.cancel():
+                logger.info(f"Cancelamento da tarefa {task_id} recebido pela fila persistente")
+    
+    def cancel_task(self, task_id):
+        """
+        Cancela uma tarefa aguardando na fila, baixando ou em execução
+        
+        Tarefas na fila são removidas na hora. Tarefas em execução são
+        interrompidas no próximo ponto de verificação (entre etapas, janelas
+        do Whisper ou trechos paralelos), com o ffmpeg encerrado
+        imediatamente; o slot é liberado assim que a tarefa para. Tarefas em
+        execução em outro processo (src.worker) são avisadas pela fila
+        persistente.
+        
+        Returns:
+            str: "cancelled" (removida da fila), "cancelling" (será
+                interrompida), "finished" (já finalizada) ou None se não existir
+        """
+        task = self.get_task_status(task_id)
+        if task is None:
+            return None
+        if task.get("status") in FINISHED_STATUSES:
+            return "finished"
+        
+        # Ainda na fila (em memória ou persistente): basta retirá-la
+        job = self.scheduler.cancel(task_id)
+        if job is None and self.job_queue is not None:
+            job = self.job_queue.remove_queued(task_id)
+        if job is not None:
+            try:
+                if job.get("file_path") and os.path.exists(job["file_path"]):
+                    os.remove(job["file_path"])
+            except Exception as e:
+                error_logger.error(f"Erro ao remover arquivos temporários: {str(e)}")
+            self._finish_cancelled(task_id, CancelToken.CANCELLED)
+            self._update_queue_positions()
+            return "cancelled"
+        
+        # Baixando ou em execução neste processo
+        with self._cancel_lock:
+            token = self._cancel_tokens.get(task_id)
+        if token is not None:
+            token.cancel()
+            return "cancelling"
+        
+        # Em execução em outro processo
+        if self.job_queue is not None and self.job_queue.request_cancel(task_id):
+            return "cancelling"
+        
+        if self.run_workers:
+            # Despachada mas ainda não iniciada: o token já nasce cancelado
+            self._cancel_token(task_id).cancel()
+            return "cancelling"
         
-        for i, task_id in enumerate(queued_tasks):
-            self.tasks[task_id]["queue_position"] = f"{i + 1}/{len(queued_tasks)}"
+        # Sem fila nem worker executando a tarefa
+        self._finish_cancelled(task_id, CancelToken.CANCELLED)
+        return "cancelled"
+    
+    def _finish_cancelled(self, task_id, reason):
+        """Registra o fim de uma tarefa cancelada ou interrompida pelo tempo limite"""
+        if reason == CancelToken.TIMEOUT:
+            transcription_logger.error(f"Tempo limite excedido na tarefa {task_id}")
+            self.update_task_result(task_id, error="Tempo limite excedido")
+        else:
+            transcription_logger.info(f"Transcrição cancelada: {task_id}")
+            self.update_task_result(task_id, error="Transcrição cancelada", cancelled=True)
+    
+    def _queue_etas(self, queued_tasks):
+        """
+        Estima quando cada tarefa da fila começa e termina
+        
+        Simula o despacho na ordem da fila: cada slot fica livre quando a
+        transcrição atual termina (tempo restante gravado no banco) e a
+        próxima tarefa ocupa o primeiro slot livre pelo seu tempo estimado.
+        
+        Returns:
+            dict: task_id -> (segundos até começar, segundos até terminar)
+        """
+        remaining = []
+        try:
+            now = datetime.utcnow()
+            db_session = get_session()
+            running = db_session.query(Transcription.time_estimate, Transcription.updated_at).filter(
+                Transcription.status == "processing"
+            ).all()
+            db_session.close()
+            
+            for time_estimate, updated_at in running:
+                elapsed = (now - updated_at).total_seconds() if updated_at else 0
+                remaining.append(max(0.0, (time_estimate or 0) - elapsed))
+        except Exception as e:
+            error_logger.error(f"Erro ao consultar transcrições em andamento: {str(e)}")
+        
+        # Vários processos src.worker podem ter mais slots que este processo
+        free_at = remaining + [0.0] * max(0, self.scheduler.max_workers - len(remaining))
+        heapq.heapify(free_at)
+        
+        etas = {}
+        for job in queued_tasks:
+            start = heapq.heappop(free_at)
+            expected = job.get("expected_seconds")
+            if expected is None:
+                expected = self.eta_estimator.predict_seconds(None, None)
+            etas[job["task_id"]] = (start, start + expected)
+            heapq.heappush(free_at, start + expected)
+        return etas
+    
+    def _update_queue_positions(self, publish=True):
+        """Atualiza a posição e a estimativa das tarefas em espera, na ordem real de despacho"""
+        ordered = self.scheduler.queued_order()
+        etas = self._queue_etas(ordered) if ordered else {}
+        
+        changed = self.tasks.set_queue_order(
+            [job["task_id"] for job in ordered],
+            {task_id: int(finish) for task_id, (_, finish) in etas.items()}
+        )
+        if publish:
+            for task_id in changed:
+                self._publish_progress(task_id)
+    
+    def _refresh_queue_positions(self):
+        """
+        Recalcula as posições na fila quando ela anda em outros processos
+        
+        Tarefas da fila persistente são enfileiradas e reservadas por qualquer
+        processo, sem evento neste; enquanto houver tarefas aguardando aqui,
+        as posições são recalculadas a cada Config.QUEUE_STATUS_REFRESH_SECONDS,
+        e não a cada consulta de status.
+        """
+        while True:
+            time.sleep(Config.QUEUE_STATUS_REFRESH_SECONDS)
+            if not self.tasks.counts()["queued"]:
+                continue
+            try:
+                self._update_queue_positions()
+            except Exception as e:
+                error_logger.error(f"Erro ao atualizar as posições da fila: {str(e)}")
     
     def add_task(self, file_path, original_filename, model_name, is_video, language_mode="auto", 
-                language=None, user_id=None, queue_mode=True, export_formats=None, source_type=None):
+                language=None, user_id=None, queue_mode=True, export_formats=None, source_type=None,
+                parallel_chunks=False, content_hash=None, priority=None, vad=None):
         """
         Adiciona uma nova tarefa de transcrição
         
@@ -122,44 +363,201 @@ class TranscriptionManager:
             language: Código do idioma se language_mode='specify'
             user_id: ID do usuário (opcional)
             queue_mode: Se a tarefa deve ser enfileirada ou processada imediatamente
-            export_formats: Lista de formatos para exportação (pdf, txt, srt, docx)
+            export_formats: Lista de formatos para exportação (pdf, txt, srt, vtt, docx)
             source_type: Tipo de origem do arquivo (upload, youtube, etc.)
-            
+            parallel_chunks: Se áudios longos devem ser transcritos em trechos paralelos
+            content_hash: SHA-256 do arquivo (calculado aqui se não informado)
+            priority: Classe de prioridade na fila (Config.PRIORITY_CLASSES)
+            vad: Se só os trechos com fala devem ser transcritos (padrão: Config.VAD_ENABLED)
+        
         Returns:
             task_id: ID da tarefa criada
         """
         # Gera um ID único para a tarefa
         task_id = str(uuid.uuid4())
+        export_formats = self._normalize_export_formats(export_formats)
         
+        # Sem workers locais, toda tarefa passa pela fila persistente
+        queue_mode = queue_mode or not self.run_workers
+        
+        # Inicializa o estado da tarefa; mesmo sem fila, ela só passa a
+        # "processing" quando ocupa um slot (_on_task_dispatch)
+        self.tasks.add(
+            task_id,
+            status="pending",
+            progress=0,
+            step="Inicializando",
+            created_at=datetime.now().timestamp(),
+            updated_at=datetime.now().timestamp(),
+            original_filename=original_filename,
+            user_id=user_id,
+            priority=priority or Config.DEFAULT_PRIORITY,
+            source_type=source_type or "upload"  # Indica a origem do arquivo
+        )
+        
+        self._create_task_record(
+            task_id, original_filename, model_name, is_video, language, user_id,
+            status="pending",
+            step="Adicionado à fila" if queue_mode else "Iniciando processamento",
+            source_type=source_type
+        )
+        
+        self._schedule_task(
+            task_id, file_path, original_filename, model_name, is_video, language_mode, language,
+            queue_mode, export_formats, source_type, parallel_chunks, content_hash,
+            priority=priority, vad=vad
+        )
+        
+        return task_id
+    
+    def add_url_task(self, url, model_name, language_mode="auto", language=None, user_id=None,
+                     queue_mode=True, export_formats=None, priority=None):
+        """
+        Adiciona uma tarefa de transcrição a partir de uma URL do YouTube
+        
+        Retorna imediatamente; o download é feito no pool de downloads (limitado
+        por Config.MAX_CONCURRENT_DOWNLOADS, separado dos slots de transcrição)
+        e, ao terminar, a tarefa segue o mesmo caminho de add_task.
+        
+        Args:
+            url: URL do vídeo do YouTube
+            model_name: Nome do modelo whisper a ser usado
+            language_mode: 'auto' para detectar idioma ou 'specify' para usar language
+            language: Código do idioma se language_mode='specify'
+            user_id: ID do usuário (opcional)
+            queue_mode: Se a tarefa deve ser enfileirada ou processada imediatamente
+            export_formats: Lista de formatos para exportação (pdf, txt, srt, vtt, docx)
+            priority: Classe de prioridade na fila (Config.PRIORITY_CLASSES)
+        
+        Returns:
+            task_id: ID da tarefa criada
+        """
+        task_id = str(uuid.uuid4())
+        export_formats = self._normalize_export_formats(export_formats)
+        
+        # O título do vídeo só é conhecido após o download
+        self.tasks.add(
+            task_id,
+            status="downloading",
+            progress=0,
+            download_progress=0,
+            step="Aguardando download do YouTube",
+            created_at=datetime.now().timestamp(),
+            updated_at=datetime.now().timestamp(),
+            original_filename=url,
+            user_id=user_id,
+            priority=priority or Config.DEFAULT_PRIORITY,
+            source_type="youtube"
+        )
+        
+        self._create_task_record(
+            task_id, url, model_name, False, language, user_id,
+            status="downloading", step="Aguardando download", source_type="youtube"
+        )
+        
+        self.download_executor.submit(
+            self._download_task,
+            task_id=task_id,
+            url=url,
+            model_name=model_name,
+            language_mode=language_mode,
+            language=language,
+            queue_mode=queue_mode,
+            export_formats=export_formats,
+            priority=priority
+        )
+        
+        logger.info(f"Download do YouTube agendado para a tarefa {task_id}: {url}")
+        return task_id
+    
+    def _download_task(self, task_id, url, model_name, language_mode, language, queue_mode,
+                       export_formats, priority=None):
+        """Baixa o áudio de uma URL (executado no pool de downloads) e agenda a transcrição"""
+        last_percent = [-1]
+        cancel_token = self._cancel_token(task_id)
+        
+        def on_progress(percent):
+            # Exceção no hook interrompe o download no yt-dlp
+            if cancel_token.cancelled:
+                raise RuntimeError("Download cancelado")
+            
+            # Os hooks do yt-dlp disparam a cada bloco recebido; publicar só a cada 1%
+            percent = int(percent)
+            if percent == last_percent[0]:
+                return
+            last_percent[0] = percent
+            self.tasks.update(task_id, download_progress=percent)
+            self.update_task_progress(task_id, 0, f"Baixando áudio do YouTube ({percent}%)",
+                                      status="downloading")
+        
+        self.update_task_progress(task_id, 0, "Baixando áudio do YouTube", status="downloading")
+        
+        try:
+            file_path, original_filename, duration = YouTubeService.download_audio(
+                url, progress_callback=on_progress
+            )
+        except Exception as e:
+            error_logger.error(f"Erro ao baixar áudio do YouTube: {str(e)}")
+            file_path, original_filename, duration = None, None, None
+        
+        if cancel_token.cancelled:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+            self._finish_cancelled(task_id, cancel_token.reason)
+            return
+        
+        if not file_path or not os.path.exists(file_path):
+            self.update_task_result(task_id, error="Falha ao baixar o áudio do vídeo do YouTube.")
+            return
+        
+        if os.path.getsize(file_path) == 0:
+            os.remove(file_path)
+            self.update_task_result(task_id, error="O arquivo de áudio baixado está vazio.")
+            return
+        
+        # Registrar o título e a duração informados pelo yt-dlp
+        self.tasks.update(task_id, original_filename=original_filename, download_progress=100)
+        try:
+            db_session = get_session()
+            db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
+            if db_task:
+                db_task.original_filename = original_filename
+                if duration:
+                    db_task.audio_duration = duration
+                db_session.commit()
+            db_session.close()
+        except Exception as e:
+            error_logger.error(f"Erro ao atualizar nome do arquivo no banco: {str(e)}")
+        
+        self.update_task_progress(task_id, 0, "Download concluído", status="pending")
+        
+        try:
+            self._schedule_task(
+                task_id, file_path, original_filename, model_name, False, language_mode, language,
+                queue_mode, export_formats, "youtube", priority=priority, audio_duration=duration
+            )
+        except Exception as e:
+            error_logger.error(f"Erro ao adicionar tarefa para YouTube: {str(e)}")
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            self.update_task_result(task_id, error=f"Erro ao iniciar transcrição: {str(e)}")
+    
+    def _normalize_export_formats(self, export_formats):
+        """Filtra os formatos de exportação suportados (PDF se nenhum for válido)"""
         # Define formatos de exportação
         if export_formats is None:
             export_formats = ["pdf"]
-            
+        
         # Se o formato não for suportado, usar PDF como fallback
         export_formats = [fmt for fmt in export_formats if fmt in Config.EXPORT_FORMATS]
         if not export_formats:
             export_formats = ["pdf"]
         
-        # Inicializa o estado da tarefa
-        self.tasks[task_id] = {
-            "status": "processing" if not queue_mode else "pending",
-            "progress": 0,
-            "step": "Inicializando",
-            "created_at": datetime.now().timestamp(),
-            "updated_at": datetime.now().timestamp(),
-            "original_filename": original_filename,
-            "user_id": user_id,
-            "source_type": source_type or "upload"  # Indica a origem do arquivo
-        }
-        
-        # Se for vídeo, precisamos extrair o áudio
-        audio_path = None
-        if is_video:
-            # Gera um nome único para o arquivo de áudio extraído
-            audio_filename = str(uuid.uuid4()) + ".wav"
-            audio_path = os.path.join(self.upload_dir, audio_filename)
-        
-        # Criar registro no banco de dados
+        return export_formats
+    
+    def _create_task_record(self, task_id, original_filename, model_name, is_video, language,
+                            user_id, status, step, source_type=None):
+        """Cria o registro da transcrição e o primeiro log no banco de dados"""
         try:
             db_session = get_session()
             db_transcription = Transcription(
@@ -169,8 +567,9 @@ class TranscriptionManager:
                 file_type="video" if is_video else "audio",
                 model_used=model_name,
                 language=language,
-                status="pending" if queue_mode else "processing",
-                started_at=None if queue_mode else datetime.utcnow(),
+                status=status,
+                step=step,
+                started_at=datetime.utcnow() if status == "processing" else None,
                 source_type=source_type or "upload"  # Adiciona a fonte à tabela
             )
             db_session.add(db_transcription)
@@ -179,9 +578,9 @@ class TranscriptionManager:
             # Adicionar primeiro registro de log
             db_log = TranscriptionLog(
                 transcription_id=db_transcription.id,
-                status="pending" if queue_mode else "processing",
+                status=status,
                 progress=0,
-                step="Adicionado à fila" if queue_mode else "Iniciando processamento",
+                step=step,
                 message=f"Tarefa criada para o arquivo {original_filename}"
             )
             db_session.add(db_log)
@@ -189,87 +588,170 @@ class TranscriptionManager:
             db_session.close()
         except Exception as e:
             error_logger.error(f"Erro ao criar registro de transcrição: {str(e)}")
+    
+    def _schedule_task(self, task_id, file_path, original_filename, model_name, is_video,
+                       language_mode, language, queue_mode, export_formats, source_type=None,
+                       parallel_chunks=False, content_hash=None, priority=None, audio_duration=None,
+                       vad=None):
+        """Reaproveita um resultado em cache ou envia a tarefa à fila / a um slot de transcrição"""
+        vad = Config.VAD_ENABLED if vad is None else vad
+        
+        # Arquivos idênticos com a mesma configuração reutilizam o resultado salvo
+        if content_hash is None:
+            try:
+                content_hash = hash_file(file_path)
+            except Exception as e:
+                error_logger.error(f"Erro ao calcular hash do arquivo: {str(e)}")
+        
+        cache_key = None
+        if content_hash:
+            cache_key = ResultCache.make_key(content_hash, model_name, language_mode, language, vad=vad)
+            cached = self.result_cache.get(cache_key)
+            if cached:
+                self._complete_from_cache(task_id, cached, file_path, original_filename, export_formats)
+                return
+        
+        job = {
+            "file_path": file_path,
+            "model_name": model_name,
+            "is_video": is_video,
+            "language_mode": language_mode,
+            "language": language,
+            "original_filename": original_filename,
+            "export_formats": export_formats,
+            "source_type": source_type or "upload",
+            "parallel_chunks": parallel_chunks,
+            "vad": vad,
+            "cache_key": cache_key
+        }
         
         # Se estiver no modo fila, adiciona à fila de transcrição
-        if queue_mode:
-            self.tasks[task_id]["queue_status"] = "queued"
-            self.tasks[task_id]["step"] = "Adicionado à fila de transcrição"
-            
-            # Adicionar à fila
-            self.task_queue.put({
-                "task_id": task_id,
-                "input_path": file_path,
-                "model_name": model_name,
-                "is_video": is_video,
-                "language_mode": language_mode,
-                "language": language,
-                "audio_path": audio_path,
-                "original_filename": original_filename,
-                "export_formats": export_formats,
-                "source_type": source_type or "upload"
-            })
+        if queue_mode or not self.run_workers:
+            self.tasks.update(task_id, queue_status="queued", step="Adicionado à fila de transcrição")
+            
+            # Custo estimado para a política de despacho (fair share / SJF); sem a
+            # duração, vale Config.QUEUE_DEFAULT_AUDIO_SECONDS até a medição abaixo
+            queue_info = self._queue_info(task_id, model_name, priority, audio_duration)
+            
+            # Adicionar à fila (persistente, se disponível)
+            persisted = False
+            if self.job_queue is not None:
+                try:
+                    self.job_queue.enqueue(task_id, job, **queue_info)
+                    self.scheduler.notify()
+                    persisted = True
+                except Exception as e:
+                    error_logger.error(f"Erro ao gravar tarefa na fila persistente, usando fila em memória: {str(e)}")
+            
+            if not persisted:
+                if not self.run_workers:
+                    self.update_task_result(task_id, error="Não foi possível enfileirar a transcrição")
+                    return
+                self.scheduler.submit(task_id, self._transcribe_task, task_id=task_id,
+                                      queue_info=queue_info, **job)
             
             # Atualizar posições na fila
             self._update_queue_positions()
             
-            logger.info(f"Arquivo '{original_filename}' adicionado à fila. Total na fila: {self.task_queue.qsize()}")
-            
+            logger.info(f"Arquivo '{original_filename}' adicionado à fila. Total na fila: {self.scheduler.qsize()}")
+        
         else:
-            # Iniciar processamento imediatamente
-            self.executor.submit(
-                self._transcribe_task,
-                task_id=task_id,
-                file_path=file_path,
-                model_name=model_name,
-                is_video=is_video,
-                language_mode=language_mode,
-                language=language,
-                audio_path=audio_path,
-                original_filename=original_filename,
-                export_formats=export_formats,
-                source_type=source_type or "upload"
-            )
+            # Processamento imediato: passa à frente da fila, mas ocupa um slot
+            # como as demais (com todos ocupados, começa no próximo que liberar)
+            queue_info = self._queue_info(task_id, model_name, priority, audio_duration)
+            self.scheduler.submit(task_id, self._transcribe_task, task_id=task_id,
+                                  queue_info=queue_info, immediate=True, **job)
+            self._update_queue_positions()
         
-        return task_id
+        # Medir a duração (ffprobe) no pool de I/O, fora da requisição HTTP
+        if audio_duration is None and self.queue_policy.policy != "fifo":
+            self.download_executor.submit(self._refine_queue_estimate, task_id, file_path, model_name)
     
-    def get_task_status(self, task_id):
-        """Retorna o status atual de uma tarefa"""
-        if task_id not in self.tasks:
+    def _refine_queue_estimate(self, task_id, file_path, model_name):
+        """Atualiza o custo estimado de uma tarefa na fila com a duração medida do arquivo"""
+        try:
+            duration = probe_duration(file_path)
+            if duration is None:
+                return
+            
+            expected_seconds = self.eta_estimator.predict_seconds(model_name, duration)
+            updated = self.scheduler.update_queue_info(task_id, expected_seconds=expected_seconds)
+            if not updated and self.job_queue is not None:
+                updated = self.job_queue.update_expected_seconds(task_id, expected_seconds)
+            
+            if updated:
+                self._update_queue_positions()
+        except Exception as e:
+            error_logger.error(f"Erro ao estimar a duração da tarefa {task_id}: {str(e)}")
+    
+    def _queue_info(self, task_id, model_name, priority, audio_duration=None):
+        """Usuário, prioridade e custo estimado da tarefa, usados pela política de despacho"""
+        return {
+            "user_id": self.tasks.field(task_id, "user_id"),
+            "priority": QueuePolicy.priority_value(priority),
+            "expected_seconds": self.eta_estimator.predict_seconds(model_name, audio_duration)
+        }
+    
+    def _complete_from_cache(self, task_id, cached, file_path, original_filename, export_formats):
+        """Conclui uma tarefa usando um resultado do cache, sem executar o Whisper"""
+        start_time = time.time()
+        
+        self.tasks.update(task_id, cache_hit=True)
+        self.update_task_progress(task_id, 95, "Resultado reaproveitado do cache")
+        self.update_task_result(
+            task_id,
+            text=cached.get("text"),
+            detected_language=cached.get("detected_language"),
+            segments=cached.get("segments"),
+            original_filename=original_filename,
+            export_formats=export_formats,
+            processing_duration=time.time() - start_time,
+            audio_duration=cached.get("audio_duration")
+        )
+        self.tasks.update(task_id, progress=100, step="Transcrição finalizada")
+        self._publish_progress(task_id)
+        
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            error_logger.error(f"Erro ao remover arquivos temporários: {str(e)}")
+        
+        logger.info(f"Resultado em cache reutilizado para '{original_filename}' (tarefa {task_id})")
+    
+    def get_task_status(self, task_id, refresh=True):
+        """
+        Retorna o status atual de uma tarefa
+        
+        Args:
+            task_id: ID da tarefa
+            refresh: Reler do banco tarefas executadas por outro processo (src.worker)
+        """
+        if task_id not in self.tasks or (refresh and self._is_remote(task_id)):
             # Tentar recuperar do banco de dados
             try:
                 db_session = get_session()
                 db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
                 
                 if db_task:
-                    # Reconstruir estado da tarefa da versão em banco
-                    self.tasks[task_id] = {
-                        "status": db_task.status,
-                        "progress": 100 if db_task.status == "completed" else 0,
-                        "step": "Transcrição finalizada" if db_task.status == "completed" else "Status desconhecido",
-                        "created_at": db_task.created_at.timestamp(),
-                        "updated_at": db_task.updated_at.timestamp(),
-                        "original_filename": db_task.original_filename
-                    }
-                    
-                    if db_task.status == "completed":
-                        self.tasks[task_id]["text"] = db_task.text_content
-                        if db_task.detected_language:
-                            self.tasks[task_id]["detected_language"] = db_task.detected_language
-                    elif db_task.status == "error":
-                        self.tasks[task_id]["error"] = db_task.error_message
+                    self._apply_db_state(task_id, db_task)
                 
                 db_session.close()
             except Exception as e:
                 error_logger.error(f"Erro ao recuperar status da tarefa {task_id} do banco: {str(e)}")
                 return None
         
-        if task_id in self.tasks:
-            # Verificar timeout
+        task = self.tasks.get(task_id)
+        if task is not None:
+            # Verificar timeout de tarefas sem atualização que não estão em
+            # execução neste processo (aqui o tempo limite interrompe a tarefa)
             now = datetime.now().timestamp()
-            if (now - self.tasks[task_id]["updated_at"] > Config.TASK_TIMEOUT_SECONDS and 
-                self.tasks[task_id]["status"] == "processing"):
-                self.tasks[task_id]["status"] = "error"
-                self.tasks[task_id]["error"] = "Tempo limite excedido"
+            if (now - task["updated_at"] > Config.TASK_TIMEOUT_SECONDS and 
+                task["status"] == "processing" and task_id not in self._cancel_tokens):
+                self.tasks.update(task_id, status="error", error="Tempo limite excedido",
+                                  queue_status="error", step="Erro")
+                self.tasks.unset(task_id, "time_estimate")
+                task = self.tasks.get(task_id)
                 
                 # Atualizar no banco de dados
                 try:
@@ -282,70 +764,248 @@ class TranscriptionManager:
                     db_session.close()
                 except Exception as e:
                     error_logger.error(f"Erro ao atualizar timeout no banco: {str(e)}")
+                
+                self._publish_progress(task_id)
             
-            return self.tasks[task_id]
+            return task
         
         return None
     
-    def update_task_progress(self, task_id, progress, step=None, status="processing", time_estimate=None):
-        """Atualiza o progresso de uma tarefa"""
-        if task_id in self.tasks:
-            self.tasks[task_id]["progress"] = progress
-            if step:
-                self.tasks[task_id]["step"] = step
-            self.tasks[task_id]["status"] = status
-            self.tasks[task_id]["updated_at"] = datetime.now().timestamp()
+    def _is_remote(self, task_id):
+        """Indica se a tarefa está em andamento em outro processo (modo sem workers locais)"""
+        if self.run_workers:
+            return False
+        status = self.tasks.field(task_id, "status")
+        return status is not None and status not in FINISHED_STATUSES + ("downloading",)
+    
+    def _apply_db_state(self, task_id, db_task):
+        """Atualiza (ou reconstrói) o estado em memória de uma tarefa a partir do banco"""
+        state = {
+            "status": db_task.status,
+            "updated_at": db_task.updated_at.timestamp(),
+            "original_filename": db_task.original_filename
+        }
+        
+        if db_task.status == "completed":
+            state["progress"] = 100
+            state["step"] = "Transcrição finalizada"
+            state["text"] = db_task.text_content
+            if db_task.detected_language:
+                state["detected_language"] = db_task.detected_language
+            if db_task.speech_duration is not None:
+                state["vad"] = self._vad_stats(
+                    db_task.audio_duration, db_task.speech_duration, db_task.vad_time_saved or 0.0
+                )
+            
+            # Exportações registradas pelo processo que executou a transcrição
+            if self.tasks.field(task_id, "exports") is None:
+                export_results = json.loads(db_task.other_formats) if db_task.other_formats else {}
+                if db_task.pdf_filename:
+                    export_results["pdf"] = db_task.pdf_filename
+                if export_results:
+                    state["export_results"] = export_results
+                    state["exports"] = {
+                        fmt: {"status": "ready", "filename": filename}
+                        for fmt, filename in export_results.items()
+                    }
+        elif db_task.status in ("error", "cancelled"):
+            state["error"] = db_task.error_message
+            state["queue_status"] = db_task.status
+        else:
+            state["progress"] = db_task.progress or 0
+            state["step"] = db_task.step or "Status desconhecido"
+            if db_task.time_estimate is not None:
+                state["time_estimate"] = db_task.time_estimate
+            if db_task.status == "pending":
+                state["queue_status"] = "queued"
+            elif db_task.status == "processing":
+                state["queue_status"] = "processing"
+        
+        self.tasks.upsert(task_id, defaults={"created_at": db_task.created_at.timestamp()}, **state)
+        if db_task.status in ("error", "cancelled"):
+            self.tasks.unset(task_id, "time_estimate")
+    
+    def _watch_remote_progress(self):
+        """
+        Publica aos clientes SSE o progresso gravado no banco por src.worker
+        
+        Só consulta o banco quando há clientes inscritos: uma consulta por
+        intervalo para todas as tarefas acompanhadas.
+        """
+        last_published = {}
+        while True:
+            time.sleep(Config.REMOTE_PROGRESS_POLL_SECONDS)
             
-            if time_estimate is not None:
-                self.tasks[task_id]["time_estimate"] = time_estimate
+            task_ids = [t for t in self.progress_broker.subscribed_tasks() if self._is_remote(t)]
+            if not task_ids:
+                last_published.clear()
+                continue
             
-            # Atualizar log no banco de dados
             try:
                 db_session = get_session()
-                db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
-                
-                if db_task:
-                    if status != db_task.status:
-                        db_task.status = status
-                    
-                    # Adicionar log de progresso
-                    db_log = TranscriptionLog(
-                        transcription_id=db_task.id,
-                        status=status,
-                        progress=progress,
-                        step=step or "",
-                        message=f"Progresso atualizado para {progress}%"
-                    )
-                    db_session.add(db_log)
-                    db_session.commit()
-                
+                for db_task in db_session.query(Transcription).filter(Transcription.task_id.in_(task_ids)):
+                    self._apply_db_state(db_task.task_id, db_task)
                 db_session.close()
+                
+                for task_id in task_ids:
+                    progress = self.get_progress(task_id, refresh=False)
+                    if progress and progress != last_published.get(task_id):
+                        last_published[task_id] = progress
+                        self.progress_broker.publish(task_id, {
+                            "id": self.progress_broker.next_id(task_id),
+                            "data": progress
+                        })
             except Exception as e:
-                error_logger.error(f"Erro ao atualizar progresso no banco: {str(e)}")
+                error_logger.error(f"Erro ao acompanhar progresso das tarefas no banco: {str(e)}")
+    
+    def update_task_progress(self, task_id, progress, step=None, status="processing", time_estimate=None):
+        """Atualiza o progresso de uma tarefa"""
+        fields = {"progress": progress, "status": status, "updated_at": datetime.now().timestamp()}
+        if step:
+            fields["step"] = step
+        if time_estimate is not None:
+            fields["time_estimate"] = time_estimate
+        
+        if self.tasks.update(task_id, **fields):
+            # Gravação no banco é assíncrona e agrupada por tarefa; o estado
+            # em memória continua sendo a fonte de verdade para /progress
+            self.progress_writer.record(task_id, progress, step, status, time_estimate)
+            self._publish_progress(task_id)
+    
+    def get_progress(self, task_id, refresh=True):
+        """
+        Monta o retrato do progresso de uma tarefa (usado por /progress e pelo stream SSE)
+        
+        Args:
+            task_id: ID da tarefa
+            refresh: Reler do banco tarefas executadas por outro processo
+        
+        Returns:
+            dict: Status, progresso, fila, estimativa e resultado, ou None se a tarefa não existir
+        """
+        task = self.get_task_status(task_id, refresh=refresh)
+        
+        if not task:
+            return None
+        
+        response = {
+            "status": task.get("status", "unknown"),
+            "progress": task.get("progress", 0),
+            "step": task.get("step", ""),
+            "queue_status": task.get("queue_status", "none")
+        }
+        
+        # Adicionar informação de posição na fila, se disponível
+        if "queue_position" in task:
+            response["queue_position"] = task["queue_position"]
+        
+        # Percentual do download de tarefas criadas a partir de URLs
+        if "download_progress" in task:
+            response["download_progress"] = task["download_progress"]
+        
+        # Adicionar estimativa de tempo, se disponível
+        if "time_estimate" in task:
+            response["time_estimate"] = task["time_estimate"]
+            response["formatted_time"] = self._format_time(task["time_estimate"])
+        
+        if task.get("status") == "completed":
+            response["text"] = task.get("text", "")
+            if "detected_language" in task:
+                response["detected_language"] = task["detected_language"]
+            
+            # Estado de cada formato exportado (renderizados em paralelo após a transcrição)
+            if "exports" in task:
+                exports = {}
+                for fmt, state in task["exports"].items():
+                    exports[fmt] = dict(state)
+                    if state["status"] == "ready":
+                        exports[fmt]["url"] = f"/exports/{fmt}/{state['filename']}"
+                response["exports"] = exports
+        elif task.get("status") in ("error", "cancelled"):
+            response["error"] = task.get("error", "Erro desconhecido")
+        
+        return response
+    
+    @staticmethod
+    def is_progress_final(progress):
+        """Indica se não haverá mais eventos de progresso para a tarefa"""
+        if progress["status"] in ("error", "cancelled"):
+            return True
+        if progress["status"] != "completed":
+            return False
+        exports = progress.get("exports", {})
+        return all(state["status"] != "pending" for state in exports.values())
+    
+    def _publish_progress(self, task_id):
+        """Envia o progresso atual aos clientes SSE inscritos na tarefa"""
+        # Sem inscritos (caso comum), nenhum retrato é montado
+        if not self.progress_broker.has_subscribers(task_id):
+            return
+        
+        try:
+            progress = self.get_progress(task_id)
+            if progress:
+                self.progress_broker.publish(task_id, {
+                    "id": self.progress_broker.next_id(task_id),
+                    "data": progress
+                })
+        except Exception as e:
+            error_logger.error(f"Erro ao publicar progresso da tarefa {task_id}: {str(e)}")
+    
+    @staticmethod
+    def _vad_stats(audio_duration, speech_duration, time_saved):
+        """
+        Estatísticas de uma transcrição com detecção de voz
+        
+        Returns:
+            dict: Segundos com fala, segundos e fração descartados e tempo poupado
+        """
+        skipped = max(0.0, (audio_duration or 0.0) - speech_duration)
+        return {
+            "speech_seconds": round(speech_duration, 2),
+            "skipped_seconds": round(skipped, 2),
+            "skipped_fraction": round(skipped / audio_duration, 4) if audio_duration else 0.0,
+            "time_saved_seconds": round(time_saved, 2)
+        }
     
     def update_task_result(self, task_id, text=None, detected_language=None, error=None, 
-                          original_filename=None, export_formats=None, processing_duration=None):
-        """Atualiza o resultado de uma tarefa"""
-        if task_id in self.tasks:
+                          original_filename=None, export_formats=None, processing_duration=None,
+                          segments=None, cancelled=False, vad=None, audio_duration=None):
+        """
+        Atualiza o resultado de uma tarefa (cancelled: error é o motivo do
+        cancelamento; vad: estatísticas da detecção de voz, ver _vad_stats;
+        audio_duration: duração do áudio, se ainda não gravada)
+        """
+        if cancelled:
+            status = "cancelled"
+        else:
+            status = "error" if error else "completed"
+        
+        if error:
+            # Fora da fila e sem estimativa: o progresso não mostra mais a tarefa como aguardando
+            fields = {"status": status, "error": error, "queue_status": status,
+                      "step": "Cancelado" if cancelled else "Erro"}
+        else:
+            fields = {"status": "completed", "text": text}
+            if detected_language:
+                fields["detected_language"] = detected_language
+        
+        fields["updated_at"] = datetime.now().timestamp()
+        if processing_duration:
+            fields["processing_duration"] = processing_duration
+        if vad:
+            fields["vad"] = vad
+        
+        if self.tasks.update(task_id, **fields):
             if error:
-                self.tasks[task_id]["status"] = "error"
-                self.tasks[task_id]["error"] = error
-            else:
-                self.tasks[task_id]["status"] = "completed"
-                self.tasks[task_id]["text"] = text
-                if detected_language:
-                    self.tasks[task_id]["detected_language"] = detected_language
-                
-                # Exportar para os formatos solicitados
-                if text and original_filename:
-                    export_results = self._export_transcription(
-                        text, original_filename, detected_language, export_formats
-                    )
-                    self.tasks[task_id]["export_results"] = export_results
+                self.tasks.unset(task_id, "time_estimate")
+            
+            # Tarefa finalizada não pode mais ser cancelada
+            self._discard_cancel_token(task_id)
             
-            self.tasks[task_id]["updated_at"] = datetime.now().timestamp()
-            if processing_duration:
-                self.tasks[task_id]["processing_duration"] = processing_duration
+            # Gravar progresso pendente antes do resultado final, para que
+            # um evento atrasado não sobrescreva o status no banco
+            self.progress_writer.flush()
             
             # Atualizar no banco de dados
             try:
@@ -354,39 +1014,41 @@ class TranscriptionManager:
                 
                 if db_task:
                     # Atualizar status
-                    db_task.status = "error" if error else "completed"
+                    db_task.status = status
                     db_task.completed_at = datetime.utcnow()
                     
                     if error:
                         db_task.error_message = error
                     else:
+                        db_task.progress = 100
+                        db_task.step = "Transcrição finalizada"
                         db_task.text_content = text
+                        if segments is not None:
+                            db_task.segments = json.dumps(segments, ensure_ascii=False)
                         db_task.detected_language = detected_language
-                        
-                        # Informações de exportação
-                        if "export_results" in self.tasks[task_id]:
-                            export_results = self.tasks[task_id]["export_results"]
-                            if "pdf" in export_results:
-                                db_task.pdf_filename = os.path.basename(export_results["pdf"])
-                            
-                            # Outros formatos como JSON
-                            other_formats = {k: os.path.basename(v) 
-                                           for k, v in export_results.items() 
-                                           if k != "pdf"}
-                            if other_formats:
-                                db_task.other_formats = json.dumps(other_formats)
                     
-                    # Duração do processamento
+                    # Duração do áudio e do processamento
+                    if audio_duration:
+                        db_task.audio_duration = audio_duration
                     if processing_duration:
                         db_task.processing_duration = processing_duration
+                    if vad:
+                        db_task.speech_duration = vad["speech_seconds"]
+                        db_task.vad_time_saved = vad["time_saved_seconds"]
                     
                     # Log final
+                    if cancelled:
+                        step, message = "Cancelado", error
+                    elif error:
+                        step, message = "Erro", f"Erro: {error}"
+                    else:
+                        step, message = "Concluído", "Transcrição concluída com sucesso"
                     db_log = TranscriptionLog(
                         transcription_id=db_task.id,
                         status=db_task.status,
                         progress=100 if not error else 0,
-                        step="Concluído" if not error else "Erro",
-                        message="Transcrição concluída com sucesso" if not error else f"Erro: {error}"
+                        step=step,
+                        message=message
                     )
                     db_session.add(db_log)
                     db_session.commit()
@@ -394,56 +1056,228 @@ class TranscriptionManager:
                 db_session.close()
             except Exception as e:
                 error_logger.error(f"Erro ao atualizar resultado no banco: {str(e)}")
+            
+            # Registrar os formatos de exportação (renderizados fora do slot de transcrição)
+            if not error and text and original_filename:
+                self._start_exports(task_id, text, original_filename, detected_language,
+                                    export_formats, segments)
+            
+            self._publish_progress(task_id)
     
-    def _export_transcription(self, text, original_filename, language=None, export_formats=None):
+    def _start_exports(self, task_id, text, original_filename, language=None, export_formats=None,
+                       segments=None):
         """
-        Exporta a transcrição para vários formatos
+        Registra os formatos de exportação de uma tarefa concluída
+        
+        Os arquivos são renderizados sob demanda no primeiro download (ver
+        get_export). Com Config.EAGER_EXPORTS, os formatos são pré-renderizados
+        em paralelo no executor de exportações e cada um informa seu próprio
+        estado no campo exports da tarefa (pending, ready ou error).
         
         Args:
+            task_id: ID da tarefa
             text: Texto da transcrição
             original_filename: Nome original do arquivo
             language: Idioma detectado
-            export_formats: Lista de formatos para exportação (pdf, txt, srt, docx)
-            
-        Returns:
-            dict: Dicionário com caminhos dos arquivos gerados por formato
+            export_formats: Lista de formatos para exportação (pdf, txt, srt, vtt, docx)
+            segments: Segmentos [início, fim, texto] usados nas legendas
         """
-        results = {}
-        
         if export_formats is None:
             export_formats = ["pdf"]
         
+        # Nome público de cada exportação (usado em /exports/<formato>/<nome>)
+        export_results = {fmt: f"{task_id}.{fmt}" for fmt in export_formats}
+        
+        if not Config.EAGER_EXPORTS:
+            self.tasks.update(
+                task_id,
+                text_hash=text_hash(text),
+                export_results=export_results,
+                exports={
+                    fmt: {"status": "ready", "filename": filename}
+                    for fmt, filename in export_results.items()
+                }
+            )
+            self._save_export_results(task_id)
+            return
+        
+        self.tasks.update(
+            task_id,
+            text_hash=text_hash(text),
+            export_results=export_results,
+            exports={fmt: {"status": "pending"} for fmt in export_formats}
+        )
+        for fmt in export_formats:
+            self.export_executor.submit(self._render_export, task_id, fmt)
+    
+    def _render_export(self, task_id, fmt):
+        """Pré-renderiza um formato de exportação (executado no executor de exportações)"""
         try:
-            # Remover a extensão do arquivo original
-            base_filename = os.path.splitext(os.path.basename(original_filename))[0]
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Exportar para cada formato
-            for fmt in export_formats:
-                if fmt == "pdf":
-                    pdf_path = save_to_pdf(text, original_filename, language)
-                    results["pdf"] = pdf_path
-                
-                elif fmt == "txt":
-                    txt_path = save_to_txt(text, original_filename, language)
-                    results["txt"] = txt_path
+            self.get_export(task_id, fmt)
+            filename = self.tasks.field(task_id, "export_results", {}).get(fmt)
+            state = {"status": "ready", "filename": filename}
+        except Exception as e:
+            error_logger.error(f"Erro ao exportar transcrição ({fmt}): {str(e)}")
+            state = {"status": "error", "error": str(e)}
+        
+        # O último formato a terminar registra os arquivos gerados no banco
+        last = self.tasks.set_export_state(task_id, fmt, state)
+        self._publish_progress(task_id)
+        
+        if last:
+            self._save_export_results(task_id)
+    
+    def get_export(self, task_id, fmt):
+        """
+        Retorna o arquivo de exportação de uma tarefa concluída
+        
+        O arquivo é renderizado no primeiro pedido e guardado no cache de
+        exportações; pedidos seguintes apenas reutilizam o arquivo salvo.
+        
+        Args:
+            task_id: ID da tarefa
+            fmt: Formato (pdf, txt, srt, vtt, docx)
+        
+        Returns:
+            tuple: (caminho do arquivo, nome sugerido para download) ou None
+        """
+        task = self.get_task_status(task_id)
+        if not task or task.get("status") != "completed" or not task.get("text"):
+            return None
+        
+        if "text_hash" not in task:
+            task["text_hash"] = text_hash(task["text"])
+            self.tasks.update(task_id, text_hash=task["text_hash"])
+        
+        original_filename = task.get("original_filename") or task_id
+        
+        def render(output_path):
+            # Os segmentos ficam apenas no banco; só são lidos quando não há cache
+            segments = None
+            if fmt in ("srt", "vtt"):
+                segments = self._load_segments(task_id)
+            self._export_transcription(
+                task["text"], original_filename, fmt, task.get("detected_language"), segments, output_path
+            )
+        
+        path = render_cache.get_or_render(task_id, fmt, task["text_hash"], render)
+        
+        base_filename = os.path.splitext(os.path.basename(original_filename))[0]
+        return path, f"transcricao_{base_filename}.{fmt}"
+    
+    def _load_segments(self, task_id):
+        """Carrega do banco os segmentos de uma transcrição"""
+        try:
+            db_session = get_session()
+            db_task = db_session.query(Transcription.segments).filter_by(task_id=task_id).first()
+            db_session.close()
+            if db_task and db_task.segments:
+                return json.loads(db_task.segments)
+        except Exception as e:
+            error_logger.error(f"Erro ao carregar segmentos da tarefa {task_id}: {str(e)}")
+        return None
+    
+    def _save_export_results(self, task_id):
+        """Grava no banco os nomes dos arquivos exportados de uma tarefa"""
+        export_results = self.tasks.field(task_id, "export_results", {})
+        if not export_results:
+            return
+        
+        try:
+            db_session = get_session()
+            db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
+            
+            if db_task:
+                if "pdf" in export_results:
+                    db_task.pdf_filename = export_results["pdf"]
                 
-                elif fmt == "srt":
-                    srt_path = save_to_srt(text, original_filename, language)
-                    results["srt"] = srt_path
+                # Outros formatos como JSON
+                other_formats = {k: v for k, v in export_results.items() if k != "pdf"}
+                if other_formats:
+                    db_task.other_formats = json.dumps(other_formats)
                 
-                elif fmt == "docx":
-                    docx_path = save_to_docx(text, original_filename, language)
-                    results["docx"] = docx_path
+                db_session.commit()
             
-            return results
+            db_session.close()
         except Exception as e:
-            error_logger.error(f"Erro ao exportar transcrição: {str(e)}")
-            return {"error": str(e)}
+            error_logger.error(f"Erro ao salvar exportações no banco: {str(e)}")
     
-    def _transcribe_task(self, task_id, file_path, model_name, is_video, language_mode, 
-                        language, audio_path, original_filename, export_formats=None, source_type=None):
+    def _export_transcription(self, text, original_filename, fmt, language=None, segments=None,
+                              output_path=None):
+        """
+        Exporta a transcrição para um formato
+        
+        Args:
+            text: Texto da transcrição
+            original_filename: Nome original do arquivo
+            fmt: Formato de exportação (pdf, txt, srt, vtt, docx)
+            language: Idioma detectado
+            segments: Segmentos [início, fim, texto] usados nas legendas
+            output_path: Caminho de destino do arquivo
+        
+        Returns:
+            str: Caminho do arquivo gerado
+        """
+        if fmt == "pdf":
+            return save_to_pdf(text, original_filename, language, output_path)
+        elif fmt == "txt":
+            return save_to_txt(text, original_filename, language, output_path)
+        elif fmt == "srt":
+            return save_to_srt(text, original_filename, language, segments, output_path)
+        elif fmt == "vtt":
+            return save_to_vtt(text, original_filename, language, segments, output_path)
+        elif fmt == "docx":
+            return save_to_docx(text, original_filename, language, output_path)
+        
+        raise ValueError(f"Formato de exportação não suportado: {fmt}")
+    
+    def _language_detection_model(self, model_name, device):
+        """
+        Modelo menor usado para detectar o idioma (Config.LANGUAGE_DETECTION_MODEL)
+        
+        Prefere o menor modelo já carregado no pool que seja menor que o da
+        tarefa (Config.AVAILABLE_MODELS vai do menor para o maior); sem
+        nenhum carregado, usa Config.LANGUAGE_DETECTION_MODEL, se for menor.
+        
+        Returns:
+            str: Nome do modelo, ou None para detectar com o próprio modelo
+        """
+        fallback = Config.LANGUAGE_DETECTION_MODEL
+        models = Config.AVAILABLE_MODELS
+        if not fallback or model_name not in models:
+            return None
+        
+        smaller = models[:models.index(model_name)]
+        for name in smaller:
+            if model_pool.is_loaded(name, device):
+                return name
+        return fallback if fallback in smaller else None
+    
+    def _transcribe_task(self, task_id, file_path, *args, **kwargs):
         """Função executada em thread para processar a transcrição"""
+        # Cancelamento (cancel_task) e tempo limite usam o mesmo sinal,
+        # verificado entre as etapas, a cada janela do Whisper e entre trechos
+        cancel_token = self._cancel_token(task_id)
+        cancel_token.set_timeout(Config.TASK_TIMEOUT_SECONDS)
+        
+        try:
+            # A saída do encoder é reaproveitada entre a detecção de idioma e a primeira
+            # janela; os modelos obtidos do pool não são despejados enquanto a tarefa roda
+            with activate(cancel_token), EncoderReuse() as encoder_reuse, model_pool.leased():
+                self._run_transcription(
+                    task_id, file_path, *args, cancel_token=cancel_token, encoder_reuse=encoder_reuse, **kwargs
+                )
+        except TaskCancelled as e:
+            self._finish_cancelled(task_id, e.reason)
+        finally:
+            self._discard_cancel_token(task_id)
+    
+    def _run_transcription(self, task_id, file_path, model_name, is_video, language_mode, 
+                           language, original_filename, export_formats=None, source_type=None,
+                           parallel_chunks=False, cache_key=None, cancel_token=None, vad=False,
+                           encoder_reuse=None):
+        """Executa as etapas da transcrição (TaskCancelled interrompe qualquer uma delas)"""
+        cancel_token = cancel_token or CancelToken()
         start_time = time.time()
         duration = None
         
@@ -462,145 +1296,105 @@ class TranscriptionManager:
             except Exception as e:
                 error_logger.error(f"Erro ao atualizar status inicial no banco: {str(e)}")
             
-            # Se é um vídeo, extrai o áudio
+            # Ingestão da mídia: uma única passagem do ffmpeg extrai o áudio
+            # (descartando o vídeo, se houver) direto para a memória. O mesmo
+            # buffer é usado para medir a duração, detectar o idioma e transcrever
             if is_video:
                 self.update_task_progress(task_id, 10, "Extraindo áudio do vídeo")
-                
-                # Comando melhorado do FFmpeg para extrair o áudio
-                command = [
-                    "ffmpeg", "-i", file_path,
-                    "-vn",  # desabilita a saída de vídeo
-                    "-acodec", "pcm_s16le",  # converte para WAV
-                    "-ar", "16000",  # taxa de amostragem para 16kHz (melhor para Whisper)
-                    "-ac", "1",  # mono (melhor para reconhecimento de fala)
-                    "-y",  # sobrescreve se existir
-                    audio_path
-                ]
-                
-                try:
-                    subprocess.run(command, check=True, capture_output=True)
-                    self.update_task_progress(task_id, 25, "Áudio extraído com sucesso")
-                    file_to_transcribe = audio_path
-                except subprocess.CalledProcessError as e:
-                    error_msg = e.stderr.decode() if e.stderr else str(e)
-                    self.update_task_result(task_id, error=f"Erro ao extrair áudio: {error_msg}")
-                    
-                    # Limpar arquivos
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    return
-                    
-                # Verifica se o arquivo de áudio é válido utilizando uma função auxiliar
-                self.update_task_progress(task_id, 30, "Validando arquivo de áudio")
-                
-                if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
-                    self.update_task_result(task_id, error="O arquivo de áudio extraído está vazio.")
-                    
-                    # Limpar arquivos
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    return
-                
-                # Verificação de validez do áudio extraído
-                try:
-                    # Usar ffprobe para verificar duração
-                    command = [
-                        "ffprobe", "-v", "error", "-show_entries",
-                        "format=duration", "-of", "json", audio_path
-                    ]
-                    result = subprocess.run(command, capture_output=True, text=True, check=True)
-                    output = json.loads(result.stdout)
-                    
-                    if "format" not in output or "duration" not in output["format"]:
-                        raise ValueError("Informação de duração não encontrada")
-                        
-                    audio_valid = True
-                except Exception as e:
-                    audio_valid = False
-                    error_logger.error(f"Erro ao validar áudio: {str(e)}")
-                
-                if not audio_valid:
-                    self.update_task_result(task_id, error="O arquivo de áudio extraído não é válido.")
-                    
-                    # Limpar arquivos
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    if os.path.exists(audio_path):
-                        os.remove(audio_path)
-                    return
             else:
                 self.update_task_progress(task_id, 20, "Arquivo de áudio recebido")
-                file_to_transcribe = file_path
             
-            # Obter duração do áudio para estimativa de tempo
             try:
-                command = [
-                    "ffprobe", "-v", "error", "-show_entries",
-                    "format=duration", "-of", "json", file_to_transcribe
-                ]
-                result = subprocess.run(command, capture_output=True, text=True, check=True)
-                output = json.loads(result.stdout)
-                
-                if "format" in output and "duration" in output["format"]:
-                    duration = float(output["format"]["duration"])
-                    
-                    # Estimar tempo de transcrição baseado na duração
-                    factors = {
-                        "base": 0.1,
-                        "small": 0.15,
-                        "medium": 0.3,
-                        "large": 0.5
-                    }
-                    
-                    # Tempo adicional para extração (se for vídeo)
-                    video_extraction_time = 60 if is_video else 0  # 1 minuto para extração
-                    
-                    # Tempo para carregar o modelo
-                    model_load_time = {
-                        "base": 10,
-                        "small": 20,
-                        "medium": 40,
-                        "large": 60
-                    }
-                    
-                    # Calcular estimativa
-                    processing_time = duration * factors.get(model_name, 0.2)
-                    total_estimate = int(processing_time + video_extraction_time + model_load_time.get(model_name, 30))
-                    
-                    # Atualizar progresso com estimativa
-                    self.update_task_progress(
-                        task_id, 
-                        35, 
-                        f"Preparando transcrição de áudio de {self._format_time(duration)}", 
-                        time_estimate=total_estimate
-                    )
-                    
-                    # Atualizar duração no banco
-                    try:
-                        db_session = get_session()
-                        db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
-                        if db_task:
-                            db_task.audio_duration = duration
-                            db_session.commit()
-                        db_session.close()
-                    except Exception as e:
-                        error_logger.error(f"Erro ao atualizar duração no banco: {str(e)}")
+                audio = decode_audio(file_path, cancel_token=cancel_token)
+            except Exception as e:
+                self.update_task_result(task_id, error=f"Erro ao extrair áudio: {str(e)}")
+                return
+            
+            if len(audio) == 0:
+                self.update_task_result(task_id, error="O arquivo de áudio extraído está vazio.")
+                return
+            
+            throughput = audio.throughput()
+            transcription_logger.info(
+                f"Áudio extraído da tarefa {task_id}: {audio.duration:.1f}s em {throughput['decode_time']:.2f}s "
+                f"({throughput['mb_per_second']:.1f} MB/s, {throughput['audio_seconds_per_second']:.1f}x tempo real)"
+            )
+            
+            if is_video:
+                self.update_task_progress(task_id, 25, "Áudio extraído com sucesso")
+            
+            duration = audio.duration
+            
+            # Detecção de voz: só os trechos com fala, concatenados, vão para o
+            # Whisper; os tempos do resultado são convertidos de volta depois
+            speech_map = None
+            vad_time = 0.0
+            if vad:
+                vad_start_time = time.time()
+                speech_map = build_speech_map(audio)
+                if speech_map:
+                    audio = speech_map.compact(audio)
+                vad_time = time.time() - vad_start_time
+                transcription_logger.info(
+                    f"Detecção de voz da tarefa {task_id}: {audio.duration:.1f}s de fala em "
+                    f"{duration:.1f}s de áudio ({vad_time:.2f}s)"
+                )
+            
+            transcribed_duration = audio.duration
+            use_parallel_chunks = parallel_chunks and transcribed_duration >= Config.PARALLEL_CHUNKS_MIN_DURATION
+            
+            # Estimar o tempo com a velocidade medida neste ambiente (modelo,
+            # dispositivo, threads); o carregamento só conta se o modelo não estiver no pool
+            device, threads = self.eta_estimator.runtime(use_parallel_chunks)
+            model_loaded = model_pool.is_loaded(model_name, device)
+            estimate = self.eta_estimator.predict(
+                model_name, transcribed_duration, device, threads, include_load=not model_loaded
+            )
+            total_estimate = int(time.time() - start_time + estimate["load"] + estimate["inference"])
+            
+            # Atualizar progresso com estimativa
+            self.update_task_progress(
+                task_id, 
+                35, 
+                f"Preparando transcrição de áudio de {self._format_time(duration)}", 
+                time_estimate=total_estimate
+            )
+            
+            # Atualizar duração no banco
+            try:
+                db_session = get_session()
+                db_task = db_session.query(Transcription).filter_by(task_id=task_id).first()
+                if db_task:
+                    db_task.audio_duration = duration
+                    db_session.commit()
+                db_session.close()
             except Exception as e:
-                transcription_logger.warning(f"Não foi possível obter duração do áudio: {str(e)}")
+                error_logger.error(f"Erro ao atualizar duração no banco: {str(e)}")
             
-            # Carregar modelo, com cache
-            self.update_task_progress(task_id, 40, "Carregando modelo de transcrição")
+            # Modelo de detecção de idioma, se configurado um menor
+            detection_model_name = None
+            if language_mode == "auto":
+                detection_model_name = self._language_detection_model(model_name, device)
             
-            # Verificar se o modelo já está em cache
-            if model_name not in self.models:
+            # Carregar modelo, com cache; nos trechos paralelos cada processo carrega
+            # o seu, e aqui ele só é necessário para detectar o idioma
+            cancel_token.check()
+            model = None
+            load_time = None
+            if not use_parallel_chunks or (language_mode == "auto" and not detection_model_name):
+                self.update_task_progress(task_id, 40, "Carregando modelo de transcrição")
+                
+                # Obter modelo do pool compartilhado
+                load_start_time = time.time()
                 try:
-                    self.models[model_name] = whisper.load_model(model_name)
-                    transcription_logger.info(f"Modelo {model_name} carregado com sucesso")
+                    model = model_pool.get(model_name, device)
                 except Exception as e:
                     self.update_task_result(task_id, error=f"Erro ao carregar o modelo {model_name}: {str(e)}")
                     return
-            
-            model = self.models[model_name]
+                if not model_loaded:
+                    load_time = time.time() - load_start_time
+            inference_start_time = time.time()
+            cancel_token.check()
             
             # Atualizar progresso antes da transcrição
             elapsed_time = time.time() - start_time
@@ -617,14 +1411,20 @@ class TranscriptionManager:
             
             # Detectar idioma se necessário
             detected_language = None
-            if language_mode == "auto":
+            if language_mode == "auto" and not detection_model_name and not use_parallel_chunks:
+                # O transcribe detecta o idioma na primeira janela, que decodifica
+                # em seguida com a saída do encoder reaproveitada (EncoderReuse)
+                self.update_task_progress(task_id, 55, "Detectando idioma na primeira janela")
+            elif language_mode == "auto":
                 try:
                     self.update_task_progress(task_id, 55, "Detectando idioma...")
-                    audio = whisper.load_audio(file_to_transcribe)
-                    audio = whisper.pad_or_trim(audio)
-                    mel = whisper.log_mel_spectrogram(audio).to(model.device)
-                    _, probs = model.detect_language(mel)
-                    detected_language = max(probs, key=probs.get)
+                    
+                    # Com um modelo menor, se configurado; nos trechos paralelos, uma
+                    # vez no áudio inteiro para que todos usem o mesmo idioma
+                    detection_model = model
+                    if detection_model_name:
+                        detection_model = model_pool.get(detection_model_name, device)
+                    detected_language, probs = detect_language(detection_model, audio.samples)
                     
                     transcription_logger.info(f"Idioma detectado: {detected_language} (confiança: {probs[detected_language]:.2%})")
                     
@@ -640,12 +1440,13 @@ class TranscriptionManager:
                         )
                     else:
                         self.update_task_progress(task_id, 60, f"Idioma detectado: {detected_language}")
-                    
+                
                 except Exception as e:
                     transcription_logger.error(f"Erro ao detectar idioma: {str(e)}")
                     detected_language = "pt"  # Fallback para português
             
             # Transcrever áudio
+            cancel_token.check()
             transcription_start_time = time.time()
             try:
                 # Configurar parâmetros
@@ -659,13 +1460,36 @@ class TranscriptionManager:
                 elif language_mode == "specify" and language:
                     transcribe_params["language"] = language
                 
-                # Realizar transcrição
-                result = model.transcribe(file_to_transcribe, **transcribe_params)
+                # Realizar transcrição (em trechos paralelos para áudios longos, se solicitado)
+                if use_parallel_chunks:
+                    def on_chunk_done(done, total):
+                        self.update_task_progress(
+                            task_id,
+                            60 + int(30 * done / total),
+                            f"Transcrevendo áudio em paralelo ({done}/{total} trechos)"
+                        )
+                    
+                    result = self.chunk_transcriber.transcribe(
+                        audio, model_name, transcribe_params, on_progress=on_chunk_done,
+                        cancel_token=cancel_token
+                    )
+                else:
+                    result = model.transcribe(audio.samples, **transcribe_params)
+                if speech_map:
+                    result = speech_map.remap(result)
                 text = result["text"]
+                segments = compact_segments(result.get("segments"))
                 
                 if not detected_language:
                     detected_language = result.get("language", "desconhecido")
                 
+                if encoder_reuse is not None:
+                    transcription_logger.info(
+                        f"Passagens do encoder na tarefa {task_id}: {encoder_reuse.passes} "
+                        f"({encoder_reuse.reused} reaproveitadas)"
+                        + (f", idioma detectado com o modelo {detection_model_name}" if detection_model_name else "")
+                    )
+                
                 # Calcular tempo total de transcrição
                 total_transcription_time = time.time() - transcription_start_time
                 total_processing_time = time.time() - start_time
@@ -677,9 +1501,41 @@ class TranscriptionManager:
                     model=model_name,
                     duration=duration or 0,
                     transcription_time=total_transcription_time,
-                    success=True
+                    success=True,
+                    skipped_seconds=speech_map.skipped_seconds if speech_map else None
+                )
+                
+                # Calibrar o estimador com as medições desta transcrição
+                self.eta_estimator.record(
+                    model_name, device, threads,
+                    audio_seconds=duration,
+                    decode_seconds=audio.decode_time,
+                    inference_seconds=time.time() - inference_start_time,
+                    load_seconds=load_time,
+                    predicted_seconds=total_estimate,
+                    actual_seconds=total_processing_time,
+                    transcribed_seconds=transcribed_duration
                 )
                 
+                # Guardar o resultado para reenvios do mesmo arquivo
+                if cache_key:
+                    self.result_cache.put(cache_key, {
+                        "text": text,
+                        "detected_language": detected_language,
+                        "segments": segments,
+                        "audio_duration": duration
+                    })
+                
+                # Fração descartada pela detecção de voz e tempo de inferência
+                # poupado (estimado pela velocidade medida, descontando a detecção)
+                vad_stats = None
+                if vad:
+                    skipped = duration - transcribed_duration
+                    saved = 0.0
+                    if skipped > 0:
+                        saved = self.eta_estimator.predict(model_name, skipped, device, threads)["inference"]
+                    vad_stats = self._vad_stats(duration, transcribed_duration, saved - vad_time)
+                
                 # Finalizar
                 self.update_task_progress(task_id, 95, "Finalizando e salvando resultados")
                 self.update_task_result(
@@ -688,14 +1544,16 @@ class TranscriptionManager:
                     detected_language=detected_language,
                     original_filename=original_filename,
                     export_formats=export_formats,
-                    processing_duration=total_processing_time
+                    processing_duration=total_processing_time,
+                    segments=segments,
+                    vad=vad_stats
                 )
                 
                 transcription_logger.info(
                     f"Transcrição concluída: {task_id} - {original_filename} - "
                     f"Tempo: {total_processing_time:.2f}s - Idioma: {detected_language}"
                 )
-                
+            
             except Exception as e:
                 error_msg = f"Erro na transcrição: {str(e)}"
                 transcription_logger.error(error_msg)
@@ -710,14 +1568,12 @@ class TranscriptionManager:
                     transcription_time=time.time() - transcription_start_time,
                     success=False
                 )
-            
+        
         finally:
             # Limpar arquivos temporários
             try:
                 if os.path.exists(file_path):
                     os.remove(file_path)
-                if is_video and audio_path and os.path.exists(audio_path):
-                    os.remove(audio_path)
             except Exception as e:
                 error_logger.error(f"Erro ao remover arquivos temporários: {str(e)}")
     
@@ -737,47 +1593,62 @@ class TranscriptionManager:
         else:
             return f"{seconds}s"
     
-    def get_queue_status(self):
-        """Retorna informações sobre o status da fila"""
-        # Encontrar todas as tarefas que estão na fila
-        queued_tasks = [task_id for task_id in self.tasks.keys() 
-                       if self.tasks[task_id].get("queue_status") == "queued"]
+    def get_queue_status(self, include_jobs=False):
+        """
+        Retorna informações sobre o status da fila
         
-        # Verificar se há tarefas na fila e retornar o ID da próxima
-        if queued_tasks:
-            # Ordenar pela data de criação
-            queued_tasks.sort(key=lambda x: self.tasks[x].get("created_at", 0))
-            next_task_id = queued_tasks[0] if queued_tasks else None
-            
+        Args:
+            include_jobs: Incluir as tarefas aguardando, na ordem real de despacho
+        """
+        if not include_jobs:
+            # Contadores e índice de posições mantidos pelo registro de tarefas,
+            # atualizados nos eventos da fila (ver _update_queue_positions)
+            queue_size, next_task_id = self.tasks.queue_head()
             return {
-                "queue_size": len(queued_tasks),
+                "queue_size": queue_size,
                 "next_task_id": next_task_id,
-                "has_items": True,
-                "active_tasks": sum(1 for t in self.tasks.values() if t.get("status") == "processing")
-            }
-        else:
-            return {
-                "queue_size": 0,
-                "next_task_id": None,
-                "has_items": False,
-                "active_tasks": sum(1 for t in self.tasks.values() if t.get("status") == "processing")
+                "has_items": queue_size > 0,
+                "active_tasks": self.tasks.counts().get("processing", 0)
             }
+        
+        # Tarefas na ordem em que o escalonador vai despachá-las (prioridade,
+        # fair share ou SJF), incluindo as enfileiradas por outros processos
+        queued_tasks = self.scheduler.queued_order()
+        
+        status = {
+            "queue_size": len(queued_tasks),
+            "next_task_id": queued_tasks[0]["task_id"] if queued_tasks else None,
+            "has_items": bool(queued_tasks),
+            "active_tasks": self.tasks.counts().get("processing", 0)
+        }
+        
+        now = time.time()
+        etas = self._queue_etas(queued_tasks)
+        status["policy"] = self.queue_policy.describe()
+        status["jobs"] = []
+        for i, job in enumerate(queued_tasks):
+            expected = job.get("expected_seconds")
+            enqueued_at = job.get("enqueued_at")
+            start, finish = etas[job["task_id"]]
+            status["jobs"].append({
+                "position": i + 1,
+                "task_id": job["task_id"],
+                "user_id": job.get("user_id"),
+                "priority": QueuePolicy.priority_name(job.get("priority")),
+                "expected_seconds": round(expected, 1) if expected is not None else None,
+                "waiting_seconds": round(max(0.0, now - enqueued_at), 1) if enqueued_at else None,
+                "eta_start_seconds": round(start, 1),
+                "eta_seconds": round(finish, 1)
+            })
+        
+        return status
     
     def cleanup_old_tasks(self, hours=24):
         """Remove tarefas antigas da memória (já salvas no banco)"""
-        now = datetime.now().timestamp()
-        cutoff = now - (hours * 3600)  # Converter horas para segundos
+        removed = self.tasks.evict(max_age_seconds=hours * 3600)
         
-        to_remove = []
-        for task_id, task in self.tasks.items():
-            if task.get("updated_at", 0) < cutoff:
-                to_remove.append(task_id)
-        
-        for task_id in to_remove:
-            del self.tasks[task_id]
-        
-        if to_remove:
-            logger.info(f"Limpeza: {len(to_remove)} tarefa(s) removida(s) da memória")
+        if removed:
+            logger.info(f"Limpeza: {len(removed)} tarefa(s) removida(s) da memória")
     
     def get_model_info(self, model_name=None):
         """Retorna informações sobre os modelos disponíveis ou um modelo específico"""
@@ -817,10 +1688,18 @@ class TranscriptionManager:
         """Lista as transcrições concluídas mais recentes"""
         try:
             db_session = get_session()
-            query = db_session.query(Transcription).filter_by(status="completed")
+            # Carregar apenas as colunas retornadas (sem o text_content)
+            query = db_session.query(
+                Transcription.id,
+                Transcription.task_id,
+                Transcription.original_filename,
+                Transcription.completed_at,
+                Transcription.audio_duration,
+                Transcription.pdf_filename
+            ).filter(Transcription.status == "completed")
             
             if user_id:
-                query = query.filter_by(user_id=user_id)
+                query = query.filter(Transcription.user_id == user_id)
             
             transcriptions = query.order_by(Transcription.completed_at.desc()).limit(limit).all()
             
@@ -841,5 +1720,35 @@ class TranscriptionManager:
             error_logger.error(f"Erro ao listar transcrições: {str(e)}")
             return []
 
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_transcription_manager(run_workers=None):
+    """
+    Retorna o gerenciador de transcrições do processo, criando-o na primeira chamada
+    
+    Args:
+        run_workers: Se este processo executa transcrições (padrão: Config.RUN_EMBEDDED_WORKER)
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                if run_workers is None:
+                    run_workers = Config.RUN_EMBEDDED_WORKER
+                _manager = TranscriptionManager(run_workers=run_workers)
+    return _manager
+
+class _LazyTranscriptionManager:
+    """
+    Referência ao gerenciador global que só o cria no primeiro uso
+    
+    Importar este módulo não inicia executores, fila nem modelos; o processo
+    (web ou src.worker) decide como o gerenciador é criado.
+    """
+    
+    def __getattr__(self, name):
+        return getattr(get_transcription_manager(), name)
+
 # Instância global do gerenciador de transcrições
-transcription_manager = TranscriptionManager() 
\ No newline at end of file
+transcription_manager = _LazyTranscriptionManager() 
\ No newline at end of file
@@ -1,9 +1,11 @@
 import os
+import glob
 import uuid
 import logging
 import yt_dlp
 
 from src.config.config import Config
+from src.utils.audio import SAMPLE_RATE
 
 # Configuração de logging
 youtube_logger = logging.getLogger("transcrever.youtube")
@@ -24,56 +26,101 @@ class YouTubeService:
             return False
     
     @staticmethod
-    def download_audio(youtube_url):
+    def build_options(output_template, progress_callback=None):
+        """
+        Opções do yt-dlp para baixar apenas o áudio, já no formato do Whisper
+        
+        Seleciona o menor formato somente de áudio com taxa de bits de pelo
+        menos Config.YOUTUBE_MIN_AUDIO_BITRATE kbps (o suficiente para fala) e
+        converte direto para Config.YOUTUBE_AUDIO_CODEC (wav PCM ou flac) em
+        16 kHz mono, sem a recodificação intermediária em MP3.
+        
+        Args:
+            output_template: Modelo do caminho de saída (com %(ext)s)
+            progress_callback: Função chamada com o percentual baixado (0-100)
+        """
+        min_abr = Config.YOUTUBE_MIN_AUDIO_BITRATE
+        ydl_opts = {
+            'format': f'bestaudio[vcodec=none][abr>={min_abr}]/bestaudio[vcodec=none]/bestaudio/best',
+            # Ordena do menor para o maior: "best" passa a ser o menor formato adequado
+            'format_sort': ['+abr', '+size'],
+            'outtmpl': output_template,
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': Config.YOUTUBE_AUDIO_CODEC,
+            }],
+            'postprocessor_args': {
+                'extractaudio': ['-ar', str(SAMPLE_RATE), '-ac', '1']
+            },
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+        }
+        
+        if progress_callback:
+            def progress_hook(status):
+                if status.get('status') != 'downloading':
+                    return
+                total = status.get('total_bytes') or status.get('total_bytes_estimate')
+                if total:
+                    progress_callback(min(100.0, status.get('downloaded_bytes', 0) * 100.0 / total))
+            
+            ydl_opts['progress_hooks'] = [progress_hook]
+        
+        return ydl_opts
+    
+    @staticmethod
+    def downloaded_path(info, output_base):
+        """Caminho final do arquivo após o pós-processamento do yt-dlp"""
+        for download in info.get('requested_downloads') or []:
+            if download.get('filepath') and os.path.exists(download['filepath']):
+                return download['filepath']
+        return f"{output_base}.{Config.YOUTUBE_AUDIO_CODEC}"
+    
+    @staticmethod
+    def download_audio(youtube_url, progress_callback=None):
         """
         Baixa o áudio de um vídeo do YouTube.
         
+        Uma única chamada extract_info(download=True) obtém os metadados e
+        baixa o áudio; título e duração vêm do mesmo dicionário de informações.
+        
         Args:
             youtube_url: URL do vídeo do YouTube
+            progress_callback: Função chamada com o percentual baixado (0-100)
             
         Returns:
-            Tupla (caminho_do_arquivo, nome_original) ou (None, None) se falhar
+            Tupla (caminho_do_arquivo, nome_original, duração_em_segundos) ou (None, None, None) se falhar
         """
         if not YouTubeService.is_valid_youtube_url(youtube_url):
             youtube_logger.error(f"URL inválida: {youtube_url}")
-            return None, None
-        
-        # Cria nome de arquivo único
-        output_filename = str(uuid.uuid4()) + ".mp3"
-        output_path = os.path.join(Config.UPLOAD_DIR, output_filename)
+            return None, None, None
         
-        # Configuração do yt-dlp
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_path,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'quiet': True,
-        }
+        # Cria nome de arquivo único (a extensão é definida pelo pós-processamento)
+        output_base = os.path.join(Config.UPLOAD_DIR, str(uuid.uuid4()))
+        ydl_opts = YouTubeService.build_options(f"{output_base}.%(ext)s", progress_callback)
         
         try:
-            # Obter informações do vídeo
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                info_dict = ydl.extract_info(youtube_url, download=False)
-                video_title = info_dict.get('title', 'video')
-                original_filename = f"{video_title}.mp3"
-            
-            # Baixar o vídeo como áudio
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+                info_dict = ydl.extract_info(youtube_url, download=True)
+            
+            output_path = YouTubeService.downloaded_path(info_dict, output_base)
+            video_title = info_dict.get('title', 'video')
+            original_filename = f"{video_title}.{Config.YOUTUBE_AUDIO_CODEC}"
+            duration = info_dict.get('duration')
             
-            youtube_logger.info(f"YouTube download concluído: {video_title}")
-            return output_path, original_filename
+            youtube_logger.info(
+                f"YouTube download concluído: {video_title} "
+                f"(formato {info_dict.get('format_id')}, {info_dict.get('abr') or '?'} kbps)"
+            )
+            return output_path, original_filename, duration
             
         except Exception as e:
             youtube_logger.error(f"Erro ao baixar vídeo do YouTube: {str(e)}")
-            # Remover arquivo parcial se existir
-            if os.path.exists(output_path):
+            # Remover arquivos parciais se existirem
+            for partial_path in glob.glob(f"{output_base}.*"):
                 try:
-                    os.remove(output_path)
+                    os.remove(partial_path)
                 except:
                     pass
-            return None, None 
\ No newline at end of file
+            return None, None, None
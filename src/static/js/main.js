@@ -10,6 +10,7 @@ let isProcessing = false;
 let isPolling = false;
 let pollInterval = null;
 let pollErrorCount = 0; // Contador de erros de polling
+let progressSource = null; // EventSource do stream de progresso (SSE)
 let appSettings = null;
 let currentTheme = localStorage.getItem('theme') || 'light';
 
@@ -410,7 +411,11 @@ async function handleFormSubmit(e) {
 }
 
 /**
- * Inicia o polling para verificar o progresso da transcrição
+ * Acompanha o progresso da transcrição
+ * 
+ * Usa o stream SSE /progress/<task_id>/stream, que envia cada atualização
+ * assim que ocorre; se o navegador não suportar EventSource ou o stream
+ * não puder ser aberto, volta a consultar /progress/<task_id> a cada 2 segundos.
  */
 function startProgressPolling(taskId) {
     if (isPolling) return;
@@ -433,11 +438,37 @@ function startProgressPolling(taskId) {
     if (progressBar) progressBar.style.width = '0%';
     if (progressText) progressText.textContent = '0%';
     
-    // Limpar intervalo anterior se existir
-    if (pollInterval) clearInterval(pollInterval);
+    // O texto é exibido uma única vez, mesmo que as exportações ainda não tenham terminado
+    let resultShown = false;
     
-    // Verificar o progresso a cada 2 segundos
-    pollInterval = setInterval(() => pollProgress(taskId), 2000);
+    // Encerrar acompanhamento anterior se existir
+    stopProgressUpdates();
+    isPolling = true;
+    
+    if (window.EventSource) {
+        progressSource = new EventSource(`/progress/${taskId}/stream`);
+        
+        progressSource.onmessage = (event) => handleProgress(JSON.parse(event.data));
+        
+        // O EventSource reconecta sozinho após quedas; só desiste se o
+        // servidor recusar o stream (ex.: tarefa inexistente)
+        progressSource.onerror = () => {
+            if (progressSource && progressSource.readyState === EventSource.CLOSED) {
+                progressSource = null;
+                startFallbackPolling();
+            }
+        };
+    } else {
+        startFallbackPolling();
+    }
+    
+    /**
+     * Verifica o progresso a cada 2 segundos (navegadores sem SSE)
+     */
+    function startFallbackPolling() {
+        if (pollInterval) clearInterval(pollInterval);
+        pollInterval = setInterval(() => pollProgress(taskId), 2000);
+    }
     
     /**
      * Função para verificar o progresso
@@ -449,76 +480,111 @@ function startProgressPolling(taskId) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             
-            const data = await response.json();
+            handleProgress(await response.json());
             
-            // Atualizar a barra de progresso
-            if (progressBar) progressBar.style.width = `${data.progress}%`;
-            if (progressText) progressText.textContent = `${data.progress}%`;
-            if (progressStep) progressStep.textContent = data.step || '';
+        } catch (error) {
+            console.error('Erro ao verificar progresso:', error);
             
-            // Atualizar status da fila
-            if (queueStatus && data.queue_status && data.queue_status !== 'none') {
-                queueStatus.style.display = 'block';
-                
-                if (data.queue_status === 'queued' && data.queue_position) {
-                    queueStatus.textContent = `Aguardando na fila (posição ${data.queue_position})`;
-                } else if (data.queue_status === 'processing') {
-                    queueStatus.textContent = 'Processando da fila';
-                }
-            } else if (queueStatus) {
-                queueStatus.style.display = 'none';
-            }
+            // Se houver erro, parar o polling após algumas tentativas
+            pollErrorCount++;
             
-            // Atualizar estimativa de tempo
-            if (timeEstimate && data.formatted_time) {
-                timeEstimate.style.display = 'block';
-                timeEstimate.textContent = `Tempo estimado: ${data.formatted_time}`;
-            } else if (timeEstimate) {
-                timeEstimate.style.display = 'none';
+            if (pollErrorCount > 5) {
+                stopProgressUpdates();
+                showAlert('Erro ao verificar o progresso da transcrição.', 'error');
             }
+        }
+    }
+    
+    /**
+     * Atualiza a interface com um retrato do progresso (do stream ou do polling)
+     */
+    function handleProgress(data) {
+        // Atualizar a barra de progresso (durante o download de uma URL, mostra o percentual baixado)
+        const percent = data.status === 'downloading' ? (data.download_progress || 0) : data.progress;
+        if (progressBar) progressBar.style.width = `${percent}%`;
+        if (progressText) progressText.textContent = `${percent}%`;
+        if (progressStep) progressStep.textContent = data.step || '';
+        
+        // Atualizar status da fila
+        if (queueStatus && data.queue_status && data.queue_status !== 'none') {
+            queueStatus.style.display = 'block';
             
-            // Verificar se a transcrição está completa
-            if (data.status === 'completed') {
-                clearInterval(pollInterval);
-                isPolling = false;
-                
-                // Exibir resultado
+            if (data.queue_status === 'queued' && data.queue_position) {
+                queueStatus.textContent = `Aguardando na fila (posição ${data.queue_position})`;
+            } else if (data.queue_status === 'processing') {
+                queueStatus.textContent = 'Processando da fila';
+            }
+        } else if (queueStatus) {
+            queueStatus.style.display = 'none';
+        }
+        
+        // Atualizar estimativa de tempo
+        if (timeEstimate && data.formatted_time) {
+            timeEstimate.style.display = 'block';
+            timeEstimate.textContent = `Tempo estimado: ${data.formatted_time}`;
+        } else if (timeEstimate) {
+            timeEstimate.style.display = 'none';
+        }
+        
+        // Verificar se a transcrição está completa
+        if (data.status === 'completed') {
+            // Exibir resultado (as exportações continuam em paralelo)
+            if (!resultShown) {
+                resultShown = true;
                 showResult(data.text, data.detected_language);
-                
-                // Verificar se há mais arquivos na fila
-                checkQueueStatus();
             }
             
-            // Verificar se houve erro
-            if (data.status === 'error') {
-                clearInterval(pollInterval);
-                isPolling = false;
-                
-                showAlert(`Erro na transcrição: ${data.error}`, 'error');
-                
-                // Voltar à tela de upload
-                document.getElementById('progress-section').style.display = 'none';
-                document.getElementById('upload-section').style.display = 'block';
-                
-                // Verificar se há mais arquivos na fila
-                checkQueueStatus();
+            // Continuar consultando enquanto houver formatos sendo exportados
+            const exports = Object.values(data.exports || {});
+            if (exports.some(exp => exp.status === 'pending')) {
+                if (progressStep) {
+                    const ready = exports.filter(exp => exp.status !== 'pending').length;
+                    progressStep.textContent = `Exportando arquivos (${ready}/${exports.length} prontos)`;
+                }
+                return;
             }
             
-        } catch (error) {
-            console.error('Erro ao verificar progresso:', error);
+            stopProgressUpdates();
             
-            // Se houver erro, parar o polling após algumas tentativas
-            pollErrorCount++;
+            // Atualizar a lista de arquivos gerados
+            loadPDFs();
             
-            if (pollErrorCount > 5) {
-                clearInterval(pollInterval);
-                isPolling = false;
-                showAlert('Erro ao verificar o progresso da transcrição.', 'error');
-            }
+            // Verificar se há mais arquivos na fila
+            checkQueueStatus();
+        }
+        
+        // Verificar se houve erro
+        if (data.status === 'error') {
+            stopProgressUpdates();
+            
+            showAlert(`Erro na transcrição: ${data.error}`, 'error');
+            
+            // Voltar à tela de upload
+            document.getElementById('progress-section').style.display = 'none';
+            document.getElementById('upload-section').style.display = 'block';
+            
+            // Verificar se há mais arquivos na fila
+            checkQueueStatus();
         }
     }
 }
 
+/**
+ * Encerra o stream SSE e o polling de progresso
+ */
+function stopProgressUpdates() {
+    if (progressSource) {
+        progressSource.close();
+        progressSource = null;
+    }
+    if (pollInterval) {
+        clearInterval(pollInterval);
+        pollInterval = null;
+    }
+    pollErrorCount = 0;
+    isPolling = false;
+}
+
 /**
  * Verificar o status da fila para ver se há mais arquivos para processar
  */
@@ -653,7 +719,8 @@ async function loadPDFs() {
                 listItem.classList.add('list-item');
                 
                 const fileName = pdf.filename;
-                const fileSize = formatFileSize(pdf.size);
+                // PDFs renderizados sob demanda ainda não têm tamanho conhecido
+                const fileSize = pdf.size !== null ? `${formatFileSize(pdf.size)} • ` : '';
                 const date = new Date(pdf.created_at).toLocaleString();
                 
                 listItem.innerHTML = `
@@ -661,8 +728,8 @@ async function loadPDFs() {
                         <i class="fas fa-file-pdf"></i>
                     </div>
                     <div class="file-info">
-                        <div class="file-name">${fileName}</div>
-                        <div class="file-meta">${fileSize} • ${date}</div>
+                        <div class="file-name">${pdf.title || fileName}</div>
+                        <div class="file-meta">${fileSize}${date}</div>
                     </div>
                     <div class="file-actions">
                         <a href="/pdfs/${fileName}" class="btn btn-sm btn-outline" download>
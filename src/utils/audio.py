@@ -0,0 +1,177 @@
+import os
+import subprocess
+import time
+import wave
+import numpy as np
+
+# Taxa de amostragem esperada pelo Whisper
+SAMPLE_RATE = 16000
+
+# Duração da janela de decodificação do Whisper (segundos)
+WINDOW_SECONDS = 30
+
+class DecodedAudio:
+    """
+    Áudio decodificado uma única vez por tarefa (float32 mono, 16 kHz).
+    
+    O mesmo buffer é compartilhado pela medição de duração, detecção de
+    idioma e transcrição, evitando que cada etapa decodifique o arquivo.
+    """
+    
+    def __init__(self, samples, sample_rate=SAMPLE_RATE, decode_time=0.0, source_bytes=0):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.decode_time = decode_time
+        self.source_bytes = source_bytes
+    
+    @property
+    def duration(self):
+        """Duração do áudio em segundos, calculada pelo número de amostras"""
+        return len(self.samples) / self.sample_rate
+    
+    @property
+    def nbytes(self):
+        """Tamanho do buffer em memória (bytes)"""
+        return self.samples.nbytes
+    
+    def head(self, seconds=WINDOW_SECONDS):
+        """Retorna uma visão (sem cópia) dos primeiros segundos do áudio"""
+        return self.samples[:int(seconds * self.sample_rate)]
+    
+    def throughput(self):
+        """
+        Retorna a vazão da extração
+        
+        Returns:
+            dict: MB/s do arquivo de entrada e segundos de áudio por segundo
+        """
+        elapsed = max(self.decode_time, 1e-6)
+        return {
+            "decode_time": self.decode_time,
+            "mb_per_second": self.source_bytes / (1024 * 1024) / elapsed,
+            "audio_seconds_per_second": self.duration / elapsed
+        }
+    
+    def __len__(self):
+        return len(self.samples)
+
+def _read_pcm_wav(file_path, sample_rate):
+    """
+    Lê um WAV PCM 16 bits mono já na taxa de amostragem pedida
+    
+    É o formato gravado pelo YouTubeService; nesse caso o ffmpeg seria só
+    uma cópia, então as amostras são lidas direto do arquivo.
+    
+    Returns:
+        numpy.ndarray: Amostras int16, ou None se o arquivo não estiver nesse formato
+    """
+    try:
+        with wave.open(file_path, 'rb') as wav:
+            if (wav.getnchannels() != 1 or wav.getsampwidth() != 2 or
+                    wav.getframerate() != sample_rate or wav.getcomptype() != 'NONE'):
+                return None
+            return np.frombuffer(wav.readframes(wav.getnframes()), np.int16)
+    except (wave.Error, EOFError):
+        return None
+
+def probe_duration(file_path):
+    """
+    Mede a duração de um arquivo sem decodificá-lo
+    
+    Lê o cabeçalho de arquivos WAV e usa o ffprobe nos demais formatos. É
+    usado para estimar o custo de uma tarefa antes de ela entrar na fila.
+    
+    Returns:
+        float: Duração em segundos, ou None se não for possível medir
+    """
+    if file_path.lower().endswith('.wav'):
+        try:
+            with wave.open(file_path, 'rb') as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except (wave.Error, EOFError, OSError):
+            pass
+    
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, check=True, timeout=30).stdout
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+def decode_audio(file_path, sample_rate=SAMPLE_RATE, start=None, duration=None, cancel_token=None):
+    """
+    Decodifica um arquivo de áudio/vídeo para float32 mono via ffmpeg
+    
+    A saída do ffmpeg é lida diretamente de um pipe para a memória, sem
+    gravar um WAV intermediário em disco. Para vídeos, a faixa de vídeo é
+    descartada na mesma passagem.
+    
+    Args:
+        file_path: Caminho do arquivo de entrada
+        sample_rate: Taxa de amostragem de saída
+        start: Posição inicial em segundos (opcional)
+        duration: Quantidade de segundos a decodificar (opcional)
+        cancel_token: CancelToken da tarefa; o ffmpeg é encerrado se ela for cancelada
+    
+    Returns:
+        DecodedAudio: Áudio decodificado
+    
+    Raises:
+        RuntimeError: Se o ffmpeg falhar ao decodificar o arquivo
+        TaskCancelled: Se a tarefa for cancelada durante a decodificação
+    """
+    if cancel_token is not None:
+        cancel_token.check()
+    
+    command = ["ffmpeg", "-nostdin", "-threads", "0"]
+    if start:
+        command += ["-ss", str(start)]
+    command += ["-i", file_path]
+    if duration:
+        command += ["-t", str(duration)]
+    command += [
+        "-vn",  # ignora faixas de vídeo
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-"
+    ]
+    
+    start_time = time.perf_counter()
+    pcm = None
+    if start is None and duration is None and file_path.lower().endswith('.wav'):
+        pcm = _read_pcm_wav(file_path, sample_rate)
+    
+    if pcm is None:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if cancel_token is not None:
+            cancel_token.register_process(process)
+        try:
+            output, stderr = process.communicate()
+        finally:
+            if cancel_token is not None:
+                cancel_token.unregister_process(process)
+        
+        # ffmpeg encerrado pelo cancelamento
+        if cancel_token is not None:
+            cancel_token.check()
+        if process.returncode != 0:
+            error_msg = stderr.decode(errors="replace") if stderr else f"código de saída {process.returncode}"
+            raise RuntimeError(f"Falha ao decodificar áudio: {error_msg}")
+        pcm = np.frombuffer(output, np.int16)
+    
+    samples = pcm.astype(np.float32) / 32768.0
+    decode_time = time.perf_counter() - start_time
+    
+    try:
+        source_bytes = os.path.getsize(file_path)
+    except OSError:
+        source_bytes = 0
+    
+    return DecodedAudio(samples, sample_rate, decode_time=decode_time, source_bytes=source_bytes)
@@ -0,0 +1,145 @@
+import threading
+from contextlib import contextmanager
+
+class TaskCancelled(BaseException):
+    """
+    Interrompe uma tarefa cancelada ou com tempo limite esgotado.
+    
+    Deriva de BaseException para atravessar os "except Exception" de cada
+    etapa da transcrição (extração, carregamento do modelo, Whisper) até o
+    tratamento em _transcribe_task, sem virar um erro da etapa.
+    """
+    
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class CancelToken:
+    """
+    Sinal de cancelamento de uma tarefa em execução.
+    
+    A tarefa consulta o sinal em pontos de verificação (check) entre as
+    etapas, entre janelas de decodificação do Whisper e entre trechos
+    paralelos. Processos filhos registrados (ffmpeg) são encerrados no
+    momento do cancelamento, sem esperar o próximo ponto de verificação.
+    Com um tempo limite, o próprio token se cancela ao expirar.
+    """
+    
+    CANCELLED = "cancelled"
+    TIMEOUT = "timeout"
+    
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+        self._processes = set()
+        self._timer = None
+        self._lock = threading.Lock()
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def cancel(self, reason=CANCELLED):
+        """
+        Cancela a tarefa e encerra os processos filhos registrados
+        
+        Returns:
+            bool: False se a tarefa já estava cancelada
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            processes = list(self._processes)
+        
+        for process in processes:
+            _kill(process)
+        return True
+    
+    def check(self):
+        """Levanta TaskCancelled se a tarefa foi cancelada"""
+        if self._event.is_set():
+            raise TaskCancelled(self.reason)
+    
+    def set_timeout(self, seconds):
+        """Cancela a tarefa (motivo TIMEOUT) após o tempo informado"""
+        with self._lock:
+            if self._timer is not None or self._event.is_set():
+                return
+            self._timer = threading.Timer(seconds, self.cancel, args=(self.TIMEOUT,))
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def register_process(self, process):
+        """Registra um processo filho; se a tarefa já foi cancelada, encerra-o na hora"""
+        with self._lock:
+            if not self._event.is_set():
+                self._processes.add(process)
+                return
+        _kill(process)
+    
+    def unregister_process(self, process):
+        with self._lock:
+            self._processes.discard(process)
+    
+    def close(self):
+        """Desativa o tempo limite (tarefa encerrada)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+def _kill(process):
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+# Token da tarefa executada pela thread atual (lido pelo ponto de verificação do Whisper)
+_current = threading.local()
+
+# Instalação do ponto de verificação em modelos compartilhados entre threads
+_install_lock = threading.Lock()
+
+@contextmanager
+def activate(token):
+    """Associa o token à thread atual durante o bloco"""
+    previous = getattr(_current, "token", None)
+    _current.token = token
+    try:
+        yield token
+    finally:
+        _current.token = previous
+
+def current_token():
+    return getattr(_current, "token", None)
+
+def install_decode_checkpoint(model):
+    """
+    Faz model.decode verificar o cancelamento da tarefa da thread atual
+    
+    O transcribe do Whisper chama model.decode uma vez por janela de 30 s
+    (e a cada temperatura de fallback), então uma tarefa cancelada para na
+    janela seguinte. O modelo é compartilhado entre threads pelo pool; o
+    token é o da thread que está decodificando. O ModelPool instala o ponto
+    de verificação ao carregar o modelo; chamadas repetidas (mesmo
+    simultâneas) não o instalam de novo. Modelos sem decode ficam como estão
+    (o cancelamento espera o fim do transcribe).
+    
+    Returns:
+        O próprio modelo
+    """
+    with _install_lock:
+        original = getattr(model, "decode", None)
+        if original is None or getattr(model, "_cancel_checkpoint", False):
+            return model
+        
+        def decode(*args, **kwargs):
+            token = current_token()
+            if token is not None:
+                token.check()
+            return original(*args, **kwargs)
+        
+        model.decode = decode
+        model._cancel_checkpoint = True
+    return model
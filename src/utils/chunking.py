@@ -0,0 +1,246 @@
+import os
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from ..config.config import Config
+from .audio import SAMPLE_RATE
+
+# Modelo carregado em cada processo do pool (um por worker)
+_worker_model = None
+
+def _init_worker(model_name, device, num_threads):
+    """Inicializa um processo do pool carregando seu próprio modelo"""
+    global _worker_model
+    import torch
+    import whisper
+    
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    _worker_model = whisper.load_model(model_name, device=device)
+
+def _transcribe_chunk(samples, transcribe_params):
+    """Transcreve um trecho de áudio no processo do pool"""
+    return _worker_model.transcribe(samples, **transcribe_params)
+
+def find_chunk_boundaries(samples, sample_rate=SAMPLE_RATE, min_seconds=30, max_seconds=120,
+                          frame_seconds=0.1):
+    """
+    Divide o áudio em trechos, cortando nos pontos de menor energia
+    
+    Cada corte é feito no quadro de menor energia RMS entre min_seconds e
+    max_seconds após o início do trecho, de modo que os cortes caiam em
+    silêncios sempre que possível.
+    
+    Args:
+        samples: Áudio mono (float32)
+        sample_rate: Taxa de amostragem
+        min_seconds: Duração mínima de um trecho
+        max_seconds: Duração máxima de um trecho
+        frame_seconds: Tamanho do quadro usado para medir a energia
+    
+    Returns:
+        list: Lista de tuplas (amostra_inicial, amostra_final)
+    """
+    total = len(samples)
+    min_len = int(min_seconds * sample_rate)
+    max_len = int(max_seconds * sample_rate)
+    
+    if total <= max_len:
+        return [(0, total)]
+    
+    # Energia por quadro, sem copiar o áudio inteiro
+    frame = max(1, int(frame_seconds * sample_rate))
+    n_frames = total // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.einsum('ij,ij->i', frames, frames)
+    
+    boundaries = []
+    start = 0
+    while total - start > max_len:
+        lo = (start + min_len) // frame
+        hi = min((start + max_len) // frame, n_frames)
+        
+        # Não deixar um último trecho menor que min_seconds
+        hi = min(hi, max(lo + 1, (total - min_len) // frame))
+        
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2
+        boundaries.append((start, cut))
+        start = cut
+    
+    boundaries.append((start, total))
+    return boundaries
+
+def stitch_results(chunk_results):
+    """
+    Junta os resultados dos trechos em um único resultado no formato do Whisper
+    
+    Args:
+        chunk_results: Lista de tuplas (deslocamento_em_segundos, resultado)
+    
+    Returns:
+        dict: Resultado com 'text', 'segments' e 'language'
+    """
+    segments = []
+    for offset, result in chunk_results:
+        for segment in result.get("segments", []):
+            segment = dict(segment)
+            segment["id"] = len(segments)
+            segment["start"] = segment["start"] + offset
+            segment["end"] = segment["end"] + offset
+            if "seek" in segment:
+                segment["seek"] = segment["seek"] + int(offset * 100)
+            segments.append(segment)
+    
+    language = chunk_results[0][1].get("language") if chunk_results else None
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language
+    }
+
+def _terminate_pool(pool):
+    """Encerra o pool interrompendo os processos, inclusive os trechos em andamento"""
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+class ParallelChunkTranscriber:
+    """
+    Transcrição de áudios longos dividida em trechos processados em paralelo.
+    
+    Os trechos são enviados para um ProcessPoolExecutor em que cada processo
+    mantém seu próprio modelo carregado. Os pools são reaproveitados entre
+    tarefas e mantidos por modelo, com no máximo PARALLEL_CHUNK_MAX_POOLS
+    pools ativos; um pool em uso por uma transcrição nunca é despejado.
+    """
+    
+    def __init__(self, max_workers=None, device=None):
+        self.max_workers = max_workers or Config.PARALLEL_CHUNK_WORKERS
+        self.device = device if device is not None else Config.WHISPER_DEVICE
+        self._pools = OrderedDict()
+        self._in_use = {}  # pool -> transcrições usando o pool
+        self._lock = threading.Lock()
+    
+    def _get_pool(self, model_name):
+        """Retorna (ou cria) o pool de processos do modelo (com lock)"""
+        if model_name in self._pools:
+            self._pools.move_to_end(model_name)
+            return self._pools[model_name]
+        
+        num_threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, self.device, num_threads)
+        )
+        self._pools[model_name] = pool
+        return pool
+    
+    def _evict_idle(self):
+        """Despeja os pools menos usados e fora de uso acima do limite (com lock)"""
+        for model_name in list(self._pools):
+            if len(self._pools) <= Config.PARALLEL_CHUNK_MAX_POOLS:
+                break
+            if self._in_use.get(self._pools[model_name]):
+                continue
+            self._pools.pop(model_name).shutdown(wait=False)
+    
+    def _acquire(self, model_name):
+        """Obtém o pool do modelo e o marca como em uso"""
+        with self._lock:
+            pool = self._get_pool(model_name)
+            self._in_use[pool] = self._in_use.get(pool, 0) + 1
+            self._evict_idle()
+            return pool
+    
+    def _release(self, pool, recycle=False):
+        """
+        Libera o pool obtido por _acquire
+        
+        Com recycle, o pool deixa de ser entregue a novas transcrições e seus
+        processos são encerrados assim que a última transcrição que o usa o libera.
+        """
+        with self._lock:
+            remaining = self._in_use.pop(pool, 0) - 1
+            if recycle:
+                for model_name, current in list(self._pools.items()):
+                    if current is pool:
+                        del self._pools[model_name]
+            if remaining > 0:
+                self._in_use[pool] = remaining
+            elif pool not in self._pools.values():
+                _terminate_pool(pool)
+            self._evict_idle()
+    
+    def transcribe(self, audio, model_name, transcribe_params=None, on_progress=None, cancel_token=None):
+        """
+        Transcreve o áudio em trechos paralelos
+        
+        Args:
+            audio: DecodedAudio com o áudio completo
+            model_name: Nome do modelo Whisper
+            transcribe_params: Parâmetros repassados para model.transcribe
+            on_progress: Callback opcional chamado com (concluídos, total)
+            cancel_token: CancelToken da tarefa, verificado a cada
+                Config.CANCEL_POLL_SECONDS; trechos ainda não iniciados são
+                descartados e os em andamento, interrompidos
+        
+        Returns:
+            dict: Resultado no formato do Whisper, com timestamps no tempo original
+        """
+        transcribe_params = transcribe_params or {}
+        boundaries = find_chunk_boundaries(
+            audio.samples, audio.sample_rate,
+            min_seconds=Config.CHUNK_MIN_SECONDS,
+            max_seconds=Config.CHUNK_MAX_SECONDS
+        )
+        
+        pool = self._acquire(model_name)
+        recycle = False
+        try:
+            futures = {
+                pool.submit(_transcribe_chunk, audio.samples[start:end], transcribe_params): i
+                for i, (start, end) in enumerate(boundaries)
+            }
+            
+            results = [None] * len(boundaries)
+            pending = set(futures)
+            timeout = Config.CANCEL_POLL_SECONDS if cancel_token is not None else None
+            try:
+                while pending:
+                    if cancel_token is not None:
+                        cancel_token.check()
+                    finished, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        results[futures[future]] = future.result()
+                        if on_progress:
+                            on_progress(len(boundaries) - len(pending), len(boundaries))
+            except BaseException:
+                # Trechos que ainda não começaram são descartados; com algum em
+                # andamento, o pool é reciclado para interromper os processos
+                for future in pending:
+                    if not future.cancel() and not future.done():
+                        recycle = True
+                raise
+        finally:
+            self._release(pool, recycle)
+        
+        return stitch_results([
+            (start / audio.sample_rate, result)
+            for (start, _), result in zip(boundaries, results)
+        ])
+    
+    def shutdown(self):
+        """Encerra todos os pools de processos"""
+        with self._lock:
+            for pool in set(self._pools.values()) | set(self._in_use):
+                pool.shutdown(wait=False)
+            self._pools.clear()
+            self._in_use.clear()
@@ -1,10 +1,10 @@
 import os
 import datetime
 import re
-from fpdf import FPDF
 from ..config.config import Config
+from .pdf_writer import StreamingPDFWriter, MM
 
-def save_to_pdf(text, original_filename, language=None):
+def save_to_pdf(text, original_filename, language=None, output_path=None):
     """
     Salva a transcrição em um arquivo PDF
     
@@ -12,6 +12,7 @@ def save_to_pdf(text, original_filename, language=None):
         text: Texto da transcrição
         original_filename: Nome original do arquivo
         language: Idioma detectado (opcional)
+        output_path: Caminho de destino (padrão: novo arquivo em Config.PDF_DIR)
         
     Returns:
         str: Caminho do arquivo PDF gerado
@@ -21,85 +22,43 @@ def save_to_pdf(text, original_filename, language=None):
         base_filename = os.path.splitext(os.path.basename(original_filename))[0]
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         pdf_filename = f"transcricao_{base_filename}_{timestamp}.pdf"
-        pdf_path = os.path.join(Config.get_pdf_dir(), pdf_filename)
+        pdf_path = output_path or os.path.join(Config.get_pdf_dir(), pdf_filename)
         
-        # Criar o PDF
-        pdf = FPDF()
-        pdf.add_page()
-        
-        # Configurar fonte
-        pdf.set_font("Arial", size=12)
-        
-        # Adicionar título
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(200, 10, txt="Transcrição", ln=True, align='C')
-        
-        # Adicionar detalhes
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt=f"Arquivo original: {original_filename}", ln=True)
-        
-        if language:
-            pdf.cell(200, 10, txt=f"Idioma detectado: {language}", ln=True)
+        # Gerar o PDF página a página direto no disco
+        footer = f"Transcrever v{Config.APP_VERSION} - Página {{page}}"
+        with StreamingPDFWriter(pdf_path, footer=footer) as pdf:
+            # Adicionar título
+            pdf.add_line("Transcrição", font="bold", size=16, leading=10 * MM, align="center")
             
-        pdf.cell(200, 10, txt=f"Data: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
-        
-        # Linha separadora
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
-        # Adicionar texto da transcrição
-        pdf.set_font("Arial", size=11)
-        
-        # Dividir o texto em parágrafos
-        paragraphs = text.split('\n\n')
-        
-        for paragraph in paragraphs:
-            # Dividir parágrafos em linhas
-            lines = paragraph.split('\n')
+            # Adicionar detalhes
+            pdf.add_line(f"Arquivo original: {original_filename}", font="bold", size=12, leading=10 * MM)
             
-            for line in lines:
-                # Calcular largura efetiva da página
-                effective_width = 190
-                line = line.strip()
-                
-                if not line:  # Se a linha estiver vazia, adicionar um espaço
-                    pdf.ln(5)
-                    continue
-                
-                # Definir largura máxima de caracteres por linha
-                chars_per_line = 90  # Valor aproximado para fonte Arial 11
+            if language:
+                pdf.add_line(f"Idioma detectado: {language}", font="bold", size=12, leading=10 * MM)
                 
-                # Dividir linhas muito longas
-                while len(line) > 0:
-                    # Se a linha couber completamente, adicionar e sair
-                    if len(line) <= chars_per_line:
-                        pdf.multi_cell(effective_width, 5, txt=line)
-                        line = ""
-                    else:
-                        # Encontrar o último espaço antes do limite
-                        cut_position = line[:chars_per_line].rfind(' ')
-                        if cut_position <= 0:  # Se não encontrar espaço, cortar no limite
-                            cut_position = chars_per_line
-                        
-                        pdf.multi_cell(effective_width, 5, txt=line[:cut_position])
-                        line = line[cut_position:].lstrip()
+            pdf.add_line(f"Data: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+                         font="bold", size=12, leading=10 * MM)
             
-            # Espaço entre parágrafos
-            pdf.ln(3)
-        
-        # Adicionar rodapé
-        pdf.set_y(-15)
-        pdf.set_font('Arial', 'I', 8)
-        pdf.cell(0, 10, f'Transcrever v{Config.APP_VERSION} - Página {pdf.page_no()}', 0, 0, 'C')
-        
-        # Salvar o PDF
-        pdf.output(pdf_path)
+            # Linha separadora
+            pdf.add_rule(spacing=5 * MM)
+            
+            # Adicionar texto da transcrição, parágrafo a parágrafo
+            for paragraph in text.split('\n\n'):
+                for line in paragraph.split('\n'):
+                    if not line.strip():  # Se a linha estiver vazia, adicionar um espaço
+                        pdf.add_space(5 * MM)
+                        continue
+                    
+                    pdf.add_paragraph(line, size=11, leading=5 * MM)
+                
+                # Espaço entre parágrafos
+                pdf.add_space(3 * MM)
         
         return pdf_path
     except Exception as e:
         raise Exception(f"Erro ao criar PDF: {str(e)}")
 
-def save_to_txt(text, original_filename, language=None):
+def save_to_txt(text, original_filename, language=None, output_path=None):
     """
     Salva a transcrição em um arquivo TXT
     
@@ -107,6 +66,7 @@ def save_to_txt(text, original_filename, language=None):
         text: Texto da transcrição
         original_filename: Nome original do arquivo
         language: Idioma detectado (opcional)
+        output_path: Caminho de destino (padrão: novo arquivo em Config.PDF_DIR)
         
     Returns:
         str: Caminho do arquivo TXT gerado
@@ -116,7 +76,7 @@ def save_to_txt(text, original_filename, language=None):
         base_filename = os.path.splitext(os.path.basename(original_filename))[0]
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         txt_filename = f"transcricao_{base_filename}_{timestamp}.txt"
-        txt_path = os.path.join(Config.get_pdf_dir(), txt_filename)  # usar o mesmo diretório dos PDFs
+        txt_path = output_path or os.path.join(Config.get_pdf_dir(), txt_filename)  # usar o mesmo diretório dos PDFs
         
         with open(txt_path, 'w', encoding='utf-8') as f:
             # Adicionar cabeçalho
@@ -141,7 +101,46 @@ def save_to_txt(text, original_filename, language=None):
     except Exception as e:
         raise Exception(f"Erro ao criar arquivo TXT: {str(e)}")
 
-def save_to_srt(text, original_filename, language=None):
+def compact_segments(segments):
+    """
+    Converte os segmentos retornados pelo Whisper para uma estrutura compacta
+    
+    Args:
+        segments: Lista de dicionários do Whisper (start, end, text, tokens, ...)
+        
+    Returns:
+        list: Lista de [início, fim, texto] com tempos em segundos (ms de precisão)
+    """
+    compact = []
+    for segment in segments or []:
+        text = segment["text"].strip()
+        if text:
+            compact.append([round(segment["start"], 3), round(segment["end"], 3), text])
+    return compact
+
+def segments_from_text(text, seconds_per_sentence=3):
+    """
+    Gera segmentos aproximados a partir do texto puro
+    
+    Usado apenas para transcrições antigas, salvas antes de os segmentos
+    serem persistidos.
+    """
+    segments = []
+    start_time = 0
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        sentence = sentence.strip()
+        if sentence:
+            segments.append([start_time, start_time + seconds_per_sentence, sentence])
+            start_time += seconds_per_sentence
+    return segments
+
+def _subtitle_path(original_filename, extension):
+    """Caminho do arquivo de legendas (mesmo diretório dos PDFs)"""
+    base_filename = os.path.splitext(os.path.basename(original_filename))[0]
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(Config.get_pdf_dir(), f"transcricao_{base_filename}_{timestamp}.{extension}")
+
+def save_to_srt(text, original_filename, language=None, segments=None, output_path=None):
     """
     Salva a transcrição em um arquivo SRT (legendas)
     
@@ -149,50 +148,76 @@ def save_to_srt(text, original_filename, language=None):
         text: Texto da transcrição
         original_filename: Nome original do arquivo
         language: Idioma detectado (opcional)
+        segments: Segmentos [início, fim, texto] com os tempos reais (opcional)
+        output_path: Caminho de destino (padrão: novo arquivo em Config.PDF_DIR)
         
     Returns:
         str: Caminho do arquivo SRT gerado
     """
     try:
-        # Remover a extensão do arquivo original
-        base_filename = os.path.splitext(os.path.basename(original_filename))[0]
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        srt_filename = f"transcricao_{base_filename}_{timestamp}.srt"
-        srt_path = os.path.join(Config.get_pdf_dir(), srt_filename)  # usar o mesmo diretório dos PDFs
+        srt_path = output_path or _subtitle_path(original_filename, "srt")
         
-        # Dividir o texto em sentenças
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        if segments is None:
+            segments = segments_from_text(text)
         
+        # Uma única passagem pelos segmentos, gravando as entradas em sequência
         with open(srt_path, 'w', encoding='utf-8') as f:
-            for i, sentence in enumerate(sentences, 1):
-                if not sentence.strip():
-                    continue
-                    
-                # Calcular tempos aproximados (3 segundos por sentença)
-                start_time = (i - 1) * 3
-                end_time = i * 3
-                
-                # Formatar tempos para o formato SRT
-                start_formatted = format_srt_time(start_time)
-                end_formatted = format_srt_time(end_time)
-                
-                # Escrever entrada SRT
-                f.write(f"{i}\n")
-                f.write(f"{start_formatted} --> {end_formatted}\n")
-                f.write(f"{sentence.strip()}\n\n")
+            f.writelines(
+                f"{i}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{segment_text}\n\n"
+                for i, (start, end, segment_text) in enumerate(segments, 1)
+            )
             
         return srt_path
     except Exception as e:
         raise Exception(f"Erro ao criar arquivo SRT: {str(e)}")
 
+def save_to_vtt(text, original_filename, language=None, segments=None, output_path=None):
+    """
+    Salva a transcrição em um arquivo WebVTT (legendas para web)
+    
+    Args:
+        text: Texto da transcrição
+        original_filename: Nome original do arquivo
+        language: Idioma detectado (opcional)
+        segments: Segmentos [início, fim, texto] com os tempos reais (opcional)
+        output_path: Caminho de destino (padrão: novo arquivo em Config.PDF_DIR)
+        
+    Returns:
+        str: Caminho do arquivo VTT gerado
+    """
+    try:
+        vtt_path = output_path or _subtitle_path(original_filename, "vtt")
+        
+        if segments is None:
+            segments = segments_from_text(text)
+        
+        with open(vtt_path, 'w', encoding='utf-8') as f:
+            f.write("WEBVTT\n")
+            if language:
+                f.write(f"Language: {language}\n")
+            f.write("\n")
+            f.writelines(
+                f"{format_vtt_time(start)} --> {format_vtt_time(end)}\n{segment_text}\n\n"
+                for start, end, segment_text in segments
+            )
+            
+        return vtt_path
+    except Exception as e:
+        raise Exception(f"Erro ao criar arquivo VTT: {str(e)}")
+
 def format_srt_time(seconds):
     """Formata segundos para o formato de tempo SRT (HH:MM:SS,mmm)"""
-    hours, remainder = divmod(seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    milliseconds = int((seconds - int(seconds)) * 1000)
-    return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d},{milliseconds:03d}"
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def format_vtt_time(seconds):
+    """Formata segundos para o formato de tempo WebVTT (HH:MM:SS.mmm)"""
+    return format_srt_time(seconds).replace(',', '.')
 
-def save_to_docx(text, original_filename, language=None):
+def save_to_docx(text, original_filename, language=None, output_path=None):
     """
     Salva a transcrição em um arquivo DOCX
     
@@ -200,6 +225,7 @@ def save_to_docx(text, original_filename, language=None):
         text: Texto da transcrição
         original_filename: Nome original do arquivo
         language: Idioma detectado (opcional)
+        output_path: Caminho de destino (padrão: novo arquivo em Config.PDF_DIR)
         
     Returns:
         str: Caminho do arquivo DOCX gerado
@@ -218,7 +244,7 @@ def save_to_docx(text, original_filename, language=None):
         base_filename = os.path.splitext(os.path.basename(original_filename))[0]
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         docx_filename = f"transcricao_{base_filename}_{timestamp}.docx"
-        docx_path = os.path.join(Config.get_pdf_dir(), docx_filename)  # usar o mesmo diretório dos PDFs
+        docx_path = output_path or os.path.join(Config.get_pdf_dir(), docx_filename)  # usar o mesmo diretório dos PDFs
         
         # Criar o documento
         doc = Document()
@@ -261,6 +287,6 @@ def save_to_docx(text, original_filename, language=None):
         return docx_path
     except ImportError as e:
         # Caso a biblioteca não esteja instalada, salvar como TXT como fallback
-        return save_to_txt(text, original_filename, language)
+        return save_to_txt(text, original_filename, language, output_path)
     except Exception as e:
         raise Exception(f"Erro ao criar arquivo DOCX: {str(e)}") 
\ No newline at end of file
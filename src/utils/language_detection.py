@@ -0,0 +1,122 @@
+import threading
+
+# Reaproveitamento ativo na thread atual (lido pelo encoder instrumentado)
+_current = threading.local()
+
+# Instalação do desvio em modelos compartilhados entre threads
+_install_lock = threading.Lock()
+
+class EncoderReuse:
+    """
+    Reaproveitamento da saída do encoder do Whisper durante uma transcrição.
+    
+    Guarda a última entrada e a última saída do encoder; uma nova chamada
+    do mesmo encoder com a mesma janela (mesmo espectrograma) devolve a
+    saída guardada sem executar o encoder. No transcribe do Whisper sem idioma informado, isso
+    cobre a detecção de idioma seguida da decodificação da mesma primeira
+    janela, e também as novas tentativas de cada janela com temperaturas de
+    fallback.
+    
+    Vale para a thread em que está ativo (with), já que o modelo é
+    compartilhado entre tarefas pelo pool. Conta as passagens executadas e
+    as reaproveitadas; com reuse=False só conta.
+    """
+    
+    def __init__(self, reuse=True):
+        self.reuse = reuse
+        self.passes = 0
+        self.reused = 0
+        self._forward = None
+        self._input = None
+        self._output = None
+    
+    def encode(self, forward, mel):
+        """Executa o encoder, ou devolve a saída guardada para a mesma janela"""
+        import torch
+        
+        previous = self._input
+        if (self.reuse and previous is not None and forward is self._forward and
+                previous.shape == mel.shape and previous.dtype == mel.dtype and
+                previous.device == mel.device and torch.equal(previous, mel)):
+            self.reused += 1
+            return self._output
+        
+        output = forward(mel)
+        self.passes += 1
+        if self.reuse:
+            self._forward, self._input, self._output = forward, mel, output
+        return output
+    
+    def __enter__(self):
+        self._previous = getattr(_current, "reuse", None)
+        _current.reuse = self
+        return self
+    
+    def __exit__(self, *exc_info):
+        _current.reuse = self._previous
+        # Libera a saída guardada (alguns MB por janela)
+        self._forward = self._input = self._output = None
+        return False
+
+def install_encoder_reuse(model):
+    """
+    Faz o encoder do modelo passar pelo EncoderReuse ativo na thread atual
+    
+    Sem EncoderReuse ativo, o encoder roda normalmente. O ModelPool instala
+    o desvio ao carregar o modelo; chamadas repetidas (mesmo simultâneas)
+    não o instalam de novo.
+    
+    Returns:
+        O próprio modelo
+    """
+    with _install_lock:
+        encoder = getattr(model, "encoder", None)
+        if encoder is None or getattr(encoder, "_encoder_reuse", False):
+            return model
+        
+        original = encoder.forward
+        
+        def forward(mel):
+            reuse = getattr(_current, "reuse", None)
+            if reuse is None:
+                return original(mel)
+            return reuse.encode(original, mel)
+        
+        encoder.forward = forward
+        encoder._encoder_reuse = True
+    return model
+
+def detection_window(model, samples, fp16=True):
+    """
+    Janela de 30 s em que o idioma é detectado
+    
+    Como no transcribe do Whisper, são os primeiros 30 s do áudio seguidos
+    de silêncio, mas o espectrograma é calculado só sobre esses 30 s, e não
+    sobre o áudio inteiro. A janela difere da do transcribe apenas no piso
+    de normalização (8 dB abaixo do pico dos primeiros 30 s, e não do áudio
+    todo); por isso não serve para reaproveitar a saída do encoder
+    (EncoderReuse), só para detectar com outro modelo ou antes dos trechos
+    paralelos.
+    
+    Args:
+        model: Modelo Whisper
+        samples: Áudio mono 16 kHz (float32)
+        fp16: Mesmo valor passado ao transcribe (só vale fora da CPU)
+    """
+    import torch
+    import whisper
+    from whisper.audio import N_FRAMES, N_SAMPLES
+    
+    dtype = torch.float16 if fp16 and model.device != torch.device("cpu") else torch.float32
+    mel = whisper.log_mel_spectrogram(samples[:N_SAMPLES], model.dims.n_mels, padding=N_SAMPLES)
+    return whisper.pad_or_trim(mel, N_FRAMES).to(model.device).to(dtype)
+
+def detect_language(model, samples, fp16=True):
+    """
+    Detecta o idioma nos primeiros 30 s do áudio (ver detection_window)
+    
+    Returns:
+        tuple: (idioma mais provável, probabilidades por idioma)
+    """
+    _, probs = model.detect_language(detection_window(model, samples, fp16))
+    return max(probs, key=probs.get), probs
@@ -166,8 +166,9 @@ stats_logger = Logger.setup_daily_file_logger('transcription_stats',
                                              log_format='json',
                                              console=False)
 
-def log_transcription_stats(task_id, file_name, model, duration, transcription_time, success):
-    """Registra estatísticas de uma transcrição para análise"""
+def log_transcription_stats(task_id, file_name, model, duration, transcription_time, success,
+                            skipped_seconds=None):
+    """Registra estatísticas de uma transcrição para análise (skipped_seconds: silêncio descartado pelo vad)"""
     data = {
         'task_id': task_id,
         'file_name': file_name,
@@ -182,5 +183,7 @@ def log_transcription_stats(task_id, file_name, model, duration, transcription_t
     stats_str = (f"task_id={data['task_id']} file={data['file_name']} "
                 f"model={data['model']} duration={data['audio_duration']:.2f}s "
                 f"proc_time={data['transcription_time']:.2f}s success={data['success']}")
+    if skipped_seconds is not None:
+        stats_str += f" vad_skipped={skipped_seconds:.2f}s"
     
     stats_logger.info(stats_str) 
\ No newline at end of file
@@ -0,0 +1,673 @@
+import hashlib
+import os
+import re
+import struct
+import zlib
+from functools import lru_cache
+
+from ..config.config import Config
+from .logger import logger
+
+# Tamanhos de página em pontos (1/72 pol.)
+PAGE_A4 = (595.28, 841.89)
+PAGE_LETTER = (612.0, 792.0)
+MM = 72 / 25.4
+
+# Fontes padrão do PDF (não precisam ser embutidas no arquivo)
+ENCODING = "cp1252"
+FONTS = {
+    "regular": ("F1", "Helvetica"),
+    "bold": ("F2", "Helvetica-Bold"),
+    "italic": ("F3", "Helvetica-Oblique"),
+}
+
+# Larguras dos glifos (1/1000 em) das fontes padrão, por byte cp1252
+_HELVETICA_WIDTHS = (
+    278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278,
+    278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278,
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584, 350,
+    556, 350, 222, 556, 333, 1000, 556, 556, 333, 1000, 667, 333, 1000, 350, 611, 350,
+    350, 222, 222, 333, 333, 350, 556, 1000, 333, 1000, 500, 333, 944, 350, 500, 667,
+    278, 333, 556, 556, 556, 556, 260, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 556, 537, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    667, 667, 667, 667, 667, 667, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 500, 556, 556, 556, 556, 278, 278, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 584, 611, 556, 556, 556, 556, 500, 556, 500,
+)
+
+_HELVETICA_BOLD_WIDTHS = (
+    278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278,
+    278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278, 278,
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584, 350,
+    556, 350, 278, 556, 500, 1000, 556, 556, 333, 1000, 667, 333, 1000, 350, 611, 350,
+    350, 278, 278, 500, 500, 350, 556, 1000, 333, 1000, 556, 333, 944, 350, 500, 667,
+    278, 333, 556, 556, 556, 556, 280, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 611, 556, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 556, 556, 556, 556, 556, 278, 278, 278, 278,
+    611, 611, 611, 611, 611, 611, 611, 584, 611, 611, 611, 611, 611, 556, 611, 556,
+)
+
+_GLYPH_WIDTHS = {
+    "regular": _HELVETICA_WIDTHS,
+    "bold": _HELVETICA_BOLD_WIDTHS,
+    "italic": _HELVETICA_WIDTHS,
+}
+
+# Limite de palavras distintas mantidas no cache de larguras (por fonte)
+WORD_CACHE_SIZE = 100000
+
+def _escape(data):
+    """Escapa bytes para uma string literal do PDF"""
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+class TrueTypeFont:
+    """
+    Fonte TrueType (.ttf) embutida no PDF como fonte composta (Type0, Identity-H).
+    
+    Lê só as métricas (head, hhea, hmtx) e o mapa de caracteres para glifos
+    (cmap, formatos 4 e 12). Cada documento embute um subconjunto com os
+    contornos dos glifos que usou.
+    """
+    
+    # Tabelas mantidas no subconjunto (as de layout, como GSUB e GPOS, não são usadas no PDF)
+    SUBSET_TABLES = ("cvt ", "fpgm", "glyf", "head", "hhea", "hmtx", "loca", "maxp", "prep")
+    
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.name = re.sub(r"[^A-Za-z0-9-]", "", os.path.splitext(os.path.basename(path))[0]) or "Unicode"
+        
+        self._tables = self._read_tables()
+        head, hhea = self._tables["head"][0], self._tables["hhea"][0]
+        scale = 1000 / struct.unpack_from(">H", self.data, head + 18)[0]
+        self.bbox = [round(v * scale) for v in struct.unpack_from(">4h", self.data, head + 36)]
+        ascent, descent = struct.unpack_from(">hh", self.data, hhea + 4)
+        self.ascent, self.descent = round(ascent * scale), round(descent * scale)
+        
+        # Glifos além de numberOfHMetrics repetem a última largura
+        metrics = struct.unpack_from(">H", self.data, hhea + 34)[0]
+        advances = struct.unpack_from(f">{2 * metrics}H", self.data, self._tables["hmtx"][0])[::2]
+        self.widths = [round(advance * scale) for advance in advances]
+        
+        self.cmap = self._read_cmap(self._tables["cmap"][0])
+        self.char_widths = _CharWidths(self)
+    
+    def glyph(self, char):
+        """Glifo do caractere (0, o .notdef, se a fonte não o tiver)"""
+        return self.cmap.get(ord(char), 0)
+    
+    def glyph_width(self, glyph):
+        """Largura do glifo em 1/1000 em"""
+        return self.widths[min(glyph, len(self.widths) - 1)]
+    
+    def subset(self, glyphs):
+        """
+        Arquivo da fonte só com os contornos dos glifos informados (e dos que os compõem)
+        
+        Os índices dos glifos são mantidos, para que os códigos já gravados nas
+        páginas continuem válidos; os contornos dos demais ficam vazios.
+        """
+        data, tables = self.data, self._tables
+        head_at, head_length = tables["head"]
+        count = struct.unpack_from(">H", data, tables["maxp"][0] + 4)[0]
+        if struct.unpack_from(">h", data, head_at + 50)[0]:
+            offsets = struct.unpack_from(f">{count + 1}I", data, tables["loca"][0])
+        else:
+            offsets = [2 * v for v in struct.unpack_from(f">{count + 1}H", data, tables["loca"][0])]
+        glyf_at = tables["glyf"][0]
+        
+        keep = set()
+        pending = [0] + [glyph for glyph in glyphs if glyph < count]
+        while pending:
+            glyph = pending.pop()
+            if glyph in keep:
+                continue
+            keep.add(glyph)
+            start, end = glyf_at + offsets[glyph], glyf_at + offsets[glyph + 1]
+            if end > start and struct.unpack_from(">h", data, start)[0] < 0:
+                pending.extend(self._components(start))
+        
+        glyf = bytearray()
+        loca = []
+        for glyph in range(count):
+            loca.append(len(glyf))
+            if glyph in keep:
+                glyf += data[glyf_at + offsets[glyph]:glyf_at + offsets[glyph + 1]]
+                glyf += b"\0" * (-len(glyf) % 4)
+        loca.append(len(glyf))
+        
+        # loca sempre no formato longo; checksumAdjustment zerado
+        head = bytearray(data[head_at:head_at + head_length])
+        struct.pack_into(">I", head, 8, 0)
+        struct.pack_into(">h", head, 50, 1)
+        
+        subset = {tag: data[offset:offset + length] for tag, (offset, length) in tables.items()
+                  if tag in self.SUBSET_TABLES}
+        subset.update(head=bytes(head), glyf=bytes(glyf), loca=struct.pack(f">{count + 1}I", *loca))
+        return self._build(subset)
+    
+    def _components(self, position):
+        """Glifos referenciados por um glifo composto"""
+        position += 10
+        components = []
+        while True:
+            flags, glyph = struct.unpack_from(">HH", self.data, position)
+            components.append(glyph)
+            position += 8 if flags & 0x0001 else 6
+            if flags & 0x0008:
+                position += 2
+            elif flags & 0x0040:
+                position += 4
+            elif flags & 0x0080:
+                position += 8
+            if not flags & 0x0020:
+                return components
+    
+    @staticmethod
+    def _build(tables):
+        """Monta um arquivo TrueType com as tabelas informadas"""
+        count = len(tables)
+        power = 1 << (count.bit_length() - 1)
+        header = struct.pack(">IHHHH", 0x00010000, count, 16 * power, power.bit_length() - 1,
+                             16 * (count - power))
+        
+        directory = []
+        body = bytearray()
+        offset = 12 + 16 * count
+        for tag in sorted(tables):
+            table = tables[tag] + b"\0" * (-len(tables[tag]) % 4)
+            checksum = sum(struct.unpack(f">{len(table) // 4}I", table)) & 0xFFFFFFFF
+            directory.append(struct.pack(">4sIII", tag.encode("latin-1"), checksum,
+                                         offset + len(body), len(tables[tag])))
+            body += table
+        return header + b"".join(directory) + bytes(body)
+    
+    def _read_tables(self):
+        """Retorna (deslocamento, tamanho) de cada tabela da fonte"""
+        if self.data[:4] not in (b"\x00\x01\x00\x00", b"true"):
+            raise ValueError("apenas fontes TrueType (.ttf) com contornos glyf são suportadas")
+        
+        count = struct.unpack_from(">H", self.data, 4)[0]
+        tables = {}
+        for i in range(count):
+            tag, _, offset, length = struct.unpack_from(">4sIII", self.data, 12 + 16 * i)
+            tables[tag.decode("latin-1")] = (offset, length)
+        
+        missing = {"head", "hhea", "hmtx", "cmap", "glyf", "loca", "maxp"} - set(tables)
+        if missing:
+            raise ValueError(f"tabelas ausentes na fonte: {', '.join(sorted(missing))}")
+        return tables
+    
+    def _read_cmap(self, offset):
+        """Lê o mapa Unicode do cmap: formato 12 ou, só com o plano básico, formato 4"""
+        data = self.data
+        subtables = {}
+        count = struct.unpack_from(">H", data, offset + 2)[0]
+        for i in range(count):
+            platform, encoding, start = struct.unpack_from(">HHI", data, offset + 4 + 8 * i)
+            if platform == 0 or (platform == 3 and encoding in (1, 10)):
+                subtables.setdefault(struct.unpack_from(">H", data, offset + start)[0], offset + start)
+        
+        cmap = {}
+        if 12 in subtables:
+            start = subtables[12]
+            groups = struct.unpack_from(">I", data, start + 12)[0]
+            for i in range(groups):
+                first, last, glyph = struct.unpack_from(">III", data, start + 16 + 12 * i)
+                for code in range(first, last + 1):
+                    cmap[code] = glyph + code - first
+        elif 4 in subtables:
+            start = subtables[4]
+            segments = struct.unpack_from(">H", data, start + 6)[0] // 2
+            ends = struct.unpack_from(f">{segments}H", data, start + 14)
+            starts = struct.unpack_from(f">{segments}H", data, start + 16 + 2 * segments)
+            deltas = struct.unpack_from(f">{segments}H", data, start + 16 + 4 * segments)
+            ranges_at = start + 16 + 6 * segments
+            range_offsets = struct.unpack_from(f">{segments}H", data, ranges_at)
+            for i in range(segments):
+                for code in range(starts[i], min(ends[i], 0xFFFE) + 1):
+                    if range_offsets[i]:
+                        position = ranges_at + 2 * i + range_offsets[i] + 2 * (code - starts[i])
+                        glyph = struct.unpack_from(">H", data, position)[0]
+                        glyph = (glyph + deltas[i]) & 0xFFFF if glyph else 0
+                    else:
+                        glyph = (code + deltas[i]) & 0xFFFF
+                    if glyph:
+                        cmap[code] = glyph
+        else:
+            raise ValueError("a fonte não tem um mapa de caracteres Unicode")
+        return cmap
+
+class _CharWidths(dict):
+    """Larguras (1/1000 em) por caractere de uma fonte TrueType, calculadas sob demanda"""
+    
+    def __init__(self, font):
+        super().__init__()
+        self.font = font
+    
+    def __missing__(self, char):
+        width = self[char] = self.font.glyph_width(self.font.glyph(char))
+        return width
+
+@lru_cache(maxsize=8)
+def load_font(path):
+    """Carrega uma fonte TrueType uma vez por processo; None se não puder ser usada"""
+    try:
+        return TrueTypeFont(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Fonte Unicode {path} indisponível para os PDFs: {str(e)}")
+        return None
+
+def _to_unicode_cmap(glyphs):
+    """CMap ToUnicode (glifo -> caractere), para que o texto do PDF possa ser copiado e buscado"""
+    lines = [
+        "/CIDInit /ProcSet findresource begin", "12 dict begin", "begincmap",
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        "/CMapName /Adobe-Identity-UCS def", "/CMapType 2 def",
+        "1 begincodespacerange", "<0000> <FFFF>", "endcodespacerange",
+    ]
+    items = sorted(glyphs.items())
+    for i in range(0, len(items), 100):
+        block = items[i:i + 100]
+        lines.append(f"{len(block)} beginbfchar")
+        lines.extend(f"<{glyph:04X}> <{char.encode('utf-16-be').hex().upper()}>" for glyph, char in block)
+        lines.append("endbfchar")
+    lines += ["endcmap", "CMapName currentdict /CMap defineresource pop", "end", "end"]
+    return "\n".join(lines).encode()
+
+class StreamingPDFWriter:
+    """
+    Gerador de PDF que grava cada página no disco assim que ela é concluída.
+    
+    Usa as fontes padrão Helvetica com larguras de glifos pré-calculadas e um
+    cache de largura por palavra; a quebra de linhas é uma única passagem pelas
+    palavras. A memória usada é limitada a uma página, independentemente do
+    tamanho do texto.
+    
+    Textos com caracteres fora do cp1252 usam uma fonte TrueType embutida
+    (Config.PDF_UNICODE_FONT), gravada no fim do arquivo só se for usada; sem
+    ela, esses caracteres saem como "?" e um aviso é registrado. Não há
+    shaping: escritas que dependem dele (árabe, devanágari) saem com os
+    glifos isolados.
+    
+    Uso:
+        with StreamingPDFWriter(path) as pdf:
+            pdf.add_line("Título", font="bold", size=16, align="center")
+            pdf.add_paragraph(texto)
+    """
+    
+    # Objetos fixos: 1 catálogo, 2 árvore de páginas, 3 recursos, 4-6 fontes padrão
+    _CATALOG, _PAGES, _RESOURCES = 1, 2, 3
+    
+    def __init__(self, path, page_size=PAGE_A4, margin=10 * MM, footer=None, compress=True,
+                 unicode_fonts=None):
+        """
+        Args:
+            path: Caminho do arquivo PDF
+            page_size: (largura, altura) em pontos
+            margin: Margem em pontos
+            footer: Texto do rodapé; "{page}" é substituído pelo número da página
+            compress: Se o conteúdo das páginas deve ser comprimido (FlateDecode)
+            unicode_fonts: Fontes TrueType por estilo ({'regular': caminho, 'bold': caminho})
+                para textos fora do cp1252 (padrão: Config.PDF_UNICODE_FONT e _BOLD)
+        """
+        self.width, self.height = page_size
+        self.margin = margin
+        self.footer = footer
+        self.compress = compress
+        
+        self._file = open(path, "wb")
+        self._pos = 0
+        self._offsets = {}
+        self._next_id = 4 + len(FONTS)
+        self._page_ids = []
+        self._ops = None
+        self._y = 0
+        self._word_widths = {font: {} for font in FONTS}
+        
+        if unicode_fonts is None:
+            unicode_fonts = {"regular": Config.PDF_UNICODE_FONT, "bold": Config.PDF_UNICODE_FONT_BOLD}
+        self._unicode_paths = unicode_fonts
+        self._embedded = {}  # caminho -> fonte embutida (ver _unicode_font)
+        self._warnings = set()
+        self.path = path
+        
+        # Área reservada para o rodapé
+        self._bottom = margin + (8 if footer else 0)
+        
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_fonts()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+        return False
+    
+    @property
+    def page_count(self):
+        """Número de páginas gravadas até o momento"""
+        return len(self._page_ids) + (1 if self._ops is not None else 0)
+    
+    @property
+    def content_width(self):
+        """Largura útil da página em pontos"""
+        return self.width - 2 * self.margin
+    
+    def text_width(self, text, font="regular", size=11):
+        """Largura de um texto em pontos"""
+        data, glyphs, _ = self._prepare(text, font)
+        return sum(glyphs[c] for c in data) * size / 1000
+    
+    def add_line(self, text, font="regular", size=11, leading=None, align="left"):
+        """
+        Adiciona uma única linha de texto, sem quebra
+        
+        Args:
+            text: Texto da linha
+            font: 'regular', 'bold' ou 'italic'
+            size: Tamanho da fonte em pontos
+            leading: Altura da linha em pontos (padrão: 1,3 x size)
+            align: 'left' ou 'center'
+        """
+        data, glyphs, embedded = self._prepare(text, font)
+        x = self.margin
+        if align == "center":
+            x = (self.width - sum(glyphs[c] for c in data) * size / 1000) / 2
+        self._emit(data, font, size, leading or size * 1.3, x, embedded)
+    
+    def add_paragraph(self, text, font="regular", size=11, leading=None):
+        """
+        Adiciona um texto com quebra automática de linhas na largura útil
+        
+        Args:
+            text: Texto (quebras de linha são tratadas como espaços)
+            font: 'regular', 'bold' ou 'italic'
+            size: Tamanho da fonte em pontos
+            leading: Altura da linha em pontos (padrão: 1,3 x size)
+        """
+        leading = leading or size * 1.3
+        data, glyphs, embedded = self._prepare(text, font)
+        for line in self._wrap(data, glyphs, font, size):
+            self._emit(line, font, size, leading, self.margin, embedded)
+    
+    def add_space(self, height):
+        """Avança o cursor verticalmente"""
+        if self._ops is None:
+            self._start_page()
+        self._y -= height
+    
+    def add_rule(self, spacing=0):
+        """Desenha uma linha horizontal na largura útil"""
+        if self._ops is None or self._y - spacing < self._bottom:
+            self._new_page()
+        self._ops.append(
+            f"{self.margin:.2f} {self._y:.2f} m {self.width - self.margin:.2f} {self._y:.2f} l S\n".encode()
+        )
+        self._y -= spacing
+    
+    def close(self):
+        """Finaliza a última página e grava a árvore de páginas e o índice (xref)"""
+        if self._file.closed:
+            return
+        
+        if self._ops is not None or not self._page_ids:
+            if self._ops is None:
+                self._start_page()
+            self._finish_page()
+        
+        self._write_resources()
+        
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(self._PAGES, (
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} "
+            f"/MediaBox [0 0 {self.width:.2f} {self.height:.2f}] >>"
+        ).encode())
+        self._write_object(self._CATALOG, f"<< /Type /Catalog /Pages {self._PAGES} 0 R >>".encode())
+        
+        xref_offset = self._pos
+        size = self._next_id
+        xref = [f"xref\n0 {size}\n0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            xref.append(f"{self._offsets.get(object_id, 0):010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {size} /Root {self._CATALOG} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._write("".join(xref).encode())
+        
+        self._file.close()
+    
+    def _prepare(self, text, font):
+        """
+        Codifica o texto para a fonte padrão ou, com caracteres fora do cp1252,
+        mantém o texto para a fonte Unicode embutida
+        
+        Returns:
+            tuple: (bytes cp1252 ou str, larguras dos glifos, fonte embutida ou None)
+        """
+        try:
+            return text.encode(ENCODING), _GLYPH_WIDTHS[font], None
+        except UnicodeEncodeError:
+            pass
+        
+        embedded = self._unicode_font(font)
+        if embedded is None:
+            self._warn("sem fonte Unicode (Config.PDF_UNICODE_FONT), caracteres fora do cp1252 saem como '?'")
+            return text.encode(ENCODING, "replace"), _GLYPH_WIDTHS[font], None
+        return text, embedded["font"].char_widths, embedded
+    
+    def _unicode_font(self, font):
+        """Fonte embutida do estilo, ou a regular na falta dela; None se nenhuma puder ser usada"""
+        for path in (self._unicode_paths.get(font), self._unicode_paths.get("regular")):
+            if not path:
+                continue
+            if path in self._embedded:
+                return self._embedded[path]
+            truetype = load_font(path)
+            if truetype is not None:
+                embedded = self._embedded[path] = {
+                    "font": truetype,
+                    "resource": f"F{len(FONTS) + len(self._embedded) + 1}",
+                    "id": self._allocate_id(),
+                    "glyphs": {}  # glifo -> caractere, para as larguras e o ToUnicode
+                }
+                return embedded
+        return None
+    
+    def _warn(self, message):
+        """Registra um aviso uma única vez por documento"""
+        if message not in self._warnings:
+            self._warnings.add(message)
+            logger.warning(f"PDF {os.path.basename(self.path)}: {message}")
+    
+    def _wrap(self, data, glyphs, font, size):
+        """Quebra uma linha (bytes cp1252 ou texto da fonte embutida) em linhas que cabem na largura útil"""
+        cache = self._word_widths[font]
+        if len(cache) > WORD_CACHE_SIZE:
+            cache.clear()
+        
+        limit = self.content_width * 1000 / size
+        if isinstance(data, bytes):
+            space, join, pack = glyphs[32], b" ".join, bytes
+        else:
+            space, join, pack = glyphs[" "], " ".join, "".join
+        line = []
+        line_width = 0
+        
+        for word in data.split():
+            width = cache.get(word)
+            if width is None:
+                width = cache[word] = sum(glyphs[c] for c in word)
+            
+            if width > limit:
+                # Palavra maior que a linha (ex.: URL): quebrar por caracteres
+                if line:
+                    yield join(line)
+                line, line_width = [], 0
+                piece = []
+                piece_width = 0
+                for c in word:
+                    if piece and piece_width + glyphs[c] > limit:
+                        yield pack(piece)
+                        piece, piece_width = [], 0
+                    piece.append(c)
+                    piece_width += glyphs[c]
+                line, line_width = [pack(piece)], piece_width
+            elif line and line_width + space + width > limit:
+                yield join(line)
+                line, line_width = [word], width
+            else:
+                line_width += space + width if line else width
+                line.append(word)
+        
+        if line:
+            yield join(line)
+    
+    def _show(self, data, font, embedded):
+        """Recurso da fonte e string do PDF para um texto preparado por _prepare"""
+        if embedded is None:
+            return FONTS[font][0].encode(), b"(%s)" % _escape(data)
+        
+        truetype, used = embedded["font"], embedded["glyphs"]
+        codes = []
+        for char in data:
+            glyph = truetype.glyph(char)
+            if glyph:
+                used.setdefault(glyph, char)
+            elif not char.isspace():
+                self._warn(f"caracteres sem glifo na fonte {truetype.name}")
+            codes.append(f"{glyph:04X}")
+        return embedded["resource"].encode(), b"<%s>" % "".join(codes).encode()
+    
+    def _emit(self, data, font, size, leading, x, embedded=None):
+        """Adiciona uma linha já codificada (ver _prepare) na posição atual do cursor"""
+        if self._ops is None or self._y - leading < self._bottom:
+            self._new_page()
+        
+        # Linha base centralizada verticalmente na altura da linha
+        baseline = self._y - (leading + size * 0.7) / 2
+        resource, string = self._show(data, font, embedded)
+        self._ops.append(b"BT /%s %g Tf %.2f %.2f Td %s Tj ET\n" % (resource, size, x, baseline, string))
+        self._y -= leading
+    
+    def _new_page(self):
+        if self._ops is not None:
+            self._finish_page()
+        self._start_page()
+    
+    def _start_page(self):
+        self._ops = []
+        self._y = self.height - self.margin
+    
+    def _finish_page(self):
+        """Grava o conteúdo da página atual no disco e libera a memória"""
+        if self.footer:
+            page_number = len(self._page_ids) + 1
+            data, glyphs, embedded = self._prepare(self.footer.format(page=page_number), "italic")
+            x = (self.width - sum(glyphs[c] for c in data) * 8 / 1000) / 2
+            resource, string = self._show(data, "italic", embedded)
+            self._ops.append(b"BT /%s 8 Tf %.2f %.2f Td %s Tj ET\n" % (resource, x, self.margin / 2, string))
+        
+        content = b"".join(self._ops)
+        self._ops = None
+        
+        content_id = self._allocate_id()
+        if self.compress:
+            content = zlib.compress(content, 6)
+            header = f"<< /Length {len(content)} /Filter /FlateDecode >>"
+        else:
+            header = f"<< /Length {len(content)} >>"
+        self._write_object(content_id, header.encode() + b"\nstream\n" + content + b"\nendstream")
+        
+        page_id = self._allocate_id()
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent {self._PAGES} 0 R /Resources {self._RESOURCES} 0 R "
+            f"/Contents {content_id} 0 R >>"
+        ).encode())
+        self._page_ids.append(page_id)
+    
+    def _write_fonts(self):
+        for i, (_, base_font) in enumerate(FONTS.values()):
+            self._write_object(4 + i, (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>"
+            ).encode())
+    
+    def _write_resources(self):
+        """Grava as fontes embutidas usadas e o dicionário de recursos das páginas"""
+        fonts = [f"/{resource} {4 + i} 0 R" for i, (resource, _) in enumerate(FONTS.values())]
+        for embedded in self._embedded.values():
+            self._write_embedded_font(embedded)
+            fonts.append(f"/{embedded['resource']} {embedded['id']} 0 R")
+        self._write_object(self._RESOURCES, f"<< /Font << {' '.join(fonts)} >> >>".encode())
+    
+    def _write_embedded_font(self, embedded):
+        """Grava o subconjunto da fonte TrueType, com as larguras e o ToUnicode dos glifos usados"""
+        truetype, used = embedded["font"], embedded["glyphs"]
+        
+        # Prefixo de subconjunto (seis letras) exigido no nome da fonte
+        digest = hashlib.md5(repr(sorted(used)).encode()).digest()
+        name = "".join(chr(65 + b % 26) for b in digest[:6]) + "+" + truetype.name
+        
+        file_id = self._allocate_id()
+        subset = truetype.subset(used)
+        data = zlib.compress(subset, 6)
+        self._write_object(file_id, (
+            b"<< /Length %d /Length1 %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+            % (len(data), len(subset), data)
+        ))
+        
+        descriptor_id = self._allocate_id()
+        self._write_object(descriptor_id, (
+            f"<< /Type /FontDescriptor /FontName /{name} /Flags 32 "
+            f"/FontBBox [{' '.join(str(v) for v in truetype.bbox)}] /ItalicAngle 0 "
+            f"/Ascent {truetype.ascent} /Descent {truetype.descent} /CapHeight {truetype.ascent} "
+            f"/StemV 80 /FontFile2 {file_id} 0 R >>"
+        ).encode())
+        
+        widths = " ".join(f"{glyph} [{truetype.glyph_width(glyph)}]" for glyph in sorted(used))
+        cid_font_id = self._allocate_id()
+        self._write_object(cid_font_id, (
+            f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{name} "
+            f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            f"/FontDescriptor {descriptor_id} 0 R /DW {truetype.glyph_width(0)} /W [{widths}] "
+            f"/CIDToGIDMap /Identity >>"
+        ).encode())
+        
+        to_unicode_id = self._allocate_id()
+        cmap = zlib.compress(_to_unicode_cmap(used), 6)
+        self._write_object(to_unicode_id, (
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(cmap), cmap)
+        ))
+        
+        self._write_object(embedded["id"], (
+            f"<< /Type /Font /Subtype /Type0 /BaseFont /{name} /Encoding /Identity-H "
+            f"/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>"
+        ).encode())
+    
+    def _allocate_id(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+    
+    def _write_object(self, object_id, body):
+        self._offsets[object_id] = self._pos
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+    
+    def _write(self, data):
+        self._file.write(data)
+        self._pos += len(data)
@@ -0,0 +1,161 @@
+import os
+import hashlib
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Tamanho dos blocos lidos/gravados ao salvar e calcular o hash de arquivos
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+def save_stream(stream, file_path, chunk_size=CHUNK_SIZE):
+    """
+    Grava um stream em disco calculando o SHA-256 durante a gravação
+    
+    Args:
+        stream: Objeto com método read() (ex.: FileStorage.stream)
+        file_path: Caminho de destino
+        chunk_size: Tamanho dos blocos de leitura
+    
+    Returns:
+        tuple: (tamanho_em_bytes, sha256_hex)
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    
+    with open(file_path, 'wb') as f:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    
+    return size, sha256.hexdigest()
+
+def hash_file(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Calcula o SHA-256 de um arquivo lendo-o em blocos
+    
+    Args:
+        file_path: Caminho do arquivo
+        chunk_size: Tamanho dos blocos de leitura
+    
+    Returns:
+        str: SHA-256 em hexadecimal
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+# Bytes iniciais examinados para identificar o contêiner
+SNIFF_BYTES = 512
+
+def sniff_media_type(header):
+    """
+    Identifica o tipo de mídia pelos primeiros bytes do arquivo (magic bytes)
+    
+    Args:
+        header: Primeiros bytes do arquivo (até SNIFF_BYTES)
+    
+    Returns:
+        str: 'audio', 'video' ou None se o contêiner não for reconhecido
+    """
+    if header.startswith((b'ID3', b'fLaC', b'OggS', b'#!AMR')):
+        return 'audio'
+    if header[:4] == b'RIFF':
+        if header[8:12] == b'WAVE':
+            return 'audio'
+        if header[8:12] == b'AVI ':
+            return 'video'
+    if header[4:8] == b'ftyp':
+        # MP4/MOV: a marca indica se o arquivo contém apenas áudio
+        return 'audio' if header[8:12] in (b'M4A ', b'M4B ', b'M4P ') else 'video'
+    if header.startswith(b'\x1a\x45\xdf\xa3'):  # Matroska / WebM
+        return 'video'
+    if header.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'):  # ASF (WMV/WMA)
+        return 'video'
+    if header[:1] == b'\x47' and header[188:189] == b'\x47':  # MPEG-TS
+        return 'video'
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:  # MP3/AAC (ADTS)
+        return 'audio'
+    return None
+
+class UploadSink:
+    """
+    Destino de um upload recebido em streaming.
+    
+    Usado como stream_factory do parser multipart: os blocos recebidos são
+    gravados direto no arquivo final (sem o arquivo temporário do Werkzeug),
+    enquanto o SHA-256 é calculado e o contêiner é identificado pelos
+    primeiros bytes. Uploads acima de max_size são interrompidos e removidos.
+    """
+    
+    def __init__(self, file_path, max_size=None, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            file_path: Caminho final do arquivo
+            max_size: Tamanho máximo em bytes (opcional)
+            chunk_size: Tamanho do buffer de gravação
+        """
+        self.path = file_path
+        self.max_size = max_size
+        self.size = 0
+        self.media_type = None
+        self.claimed = False  # True quando o arquivo passa a pertencer a uma tarefa
+        self._sha256 = hashlib.sha256()
+        self._header = b''
+        self._file = open(file_path, 'wb', buffering=chunk_size)
+        self._reader = None
+    
+    @property
+    def sha256(self):
+        """SHA-256 (hexadecimal) dos bytes recebidos até o momento"""
+        return self._sha256.hexdigest()
+    
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.discard()
+            raise RequestEntityTooLarge()
+        
+        if len(self._header) < SNIFF_BYTES:
+            self._header += data[:SNIFF_BYTES - len(self._header)]
+            if len(self._header) == SNIFF_BYTES:
+                self.media_type = sniff_media_type(self._header)
+        
+        self._sha256.update(data)
+        self._file.write(data)
+        return len(data)
+    
+    def finish(self):
+        """Conclui a gravação (arquivos menores que SNIFF_BYTES são identificados aqui)"""
+        if not self._file.closed:
+            self._file.close()
+            if self.media_type is None and self._header:
+                self.media_type = sniff_media_type(self._header)
+    
+    def seek(self, offset, whence=0):
+        # O parser chama seek(0) ao fim do upload; a leitura passa a vir do arquivo
+        self.finish()
+        if self._reader is not None:
+            return self._reader.seek(offset, whence)
+        return 0
+    
+    def read(self, size=-1):
+        self.finish()
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        return self._reader.read(size)
+    
+    def close(self):
+        self.finish()
+        if self._reader is not None:
+            self._reader.close()
+    
+    def discard(self):
+        """Interrompe a gravação e remove o arquivo parcial"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
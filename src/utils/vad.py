@@ -0,0 +1,203 @@
+import bisect
+
+import numpy as np
+
+from ..config.config import Config
+from .audio import SAMPLE_RATE, DecodedAudio
+
+# Energia abaixo da qual um quadro nunca é fala (dBFS), se houver áudio mais alto
+ENERGY_FLOOR_DB = -50.0
+
+# Quadros dentro dessa margem do pico do áudio são sempre fala (ruído estacionário alto)
+PEAK_MARGIN_DB = 6.0
+
+def frame_energy_db(samples, sample_rate=SAMPLE_RATE, frame_seconds=0.03):
+    """
+    Energia média de cada quadro em dBFS
+    
+    Returns:
+        tuple: (energias por quadro, amostras por quadro)
+    """
+    frame = max(1, int(frame_seconds * sample_rate))
+    n_frames = len(samples) // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.einsum('ij,ij->i', frames, frames) / frame
+    return 10.0 * np.log10(energy + 1e-10), frame
+
+def _runs(mask):
+    """Intervalos [início, fim) de valores True consecutivos"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+def detect_speech(samples, sample_rate=SAMPLE_RATE, threshold_db=None, min_silence_seconds=None,
+                  min_speech_seconds=None, padding_seconds=None, frame_seconds=0.03):
+    """
+    Encontra os trechos com fala pela energia dos quadros
+    
+    Um quadro é fala se sua energia passa do ruído de fundo (percentil 10
+    dos quadros) por threshold_db, com piso em ENERGY_FLOOR_DB. O limiar
+    nunca passa de PEAK_MARGIN_DB abaixo do pico, de modo que áudio com
+    ruído alto e constante (música, ambiente) é mantido em vez de
+    descartado. Pausas menores que min_silence_seconds não separam trechos,
+    trechos menores que min_speech_seconds são descartados e cada trecho
+    ganha padding_seconds de margem dos dois lados.
+    
+    Args:
+        samples: Áudio mono (float32)
+        sample_rate: Taxa de amostragem
+        threshold_db: Margem sobre o ruído de fundo (padrão: Config.VAD_THRESHOLD_DB)
+        min_silence_seconds: Menor pausa removida (padrão: Config.VAD_MIN_SILENCE_SECONDS)
+        min_speech_seconds: Menor trecho de fala mantido (padrão: Config.VAD_MIN_SPEECH_SECONDS)
+        padding_seconds: Margem em volta da fala (padrão: Config.VAD_PADDING_SECONDS)
+        frame_seconds: Tamanho do quadro usado para medir a energia
+    
+    Returns:
+        list: Lista de tuplas (amostra_inicial, amostra_final) em ordem
+    """
+    threshold_db = Config.VAD_THRESHOLD_DB if threshold_db is None else threshold_db
+    min_silence_seconds = Config.VAD_MIN_SILENCE_SECONDS if min_silence_seconds is None else min_silence_seconds
+    min_speech_seconds = Config.VAD_MIN_SPEECH_SECONDS if min_speech_seconds is None else min_speech_seconds
+    padding_seconds = Config.VAD_PADDING_SECONDS if padding_seconds is None else padding_seconds
+    
+    energy, frame = frame_energy_db(samples, sample_rate, frame_seconds)
+    if len(energy) == 0:
+        return [(0, len(samples))] if len(samples) else []
+    
+    noise_db = np.percentile(energy, 10)
+    peak_db = np.percentile(energy, 99.5)
+    limit = min(max(noise_db + threshold_db, ENERGY_FLOOR_DB), peak_db - PEAK_MARGIN_DB)
+    runs = _runs(energy > limit)
+    
+    # Juntar trechos separados por pausas curtas
+    min_gap = int(np.ceil(min_silence_seconds / frame_seconds))
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    
+    min_frames = int(np.ceil(min_speech_seconds / frame_seconds))
+    padding = int(padding_seconds * sample_rate)
+    total = len(samples)
+    
+    spans = []
+    for start, end in merged:
+        if end - start < min_frames:
+            continue
+        start = max(0, start * frame - padding)
+        # O resto após o último quadro completo acompanha o último trecho
+        end = total if end == len(energy) else min(total, end * frame + padding)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+class SpeechMap:
+    """
+    Correspondência entre o áudio só com fala e o áudio original.
+    
+    Os trechos de fala são concatenados em um único buffer para o Whisper;
+    os tempos do resultado (na linha do tempo do buffer) são convertidos de
+    volta para a linha do tempo original por remap.
+    """
+    
+    def __init__(self, spans, total_samples, sample_rate=SAMPLE_RATE):
+        self.spans = list(spans)
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+        
+        # Início de cada trecho no buffer concatenado (segundos)
+        self._compact_starts = []
+        position = 0
+        for start, end in self.spans:
+            self._compact_starts.append(position / sample_rate)
+            position += end - start
+        self.speech_samples = position
+    
+    @property
+    def speech_seconds(self):
+        return self.speech_samples / self.sample_rate
+    
+    @property
+    def skipped_seconds(self):
+        return (self.total_samples - self.speech_samples) / self.sample_rate
+    
+    @property
+    def skipped_fraction(self):
+        return 1.0 - self.speech_samples / self.total_samples if self.total_samples else 0.0
+    
+    def compact(self, audio):
+        """Retorna um DecodedAudio só com os trechos de fala"""
+        samples = np.concatenate([audio.samples[start:end] for start, end in self.spans])
+        return DecodedAudio(samples, audio.sample_rate, decode_time=audio.decode_time,
+                            source_bytes=audio.source_bytes)
+    
+    def to_original(self, seconds, end=False):
+        """
+        Converte um tempo do buffer concatenado para o áudio original
+        
+        Args:
+            seconds: Tempo no buffer só com fala
+            end: Se o tempo é o fim de um segmento (na junção de dois
+                trechos, fica no fim do anterior em vez do início do seguinte)
+        """
+        if end:
+            index = bisect.bisect_left(self._compact_starts, seconds) - 1
+        else:
+            index = bisect.bisect_right(self._compact_starts, seconds) - 1
+        index = max(0, index)
+        
+        start, stop = self.spans[index]
+        original = start / self.sample_rate + seconds - self._compact_starts[index]
+        return min(max(original, start / self.sample_rate), stop / self.sample_rate)
+    
+    def remap(self, result):
+        """
+        Converte os tempos de um resultado no formato do Whisper
+        
+        Returns:
+            dict: Cópia do resultado com segmentos (e palavras) no tempo original
+        """
+        segments = []
+        for segment in result.get("segments", []):
+            segment = dict(segment)
+            segment["start"] = self.to_original(segment["start"])
+            segment["end"] = max(segment["start"], self.to_original(segment["end"], end=True))
+            if "seek" in segment:
+                segment["seek"] = int(self.to_original(segment["seek"] / 100) * 100)
+            if segment.get("words"):
+                segment["words"] = [
+                    dict(word, start=self.to_original(word["start"]),
+                         end=self.to_original(word["end"], end=True))
+                    for word in segment["words"]
+                ]
+            segments.append(segment)
+        return dict(result, segments=segments)
+
+def build_speech_map(audio, min_skipped_fraction=None, **kwargs):
+    """
+    Detecta a fala de um DecodedAudio
+    
+    Args:
+        audio: Áudio decodificado
+        min_skipped_fraction: Fração mínima de áudio descartado para valer a
+            pena transcrever só a fala (padrão: Config.VAD_MIN_SKIPPED_FRACTION)
+        **kwargs: Parâmetros de detect_speech
+    
+    Returns:
+        SpeechMap: Trechos de fala, ou None se o áudio deve ser transcrito
+            inteiro (pouco a descartar ou nenhuma fala encontrada)
+    """
+    if min_skipped_fraction is None:
+        min_skipped_fraction = Config.VAD_MIN_SKIPPED_FRACTION
+    
+    spans = detect_speech(audio.samples, audio.sample_rate, **kwargs)
+    if not spans:
+        return None
+    
+    speech_map = SpeechMap(spans, len(audio.samples), audio.sample_rate)
+    if speech_map.skipped_fraction < min_skipped_fraction:
+        return None
+    return speech_map
@@ -0,0 +1,61 @@
+"""
+Processo de transcrição independente do servidor web.
+
+Executa o TranscriptionManager com workers locais, consumindo a fila
+persistente do SQLite (transcription_jobs). Com TRANSCREVER_EMBEDDED_WORKER=0
+os processos web apenas gravam as tarefas na fila e leem o progresso do
+banco, sem carregar o Whisper; web e inferência escalam separadamente, e
+vários processos src.worker podem consumir o mesmo banco.
+
+Uso:
+    python -m src.worker --workers 2
+
+No primeiro SIGTERM/SIGINT o worker para de reservar tarefas e aguarda as
+que estão em andamento; no segundo, devolve-as à fila e encerra na hora.
+"""
+
+import argparse
+import os
+import signal
+import threading
+
+from .config.config import Config
+from .utils.logger import logger
+from .database.models import init_db
+from .services.transcription_service import get_transcription_manager
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de transcrições do Transcrever")
+    parser.add_argument("--workers", type=int, default=Config.MAX_CONCURRENT_TRANSCRIPTIONS,
+                        help="Transcrições simultâneas neste processo")
+    args = parser.parse_args()
+    
+    if not Config.PERSISTENT_QUEUE:
+        parser.error("src.worker requer Config.PERSISTENT_QUEUE = True")
+    
+    Config.MAX_CONCURRENT_TRANSCRIPTIONS = args.workers
+    init_db()
+    manager = get_transcription_manager(run_workers=True)
+    scheduler = manager.scheduler
+    
+    stop_requested = threading.Event()
+    
+    def handle_signal(signum, frame):
+        if stop_requested.is_set():
+            logger.info("Encerrando imediatamente; transcrições em andamento voltam para a fila")
+            scheduler.job_queue.release(scheduler.worker_id)
+            os._exit(1)
+        logger.info("Encerrando após as transcrições em andamento (repita o sinal para forçar)")
+        stop_requested.set()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    logger.info(f"Worker {scheduler.worker_id} aguardando tarefas ({args.workers} slot(s))")
+    while not stop_requested.wait(1.0):
+        pass
+    
+    manager.shutdown(wait=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Testes da transcrição em trechos paralelos (src/utils/chunking.py).
+
+Usam áudio sintético (rajadas de tom separadas por silêncio) e um modelo
+falso que "transcreve" cada rajada como uma palavra, sem o Whisper.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.config.config import Config
+from src.utils import chunking
+from src.utils.audio import DecodedAudio
+from src.utils.cancellation import CancelToken, TaskCancelled
+from src.utils.chunking import ParallelChunkTranscriber, find_chunk_boundaries, stitch_results
+
+# Taxa baixa para manter os buffers pequenos; os cortes dependem só de segundos
+SAMPLE_RATE = 1000
+
+# Tolerância (segundos) entre os timestamps sequenciais e paralelos
+TOLERANCE = 0.05
+
+def synthetic_speech(words, sample_rate=SAMPLE_RATE, word_seconds=1.5, gap_seconds=0.5, seed=0):
+    """
+    Gera uma "fala": uma rajada de tom por palavra, separadas por silêncio
+    
+    A amplitude de cada rajada codifica a palavra (0.1 a 0.9), e o silêncio
+    tem um ruído baixo para que a energia nunca seja exatamente zero.
+    
+    Returns:
+        tuple: (amostras float32, lista de (início, fim) de cada palavra em segundos)
+    """
+    rng = np.random.default_rng(seed)
+    pieces = []
+    spans = []
+    position = 0
+    for word in words:
+        gap = int(gap_seconds * sample_rate)
+        pieces.append(rng.normal(0, 1e-4, gap))
+        position += gap
+        
+        length = int(word_seconds * sample_rate)
+        t = np.arange(length) / sample_rate
+        pieces.append(word / 10 * np.sin(2 * np.pi * 50 * t))
+        spans.append((position / sample_rate, (position + length) / sample_rate))
+        position += length
+    
+    pieces.append(rng.normal(0, 1e-4, int(gap_seconds * sample_rate)))
+    return np.concatenate(pieces).astype(np.float32), spans
+
+class StubModel:
+    """
+    Modelo falso com a interface transcribe do Whisper
+    
+    Cada trecho acima do limiar de amplitude vira um segmento cujo texto é
+    a amplitude da rajada ("w3" para 0.3); trechos cortados no meio de uma
+    rajada geram uma palavra parcial, como o Whisper faria.
+    """
+    
+    def __init__(self, sample_rate=SAMPLE_RATE, threshold=0.01):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+    
+    def transcribe(self, samples, **params):
+        active = np.abs(samples) > self.threshold
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        
+        segments = []
+        for start, end in zip(starts, ends):
+            # Juntar os cruzamentos por zero da mesma rajada
+            if segments and start - segments[-1]["_end"] < 0.1 * self.sample_rate:
+                segments[-1]["_end"] = end
+                continue
+            segments.append({"_start": start, "_end": end})
+        
+        result = []
+        for i, segment in enumerate(segments):
+            start, end = segment["_start"], segment["_end"]
+            amplitude = float(np.abs(samples[start:end]).max())
+            result.append({
+                "id": i,
+                "seek": 0,
+                "start": start / self.sample_rate,
+                "end": end / self.sample_rate,
+                "text": f" w{round(amplitude * 10)}"
+            })
+        
+        return {
+            "text": "".join(segment["text"] for segment in result),
+            "segments": result,
+            "language": params.get("language", "pt")
+        }
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    """ParallelChunkTranscriber com threads e o modelo falso no lugar dos processos do Whisper"""
+    monkeypatch.setattr(chunking, "_worker_model", StubModel())
+    monkeypatch.setattr(Config, "CHUNK_MIN_SECONDS", 10)
+    monkeypatch.setattr(Config, "CHUNK_MAX_SECONDS", 25)
+    
+    transcriber = ParallelChunkTranscriber(max_workers=3)
+    pool = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(transcriber, "_get_pool",
+                        lambda model_name: transcriber._pools.setdefault(model_name, pool))
+    yield transcriber
+    pool.shutdown(wait=True)
+
+def test_short_audio_is_a_single_chunk():
+    samples, _ = synthetic_speech([1, 2, 3])
+    assert find_chunk_boundaries(samples, SAMPLE_RATE, min_seconds=10, max_seconds=25) == [(0, len(samples))]
+
+def test_boundaries_cover_audio_within_limits():
+    samples, _ = synthetic_speech([(i % 9) + 1 for i in range(60)])
+    boundaries = find_chunk_boundaries(samples, SAMPLE_RATE, min_seconds=10, max_seconds=25)
+    
+    assert len(boundaries) > 1
+    assert boundaries[0][0] == 0
+    assert boundaries[-1][1] == len(samples)
+    for (_, end), (start, _) in zip(boundaries, boundaries[1:]):
+        assert end == start
+    for start, end in boundaries:
+        assert 10 * SAMPLE_RATE <= end - start <= 25 * SAMPLE_RATE + SAMPLE_RATE
+
+def test_boundaries_fall_on_energy_minima():
+    samples, spans = synthetic_speech([(i % 9) + 1 for i in range(60)])
+    boundaries = find_chunk_boundaries(samples, SAMPLE_RATE, min_seconds=10, max_seconds=25)
+    
+    # Nenhum corte cai dentro de uma palavra
+    for _, cut in boundaries[:-1]:
+        seconds = cut / SAMPLE_RATE
+        assert not any(start < seconds < end for start, end in spans)
+
+def test_boundary_picks_the_quietest_frame():
+    # Ruído constante com um único ponto silencioso entre 10 s e 25 s
+    rng = np.random.default_rng(1)
+    samples = rng.normal(0, 0.3, 40 * SAMPLE_RATE).astype(np.float32)
+    quiet = 17 * SAMPLE_RATE
+    samples[quiet:quiet + SAMPLE_RATE // 10] = 0.0
+    
+    boundaries = find_chunk_boundaries(samples, SAMPLE_RATE, min_seconds=10, max_seconds=25)
+    
+    cut = boundaries[0][1]
+    assert quiet <= cut < quiet + SAMPLE_RATE // 10
+
+def test_last_chunk_is_not_shorter_than_minimum():
+    samples, _ = synthetic_speech([(i % 9) + 1 for i in range(14)])
+    boundaries = find_chunk_boundaries(samples, SAMPLE_RATE, min_seconds=10, max_seconds=25)
+    
+    start, end = boundaries[-1]
+    assert end - start >= 10 * SAMPLE_RATE
+
+def test_stitch_offsets_timestamps():
+    first = {"language": "pt", "segments": [
+        {"id": 0, "seek": 0, "start": 0.5, "end": 2.0, "text": " um"},
+        {"id": 1, "seek": 0, "start": 2.5, "end": 4.0, "text": " dois"}
+    ]}
+    second = {"language": "en", "segments": [
+        {"id": 0, "seek": 0, "start": 0.2, "end": 1.0, "text": " três"}
+    ]}
+    
+    result = stitch_results([(0.0, first), (12.5, second)])
+    
+    assert result["text"] == " um dois três"
+    assert result["language"] == "pt"
+    assert [s["id"] for s in result["segments"]] == [0, 1, 2]
+    assert result["segments"][2]["start"] == pytest.approx(12.7)
+    assert result["segments"][2]["end"] == pytest.approx(13.5)
+    assert result["segments"][2]["seek"] == 1250
+    
+    # Os resultados de entrada não são alterados
+    assert second["segments"][0]["start"] == 0.2
+
+def test_stitch_empty():
+    assert stitch_results([]) == {"text": "", "segments": [], "language": None}
+
+def test_parallel_matches_sequential(transcriber):
+    words = [(i % 9) + 1 for i in range(80)]
+    samples, spans = synthetic_speech(words)
+    audio = DecodedAudio(samples, SAMPLE_RATE)
+    
+    sequential = StubModel().transcribe(samples, language="pt")
+    progress = []
+    parallel = transcriber.transcribe(audio, "base", {"language": "pt"},
+                                      on_progress=lambda done, total: progress.append((done, total)))
+    
+    assert len(progress) > 1
+    assert progress[-1][0] == progress[-1][1]
+    
+    assert parallel["text"] == sequential["text"]
+    assert parallel["text"].split() == [f"w{word}" for word in words]
+    assert len(parallel["segments"]) == len(sequential["segments"]) == len(spans)
+    for par, seq in zip(parallel["segments"], sequential["segments"]):
+        assert par["start"] == pytest.approx(seq["start"], abs=TOLERANCE)
+        assert par["end"] == pytest.approx(seq["end"], abs=TOLERANCE)
+    
+    starts = [segment["start"] for segment in parallel["segments"]]
+    assert starts == sorted(starts)
+    assert parallel["segments"][-1]["end"] <= audio.duration
+
+class FakeProcessPool:
+    """ProcessPoolExecutor falso que só registra o encerramento"""
+    
+    def __init__(self, **kwargs):
+        self.closed = False
+    
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.closed = True
+
+def test_pool_in_use_is_not_evicted(monkeypatch):
+    monkeypatch.setattr(chunking, "ProcessPoolExecutor", FakeProcessPool)
+    monkeypatch.setattr(Config, "PARALLEL_CHUNK_MAX_POOLS", 1)
+    transcriber = ParallelChunkTranscriber(max_workers=2)
+    
+    base = transcriber._acquire("base")
+    small = transcriber._acquire("small")
+    
+    # O pool do "base" continua ativo enquanto a outra tarefa o usa
+    assert not base.closed
+    assert list(transcriber._pools) == ["base", "small"]
+    
+    transcriber._release(base)
+    assert base.closed
+    assert list(transcriber._pools) == ["small"]
+    
+    transcriber._release(small)
+    assert not small.closed
+    assert transcriber._acquire("small") is small
+
+def test_cancel_recycles_pool_with_running_chunks(transcriber, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    
+    class BlockingModel(StubModel):
+        def transcribe(self, samples, **params):
+            started.set()
+            release.wait(5)
+            return super().transcribe(samples, **params)
+    
+    terminated = []
+    def terminate(pool):
+        terminated.append(pool)
+        release.set()
+    
+    monkeypatch.setattr(chunking, "_worker_model", BlockingModel())
+    monkeypatch.setattr(chunking, "_terminate_pool", terminate)
+    monkeypatch.setattr(Config, "CANCEL_POLL_SECONDS", 0.05)
+    
+    samples, _ = synthetic_speech([(i % 9) + 1 for i in range(80)])
+    token = CancelToken()
+    threading.Thread(target=lambda: started.wait(5) and token.cancel(), daemon=True).start()
+    
+    with pytest.raises(TaskCancelled):
+        transcriber.transcribe(DecodedAudio(samples, SAMPLE_RATE), "base", cancel_token=token)
+    
+    # Os trechos em andamento são interrompidos e o pool não é mais reaproveitado
+    assert len(terminated) == 1
+    assert "base" not in transcriber._pools
+    assert not transcriber._in_use
@@ -0,0 +1,83 @@
+"""
+Testes do gerador de PDF (src/utils/pdf_writer.py).
+
+O texto é extraído do próprio PDF: as strings literais das fontes padrão
+são decodificadas em cp1252 e as da fonte embutida, pelo seu ToUnicode.
+"""
+
+import os
+import re
+import zlib
+
+import pytest
+
+from src.config.config import Config
+from src.utils import pdf_writer
+from src.utils.pdf_writer import StreamingPDFWriter
+
+FONT = Config.PDF_UNICODE_FONT
+
+# Cirílico, grego e latino com acentos, em parágrafos que ocupam várias linhas
+MULTILINGUAL = " ".join(["Привет, мир! Это проверка кириллицы.", "Γειά σου Κόσμε.", "Olá, ação — “aspas”."] * 20)
+
+def extract_text(path):
+    """Texto das linhas do PDF, na ordem em que foram gravadas"""
+    with open(path, "rb") as f:
+        data = f.read()
+    streams = [zlib.decompress(stream) for stream in re.findall(rb"/FlateDecode >>\nstream\n(.*?)\nendstream", data, re.S)]
+    
+    to_unicode = {}
+    for stream in streams:
+        if b"beginbfchar" in stream:
+            for glyph, char in re.findall(rb"<([0-9A-F]{4})> <([0-9A-F]+)>", stream):
+                to_unicode[glyph.decode()] = bytes.fromhex(char.decode()).decode("utf-16-be")
+    
+    lines = []
+    for stream in streams:
+        for literal, hexa in re.findall(rb"\(((?:\\.|[^\\)])*)\) Tj|<([0-9A-F]*)> Tj", stream):
+            if hexa:
+                lines.append("".join(to_unicode.get(hexa[i:i + 4].decode(), "�") for i in range(0, len(hexa), 4)))
+            else:
+                lines.append(re.sub(rb"\\(.)", rb"\1", literal).decode("cp1252"))
+    return lines
+
+def test_non_latin_text_round_trips(tmp_path):
+    if not os.path.exists(FONT):
+        pytest.skip(f"fonte {FONT} não encontrada")
+    
+    path = str(tmp_path / "unicode.pdf")
+    with StreamingPDFWriter(path, unicode_fonts={"regular": FONT}) as pdf:
+        pdf.add_line("Transcrição")
+        pdf.add_paragraph(MULTILINGUAL)
+    
+    lines = extract_text(path)
+    assert lines[0] == "Transcrição"
+    assert len(lines) > 2
+    assert " ".join(lines[1:]).split() == MULTILINGUAL.split()
+    
+    # Só os glifos usados são embutidos
+    with open(path, "rb") as f:
+        assert b"/FontFile2" in f.read()
+    assert os.path.getsize(path) < os.path.getsize(FONT) / 4
+
+def test_latin_text_does_not_embed_font(tmp_path):
+    path = str(tmp_path / "latin.pdf")
+    with StreamingPDFWriter(path, unicode_fonts={"regular": FONT}) as pdf:
+        pdf.add_paragraph("Olá, ação — “aspas” € " * 50)
+    
+    with open(path, "rb") as f:
+        assert b"/FontFile2" not in f.read()
+    assert " ".join(extract_text(path)).split() == ("Olá, ação — “aspas” € " * 50).split()
+
+def test_missing_font_replaces_characters_and_warns(tmp_path, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(pdf_writer.logger, "warning", warnings.append)
+    
+    path = str(tmp_path / "fallback.pdf")
+    with StreamingPDFWriter(path, unicode_fonts={"regular": str(tmp_path / "inexistente.ttf")}) as pdf:
+        pdf.add_paragraph("Привет")
+        pdf.add_paragraph("мир")
+    
+    assert extract_text(path) == ["??????", "???"]
+    # Um aviso da fonte indisponível e um único aviso do documento
+    assert sum("fora do cp1252" in message for message in warnings) == 1
@@ -0,0 +1,25 @@
+"""
+Testes do cache de exportações (src/services/render_cache.py).
+"""
+
+from src.services.render_cache import RenderCache, text_hash
+
+def test_file_rendered_by_another_process_is_reused(tmp_path):
+    web = RenderCache(str(tmp_path))
+    worker = RenderCache(str(tmp_path))
+    renders = []
+    
+    def render(path):
+        renders.append(path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("olá")
+    
+    # O índice do processo web é lido antes da renderização no worker
+    assert web.get_stats()["entries"] == 0
+    web._lookup("inexistente", "inexistente.txt")
+    
+    path = worker.get_or_render("task", "txt", text_hash("olá"), render)
+    
+    assert web.get_or_render("task", "txt", text_hash("olá"), render) == path
+    assert len(renders) == 1
+    assert web.get_stats()["hits"] == 1
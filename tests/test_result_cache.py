@@ -0,0 +1,45 @@
+"""
+Testes do cache de resultados (src/services/result_cache.py).
+
+Duas instâncias sobre o mesmo diretório fazem o papel do processo web e
+do src.worker no modo com workers separados.
+"""
+
+from src.config.config import Config
+from src.services.result_cache import ResultCache
+
+RESULT = {"text": " olá", "detected_language": "pt", "segments": [[0.0, 1.0, " olá"]], "audio_duration": 1.0}
+
+def test_entry_written_by_another_process_is_a_hit(tmp_path):
+    web = ResultCache(str(tmp_path))
+    worker = ResultCache(str(tmp_path))
+    key = ResultCache.make_key("abc", "base", "auto")
+    
+    assert web.get(key) is None
+    
+    worker.put(key, RESULT)
+    
+    assert web.get(key) == RESULT
+    stats = web.get_stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+
+def test_eviction_accounts_for_entries_of_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_REFRESH_SECONDS", 0)
+    web = ResultCache(str(tmp_path))
+    worker = ResultCache(str(tmp_path))
+    
+    # Cada instância sozinha caberia no limite; as duas juntas, não
+    size = len(str(RESULT).encode("utf-8"))
+    web.max_size_bytes = worker.max_size_bytes = 3 * size
+    
+    keys = [ResultCache.make_key(str(i), "base", "auto") for i in range(4)]
+    worker.put(keys[0], RESULT)
+    worker.put(keys[1], RESULT)
+    web.put(keys[2], RESULT)
+    web.put(keys[3], RESULT)
+    
+    remaining = [key for key in keys if ResultCache(str(tmp_path)).get(key) is not None]
+    assert len(remaining) < len(keys)
+    assert keys[3] in remaining
+    assert web.get_stats()["size_mb"] * 1024 * 1024 <= web.max_size_bytes